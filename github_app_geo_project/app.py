@@ -14,7 +14,7 @@ import c2casgiutils.config
 import c2casgiutils.headers
 import sentry_sdk
 from c2casgiutils import health_checks
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from prometheus_client import start_http_server
@@ -36,7 +36,7 @@ from github_app_geo_project.templates import (
     render_template,
     sanitizer,
 )
-from github_app_geo_project.views.dashboard import DashboardData
+from github_app_geo_project.views.dashboard import DashboardApiData, DashboardData
 from github_app_geo_project.views.home import HomeData
 from github_app_geo_project.views.jobs import JobsData
 from github_app_geo_project.views.logs import LogsData
@@ -250,9 +250,19 @@ async def webhook_route(data: WebhookData) -> dict[str, None]:
 
 
 @app.get(f"{route_prefix}dashboard/{{module_name}}")
-async def dashboard_route(request: Request, data: DashboardData) -> HTMLResponse:
+async def dashboard_route(request: Request, data: DashboardData) -> Response:
     """Render the dashboard for a module."""
-    return templates.TemplateResponse(request, "dashboard.html", data)
+    etag = data.pop("etag", None)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else None
+    if data.pop("not_modified", False):
+        return Response(status_code=304, headers=headers)
+    return templates.TemplateResponse(request, "dashboard.html", data, headers=headers)
+
+
+@app.get(f"{route_prefix}api/dashboard/{{module_name}}")
+async def dashboard_api_route(data: DashboardApiData) -> Response:
+    """Get the read-only JSON data of the transversal status of a module."""
+    return data
 
 
 @app.get(f"{route_prefix}schema.json")
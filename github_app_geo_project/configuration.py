@@ -4,6 +4,7 @@
 
 import base64
 import logging
+import time
 from pathlib import Path
 from typing import Any, NamedTuple, cast
 
@@ -102,6 +103,10 @@ class GithubApplication(NamedTuple):
 
 
 _DEFAULT_BRANCH_CACHE: dict[str, str] = {}
+_CONFIGURATION_CACHE: dict[
+    str,
+    tuple[float, project_configuration.GithubApplicationProjectConfiguration],
+] = {}
 
 
 class GithubProject(NamedTuple):
@@ -272,3 +277,25 @@ async def get_configuration(
         ),
         project_custom_configuration,
     )
+
+
+async def get_cached_configuration(
+    github_project: GithubProject,
+) -> project_configuration.GithubApplicationProjectConfiguration:
+    """
+    Get the Configuration for the repository, from the cache if it's not too old.
+
+    The cache duration is `settings.dispatcher.configuration_cache_duration`.
+    """
+    key = f"{github_project.application.name}:{github_project.owner}/{github_project.repository}"
+    now = time.monotonic()
+    max_age = settings.dispatcher.configuration_cache_duration.total_seconds()
+    if key in _CONFIGURATION_CACHE:
+        timestamp, project_config = _CONFIGURATION_CACHE[key]
+        if now - timestamp < max_age:
+            return project_config
+        del _CONFIGURATION_CACHE[key]
+
+    project_config = await get_configuration(github_project)
+    _CONFIGURATION_CACHE[key] = (now, project_config)
+    return project_config
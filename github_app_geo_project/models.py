@@ -10,6 +10,7 @@ from typing import Any, TypedDict, Union
 import sqlalchemy
 import sqlalchemy.sql.functions
 from sqlalchemy import JSON, BigInteger, DateTime, Enum, ForeignKey, Integer, Unicode, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from github_app_geo_project.settings import settings
@@ -75,6 +76,7 @@ class Queue(Base):
     module_event_data: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=True)
     log: Mapped[str | None] = mapped_column(Unicode, nullable=True)
     check_run_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    run_after: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
     logs: Mapped[list["JobLogEntry"]] = relationship(
         "JobLogEntry",
         back_populates="job",
@@ -220,3 +222,69 @@ class ModuleStatus(Base):
         index=True,
     )
     data: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+
+class CheckRunUpdate(Base):
+    """SQLAlchemy model for the pending check run updates (outbox)."""
+
+    __tablename__ = "check_run_update"
+    __table_args__ = {"schema": _SCHEMA}  # noqa: RUF012
+
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        nullable=False,
+        autoincrement=True,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=sqlalchemy.sql.functions.now(),
+    )
+    application: Mapped[str] = mapped_column(Unicode, nullable=False)
+    owner: Mapped[str] = mapped_column(Unicode, nullable=False)
+    repository: Mapped[str] = mapped_column(Unicode, nullable=False)
+    check_run_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    # The arguments of the check run update, the updates of the same check run are merged
+    data: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=sqlalchemy.sql.functions.now(),
+        index=True,
+    )
+    last_error: Mapped[str | None] = mapped_column(Unicode, nullable=True)
+
+    def __repr__(self) -> str:
+        """Return the representation of the check run update."""
+        return f"CheckRunUpdate {self.id} [{self.check_run_id}]"
+
+
+class ModuleStatusEntry(Base):
+    """SQLAlchemy model for the keyed transversal status entries of a module."""
+
+    __tablename__ = "module_status_entry"
+    __table_args__ = (
+        UniqueConstraint("module", "key", name="uq_module_status_entry_module_key"),
+        {"schema": _SCHEMA},
+    )
+
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        nullable=False,
+        autoincrement=True,
+    )
+    module: Mapped[str] = mapped_column(Unicode, nullable=False, index=True)
+    key: Mapped[str] = mapped_column(Unicode, nullable=False)
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=sqlalchemy.sql.functions.now(),
+        onupdate=sqlalchemy.sql.functions.now(),
+        index=True,
+    )
@@ -2,18 +2,22 @@
 
 """The base class of the modules."""
 
+import datetime
 import json
 import logging
 from abc import abstractmethod
 from collections.abc import Mapping
 from enum import Enum
 from types import GenericAlias
-from typing import Any, Literal, NamedTuple, NotRequired, TypedDict
+from typing import Any, Literal, NamedTuple, NotRequired, TypedDict, overload
 
+import githubkit.webhooks
+import githubkit_schemas.latest.webhooks
+import sqlalchemy.dialects.postgresql
 import sqlalchemy.ext.asyncio
 from pydantic import BaseModel, ValidationError
 
-from github_app_geo_project import configuration
+from github_app_geo_project import configuration, models
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,6 +31,8 @@ PRIORITY_STANDARD = 30
 """Standard priority"""
 PRIORITY_CRON = 40
 """Priority for an action triggered by a cron"""
+PRIORITY_BACKGROUND = 50
+"""Priority for a background action, whose result isn't waited by the user"""
 
 
 class GHCIError(Exception):
@@ -64,6 +70,82 @@ class Action[EVENT_DATA]:
         self.checks = checks
 
 
+class GitHubEvent:
+    """
+    The GitHub event of a job.
+
+    The typed githubkit model is validated lazily and only once per event name,
+    and the common fields are read directly from the payload without validation.
+    """
+
+    name: str
+    """The GitHub event name present in the X-GitHub-Event header."""
+    data: Mapping[str, Any]
+    """The GitHub event data."""
+
+    def __init__(self, name: str, data: Mapping[str, Any]) -> None:
+        """Create the event."""
+        self.name = name
+        self.data = data
+        self._parsed: dict[str, githubkit_schemas.latest.webhooks.WebhookEvent] = {}
+
+    @overload
+    def parse(self, name: Literal["create"]) -> githubkit_schemas.latest.webhooks.CreateEvent: ...
+    @overload
+    def parse(self, name: Literal["delete"]) -> githubkit_schemas.latest.webhooks.DeleteEvent: ...
+    @overload
+    def parse(self, name: Literal["check_run"]) -> githubkit_schemas.latest.webhooks.CheckRunEvent: ...
+    @overload
+    def parse(self, name: Literal["check_suite"]) -> githubkit_schemas.latest.webhooks.CheckSuiteEvent: ...
+    @overload
+    def parse(self, name: Literal["discussion"]) -> githubkit_schemas.latest.webhooks.DiscussionEvent: ...
+    @overload
+    def parse(self, name: Literal["milestone"]) -> githubkit_schemas.latest.webhooks.MilestoneEvent: ...
+    @overload
+    def parse(self, name: Literal["pull_request"]) -> githubkit_schemas.latest.webhooks.PullRequestEvent: ...
+    @overload
+    def parse(
+        self, name: Literal["pull_request_review"]
+    ) -> githubkit_schemas.latest.webhooks.PullRequestReviewEvent: ...
+    @overload
+    def parse(self, name: Literal["push"]) -> githubkit_schemas.latest.webhooks.PushEvent: ...
+    @overload
+    def parse(self, name: Literal["release"]) -> githubkit_schemas.latest.webhooks.ReleaseEvent: ...
+    @overload
+    def parse(
+        self, name: Literal["repository_dispatch"]
+    ) -> githubkit_schemas.latest.webhooks.RepositoryDispatchEvent: ...
+    @overload
+    def parse(self, name: Literal["workflow_job"]) -> githubkit_schemas.latest.webhooks.WorkflowJobEvent: ...
+    @overload
+    def parse(self, name: Literal["workflow_run"]) -> githubkit_schemas.latest.webhooks.WorkflowRunEvent: ...
+    @overload
+    def parse(self, name: str | None = None) -> githubkit_schemas.latest.webhooks.WebhookEvent: ...
+
+    def parse(self, name: str | None = None) -> githubkit_schemas.latest.webhooks.WebhookEvent:
+        """
+        Get the typed githubkit model of the event.
+
+        The payload is validated on the first call, the next calls return the cached model.
+        Pass the event name to get the model type of this event, e.g. `parse("pull_request")`.
+        """
+        name = name or self.name
+        if name not in self._parsed:
+            self._parsed[name] = githubkit.webhooks.parse_obj(name, self.data)
+        return self._parsed[name]
+
+    @property
+    def sha(self) -> str | None:
+        """Get the head commit sha of the event, without validating the payload."""
+        if self.name == "pull_request":
+            return ((self.data.get("pull_request") or {}).get("head") or {}).get("sha")
+        if self.name == "push":
+            return self.data.get("before") if self.data.get("deleted") else self.data.get("after")
+        if self.name in ("workflow_run", "check_suite", "check_run"):
+            return (self.data.get(self.name) or {}).get("head_sha")
+        return None
+
+
 class GetActionContext(NamedTuple):
     """The context of the get_actions method."""
 
@@ -79,6 +161,8 @@ class GetActionContext(NamedTuple):
     """The repository of the event."""
     github_application: configuration.GithubApplication
     """The github application."""
+    github_event: GitHubEvent
+    """The GitHub event, with the lazily parsed typed model."""
 
 
 class CleanupContext[EVENT_DATA](NamedTuple):
@@ -111,6 +195,7 @@ class ProcessContext[CONFIGURATION, EVENT_DATA](NamedTuple):
         github_event_name: The GitHub event name present in the X-GitHub-Event header
             (e.g., 'push', 'pull_request', 'issues', etc.).
         github_event_data: The complete GitHub event data as a dictionary.
+        github_event: The GitHub event, the typed githubkit model is parsed once on demand.
         module_config: The module configuration of type _CONFIGURATION (typically a Pydantic model).
         module_event_name: The module-specific event name (e.g., 'dashboard', 'cron', etc.).
         module_event_data: The module event data of type _EVENT_DATA created by get_actions method.
@@ -156,6 +241,8 @@ class ProcessContext[CONFIGURATION, EVENT_DATA](NamedTuple):
     """The job ID."""
     service_url: str
     """The base URL of the application."""
+    github_event: GitHubEvent
+    """The GitHub event, with the lazily parsed typed model."""
 
 
 class Permissions(TypedDict):
@@ -402,6 +489,237 @@ class ProcessOutput[EVENT_DATA, INTERMEDIATE_STATUS]:
         self.check_output = check_output
 
 
+class TransversalStatusEntries:
+    """
+    The transversal status of a module stored by keys (e.g. one entry by repository).
+
+    Only the entries that are read are loaded, and only the entries that are written are stored
+    on `flush`. The entries that are read before being written are stored with a compare-and-swap
+    on their version, `flush` returns `False` if one of them was changed by another job in the meantime.
+
+    The shared entries (e.g. an organization-wide aggregate) should be changed with `increment` and
+    `set_items`, applied in the database without reading the entry, so they don't conflict.
+    """
+
+    def __init__(self, session: sqlalchemy.ext.asyncio.AsyncSession, module_name: str) -> None:
+        """Create the entries of the module."""
+        self._session = session
+        self._module_name = module_name
+        self._entries: dict[str, dict[str, Any] | None] = {}
+        self._versions: dict[str, int | None] = {}
+        self._changed: set[str] = set()
+        self._max_age: datetime.timedelta | None = None
+        self._increments: dict[str, dict[str, dict[str, int]]] = {}
+        self._items: dict[str, dict[str, dict[str, Any]]] = {}
+
+    @property
+    def changed(self) -> dict[str, dict[str, Any] | None]:
+        """The written entries, None for the deleted ones."""
+        return {key: self._entries[key] for key in sorted(self._changed)}
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Get the entry data, None if it doesn't exist."""
+        if key not in self._entries:
+            row = (
+                await self._session.execute(
+                    sqlalchemy.select(models.ModuleStatusEntry.data, models.ModuleStatusEntry.version).where(
+                        models.ModuleStatusEntry.module == self._module_name,
+                        models.ModuleStatusEntry.key == key,
+                    ),
+                )
+            ).one_or_none()
+            self._entries[key] = None if row is None else row.data
+            self._versions[key] = None if row is None else row.version
+        return self._entries[key]
+
+    def set(self, key: str, data: dict[str, Any]) -> None:
+        """Set the entry data."""
+        self._entries[key] = data
+        self._changed.add(key)
+
+    def delete(self, key: str) -> None:
+        """Delete the entry."""
+        self._entries[key] = None
+        self._changed.add(key)
+
+    def delete_older(self, max_age: datetime.timedelta) -> None:
+        """Delete the entries that aren't written since `max_age`."""
+        self._max_age = max_age
+
+    async def get_older_keys(self, max_age: datetime.timedelta) -> list[str]:
+        """Get the keys of the entries that aren't written since `max_age`."""
+        return list(
+            (
+                await self._session.execute(
+                    sqlalchemy.select(models.ModuleStatusEntry.key).where(
+                        models.ModuleStatusEntry.module == self._module_name,
+                        models.ModuleStatusEntry.updated_at < datetime.datetime.now(datetime.UTC) - max_age,
+                    ),
+                )
+            ).scalars()
+        )
+
+    def increment(self, key: str, group: str, counts: dict[str, int]) -> None:
+        """Add the counts to the counters of the `group` object of the entry, without reading it."""
+        group_counts = self._increments.setdefault(key, {}).setdefault(group, {})
+        for name, count in counts.items():
+            group_counts[name] = group_counts.get(name, 0) + count
+
+    def set_items(self, key: str, group: str, items: dict[str, Any]) -> None:
+        """Set the items of the `group` object of the entry, None to remove it, without reading it."""
+        self._items.setdefault(key, {}).setdefault(group, {}).update(items)
+
+    def reset(self) -> None:
+        """Forget the read and written entries, to re-apply the changes after a conflict."""
+        self._entries.clear()
+        self._versions.clear()
+        self._changed.clear()
+        self._max_age = None
+        self._increments.clear()
+        self._items.clear()
+
+    async def _store(self, key: str) -> bool:
+        data = self._entries[key]
+        where = [
+            models.ModuleStatusEntry.module == self._module_name,
+            models.ModuleStatusEntry.key == key,
+        ]
+        if key in self._versions:
+            version = self._versions[key]
+            if version is None:
+                if data is None:
+                    return True
+                result = await self._session.execute(
+                    sqlalchemy.dialects.postgresql.insert(models.ModuleStatusEntry)
+                    .values(module=self._module_name, key=key, data=data)
+                    .on_conflict_do_nothing(constraint="uq_module_status_entry_module_key"),
+                )
+                return bool(result.rowcount)  # type: ignore[attr-defined]
+            where.append(models.ModuleStatusEntry.version == version)
+            if data is None:
+                result = await self._session.execute(
+                    sqlalchemy.delete(models.ModuleStatusEntry).where(*where)
+                )
+            else:
+                result = await self._session.execute(
+                    sqlalchemy.update(models.ModuleStatusEntry)
+                    .where(*where)
+                    .values(data=data, version=version + 1, updated_at=sqlalchemy.func.now()),
+                )
+            return bool(result.rowcount)  # type: ignore[attr-defined]
+
+        # Blind write, the last writer wins
+        if data is None:
+            await self._session.execute(sqlalchemy.delete(models.ModuleStatusEntry).where(*where))
+        else:
+            insert = sqlalchemy.dialects.postgresql.insert(models.ModuleStatusEntry).values(
+                module=self._module_name,
+                key=key,
+                data=data,
+            )
+            await self._session.execute(
+                insert.on_conflict_do_update(
+                    constraint="uq_module_status_entry_module_key",
+                    set_={
+                        "data": insert.excluded.data,
+                        "version": models.ModuleStatusEntry.version + 1,
+                        "updated_at": sqlalchemy.func.now(),
+                    },
+                ),
+            )
+        return True
+
+    async def _patch(self, key: str) -> None:
+        """Apply the increments and the items on the entry in one statement, without compare-and-swap."""
+        data = models.ModuleStatusEntry.data
+        empty = sqlalchemy.literal({}, sqlalchemy.dialects.postgresql.JSONB)
+        initial: dict[str, dict[str, Any]] = {}
+        groups: list[Any] = []
+        for group, counts in self._increments.get(key, {}).items():
+            initial[group] = counts
+            groups += [
+                sqlalchemy.literal(group, sqlalchemy.Unicode),
+                sqlalchemy.func.coalesce(data[group], empty).op(
+                    "||", return_type=sqlalchemy.dialects.postgresql.JSONB
+                )(
+                    sqlalchemy.func.jsonb_build_object(
+                        *(
+                            argument
+                            for name, count in counts.items()
+                            for argument in (
+                                sqlalchemy.literal(name, sqlalchemy.Unicode),
+                                sqlalchemy.func.coalesce(
+                                    data[(group, name)].astext.cast(sqlalchemy.BigInteger), 0
+                                )
+                                + sqlalchemy.literal(count, sqlalchemy.BigInteger),
+                            )
+                        ),
+                    ),
+                ),
+            ]
+        for group, items in self._items.get(key, {}).items():
+            values = {name: value for name, value in items.items() if value is not None}
+            initial[group] = values
+            groups += [
+                sqlalchemy.literal(group, sqlalchemy.Unicode),
+                sqlalchemy.func.coalesce(data[group], empty)
+                .op("-", return_type=sqlalchemy.dialects.postgresql.JSONB)(
+                    sqlalchemy.literal(
+                        [name for name, value in items.items() if value is None],
+                        sqlalchemy.dialects.postgresql.ARRAY(sqlalchemy.Text),
+                    ),
+                )
+                .op("||", return_type=sqlalchemy.dialects.postgresql.JSONB)(
+                    sqlalchemy.literal(values, sqlalchemy.dialects.postgresql.JSONB),
+                ),
+            ]
+        insert = sqlalchemy.dialects.postgresql.insert(models.ModuleStatusEntry).values(
+            module=self._module_name,
+            key=key,
+            data=initial,
+        )
+        await self._session.execute(
+            insert.on_conflict_do_update(
+                constraint="uq_module_status_entry_module_key",
+                set_={
+                    "data": data.op("||", return_type=sqlalchemy.dialects.postgresql.JSONB)(
+                        sqlalchemy.func.jsonb_build_object(*groups),
+                    ),
+                    "version": models.ModuleStatusEntry.version + 1,
+                    "updated_at": sqlalchemy.func.now(),
+                },
+            ),
+        )
+
+    async def flush(self) -> bool:
+        """Store the written entries, return `False` (and store nothing) on conflict."""
+        async with self._session.begin_nested() as savepoint:
+            for key in sorted(self._changed):
+                if not await self._store(key):
+                    await savepoint.rollback()
+                    return False
+            # After the compare-and-swap, to lock the shared entries only once the other entries are stored
+            for key in sorted({*self._increments, *self._items}):
+                await self._patch(key)
+            if self._max_age is not None:
+                await self._session.execute(
+                    sqlalchemy.delete(models.ModuleStatusEntry).where(
+                        models.ModuleStatusEntry.module == self._module_name,
+                        models.ModuleStatusEntry.updated_at
+                        < datetime.datetime.now(datetime.UTC) - self._max_age,
+                    ),
+                )
+        for key in self._changed:
+            # The version was incremented
+            del self._entries[key]
+            self._versions.pop(key, None)
+        self._changed.clear()
+        self._max_age = None
+        self._increments.clear()
+        self._items.clear()
+        return True
+
+
 class TransversalDashboardContext[TRANSVERSAL_STATUS](NamedTuple):
     """The context of the global dashboard."""
 
@@ -477,6 +795,10 @@ class Module[CONFIGURATION, EVENT_DATA, TRANSVERSAL_STATUS, INTERMEDIATE_STATUS]
 
         Note that this method is called in the queue consuming Pod
 
+        When the transversal status should be updated, this is the phase where the remote data should be
+        gathered, in the returned intermediate status, `update_transversal_status` and
+        `update_transversal_status_entries` shouldn't do any network call.
+
         :return: The message to be displayed in the issue dashboard, None for not changes, '' for no message
                  This is taken in account only if the method required_issue_dashboard return True.
         """
@@ -490,11 +812,57 @@ class Module[CONFIGURATION, EVENT_DATA, TRANSVERSAL_STATUS, INTERMEDIATE_STATUS]
         """
         Update the transversal status.
 
-        This method will not be called concurrently for the same module.
+        The status is stored with a compare-and-swap, when it was updated by another job in the meantime,
+        this method is called again with the new status, so it should only apply the intermediate status,
+        without any network call.
         """
         del context, intermediate_status, transversal_status
         return None
 
+    def has_transversal_status_entries(self) -> bool:
+        """
+        Return True if the transversal status is stored by keys.
+
+        In this case `update_transversal_status_entries` is called in place of `update_transversal_status`,
+        and the dashboard status is created with `transversal_status_from_entries`.
+        """
+        return False
+
+    async def update_transversal_status_entries(
+        self,
+        context: ProcessContext[CONFIGURATION, EVENT_DATA],
+        intermediate_status: INTERMEDIATE_STATUS,
+        entries: TransversalStatusEntries,
+    ) -> None:
+        """
+        Update the entries of the transversal status that are concerned by the intermediate status.
+
+        The entries read with `get` are stored with a compare-and-swap, when one of them was updated
+        by another job in the meantime, this method is called again with new entries, so it shouldn't
+        do any network call.
+        """
+        del context, intermediate_status, entries
+
+    def get_transversal_status_entry_keys(self, params: dict[str, str]) -> list[str] | None:
+        """
+        Get the keys of the entries needed by the dashboard for the query parameters, None for all the entries.
+
+        Used to load only the needed entries, e.g. an aggregate entry maintained by
+        `update_transversal_status_entries`.
+        """
+        del params
+        return None
+
+    def transversal_status_from_entries(self, entries: dict[str, dict[str, Any]]) -> TRANSVERSAL_STATUS:
+        """Create the full transversal status, used by the dashboard, from all the entries."""
+        return self.transversal_status_from_json(entries)
+
+    def transversal_status_to_entries(
+        self, transversal_status: TRANSVERSAL_STATUS
+    ) -> dict[str, dict[str, Any]]:
+        """Split a full transversal status in entries, used to migrate the status stored in one document."""
+        return self.transversal_status_to_json(transversal_status)
+
     def cleanup(self, context: CleanupContext[EVENT_DATA]) -> None:
         """
         Cleanup the event.
@@ -622,3 +990,16 @@ class Module[CONFIGURATION, EVENT_DATA, TRANSVERSAL_STATUS, INTERMEDIATE_STATUS]
         del context
         # Basic implementation to avoid to implement the method in the module
         return TransversalDashboardOutput(renderer="", data={})
+
+    def get_transversal_api(
+        self,
+        context: TransversalDashboardContext[TRANSVERSAL_STATUS],
+    ) -> dict[str, Any] | None:
+        """
+        Get the read-only JSON data of the transversal status, served by the API.
+
+        The query parameters are in `context.params`, raise a `ValueError` if they are invalid.
+        Return None if the module doesn't provide an API.
+        """
+        del context
+        return None
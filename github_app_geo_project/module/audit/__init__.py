@@ -5,18 +5,17 @@
 import asyncio
 import base64
 import datetime
+import hashlib
 import json
 import logging
-import os
 import re
-import shutil
 import urllib.parse
 from typing import Any, Literal, cast
 
 import anyio
 import githubkit.exception
-import githubkit.webhooks
 import githubkit_schemas.latest.models
+import packaging.version
 import security_md
 import yaml
 from githubkit.compat import type_validate_python
@@ -32,17 +31,25 @@ from pydantic import BaseModel
 from github_app_geo_project import models, module
 from github_app_geo_project.module import ProcessOutput
 from github_app_geo_project.module import utils as module_utils
-from github_app_geo_project.module.audit import configuration
+from github_app_geo_project.module.audit import configuration, environment_cache, toolchains
 from github_app_geo_project.module.audit import utils as audit_utils
+from github_app_geo_project.settings import settings
 
 _LOGGER = logging.getLogger(__name__)
 
-# Don't run Snyk in parallel
-_SNYK_LOCK = asyncio.Lock()
+# Limit the checks run concurrently by the worker
+_CHECKS_SEMAPHORE = asyncio.Semaphore(settings.audit.checks_concurrency)
+
+_SNYK_CACHE_MODULE = "audit-snyk-cache"
 
 _OUTDATED = "Outdated version"
 _ADVISORY = False
 
+# Entry of the organization-wide status, the other entries are keyed by repository
+_AGGREGATE_KEY = "_aggregate"
+# The repositories not updated since this duration are removed from the status
+_STATUS_MAX_AGE = datetime.timedelta(days=2)
+
 
 class _TransversalStatusTool(BaseModel):
     """Status data for a single check type, stored in transversal status."""
@@ -52,6 +59,13 @@ class _TransversalStatusTool(BaseModel):
     status: str = ""
     logs_url: str | None = None
     output_url: str | None = None
+    severities: dict[str, int] = {}
+    """Number of vulnerabilities by severity."""
+    vulnerabilities: list[str] = []
+    """Snyk identifiers of the vulnerabilities."""
+    updated_at: datetime.datetime | None = None
+    unresolved_since: datetime.datetime | None = None
+    """Time since the check is in error."""
 
 
 class _VulnerabilityStatus(BaseModel):
@@ -81,8 +95,57 @@ class _OutputRendererData(BaseModel):
     low_severity_vulnerabilities: dict[str, list[_VulnerabilityStatus]]
 
 
+class _RepositorySummary(BaseModel):
+    """Summary of a repository, used by the dashboard overview."""
+
+    updated_at: datetime.datetime
+    severity: str = ""
+    """The highest severity of the vulnerabilities."""
+    severities: dict[str, int] = {}
+    unresolved_since: datetime.datetime | None = None
+    unresolved_name: str = ""
+    branches: dict[str, datetime.datetime] = {}
+    """Last audit time by branch."""
+
+
+class _UnresolvedIssue(BaseModel):
+    repository: str
+    name: str
+    since: datetime.datetime
+
+
+class _StaleBranch(BaseModel):
+    repository: str
+    branch: str
+    updated_at: datetime.datetime
+
+
 class _TransversalStatusRepo(BaseModel):
     types: dict[str, _TransversalStatusTool] = {}
+    summary: _RepositorySummary | None = None
+
+
+class _AggregateUnresolved(BaseModel):
+    name: str
+    since: datetime.datetime
+
+
+class _AggregateStatus(BaseModel):
+    """
+    The organization-wide status, used by the dashboard overview without loading the repositories entries.
+
+    Updated with each repository summary by additive changes applied in the database
+    (`increment` and `set_items`), so the jobs don't conflict on it.
+    """
+
+    counts: dict[str, int] = {}
+    repositories_by_severity: dict[str, int] = {}
+    vulnerabilities_by_severity: dict[str, int] = {}
+    unresolved: dict[str, _AggregateUnresolved] = {}
+    """Oldest unresolved issue by repository."""
+    branches: dict[str, dict[str, datetime.datetime]] = {}
+    """Last audit time of the branches by repository."""
+    last_update: dict[str, datetime.datetime] = {}
 
 
 class _TransversalStatus(BaseModel):
@@ -91,6 +154,7 @@ class _TransversalStatus(BaseModel):
     updated: dict[str, datetime.datetime] = {}
     """Repository updated time"""
     repositories: dict[str, _TransversalStatusRepo] = {}
+    aggregate: _AggregateStatus | None = None
 
 
 class _IntermediateStatus(BaseModel):
@@ -116,9 +180,12 @@ def _get_process_output(
     short_message: list[str],
     success: bool,
     intermediate_status: _IntermediateStatus,
+    check_types: list[str] | None = None,
+    actions: list[module.Action[_EventData]] | None = None,
 ) -> module.ProcessOutput[_EventData, _IntermediateStatus]:
     assert context.module_event_data.type is not None
-    issue_check.set_check(context.module_event_data.type, checked=False)
+    for check_type in check_types or [context.module_event_data.type]:
+        issue_check.set_check(check_type, checked=False)
 
     return module.ProcessOutput(
         dashboard=issue_check.to_string(),
@@ -126,6 +193,7 @@ def _get_process_output(
         updated_transversal_status=True,
         success=success,
         check_output={"summary": "\n".join(short_message)} if short_message else {},
+        actions=actions,
     )
 
 
@@ -299,16 +367,20 @@ async def _process_snyk_dpkg(
     context: module.ProcessContext[configuration.AuditConfiguration, _EventData],
     issue_check: module_utils.DashboardIssue,
     intermediate_status: _IntermediateStatus,
-) -> tuple[list[str], bool]:
+    check_type: str,
+) -> tuple[list[str], bool, list[module.Action[_EventData]]]:
     short_message: list[str] = []
     success = True
+    actions: list[module.Action[_EventData]] = []
     output_tool = _TransversalStatusTool()
+    severities: dict[str, int] = {}
+    vulnerability_ids: list[str] = []
 
     key = f"Undefined {context.module_event_data.version}"
-    new_branch = f"ghci/audit/{context.module_event_data.type}/{context.module_event_data.version}"
-    if context.module_event_data.type == "snyk":
+    new_branch = f"ghci/audit/{check_type}/{context.module_event_data.version}"
+    if check_type == "snyk":
         key = f"Snyk check/fix {context.module_event_data.version}"
-    if context.module_event_data.type == "dpkg":
+    if check_type == "dpkg":
         key = f"Dpkg {context.module_event_data.version}"
     branch: str = cast("str", context.module_event_data.version)
 
@@ -316,76 +388,99 @@ async def _process_snyk_dpkg(
         context.github_project,
         branch,
     ) as cwd:
-        local_config: configuration.AuditConfiguration = {}
-
-        ghci_config_path = cwd / ".github" / "ghci.yaml"
-        if context.module_event_data.type in ("snyk", "dpkg") and await ghci_config_path.exists():
-            async with await ghci_config_path.open("r", encoding="utf-8") as file:
-                local_config = yaml.load(
-                    await file.read(),
-                    Loader=yaml.SafeLoader,
-                ).get("audit", {})
+        local_config = await _get_local_config(cwd)
 
         logs_url = urllib.parse.urljoin(
             context.service_url,
             f"logs/{context.job_id}",
         )
-        if context.module_event_data.type == "snyk":
-            async with _SNYK_LOCK:
-                python_version = ""
-                tool_versions = cwd / ".tool-versions"
-                if await tool_versions.exists():
-                    async with await tool_versions.open("r", encoding="utf-8") as file:
-                        for line in (await file.read()).splitlines():
-                            if line.startswith("python "):
-                                python_version = ".".join(
-                                    line.split(" ")[1].split(".")[0:2],
-                                ).strip()
-                                break
-
-                env = await _use_python_version(python_version, cwd) if python_version else os.environ.copy()
-
-                result, body, short_message, new_success, file_vulnerabilities = await audit_utils.snyk(
+        snyk_cached = False
+        if check_type == "snyk":
+            cache_entries = module.TransversalStatusEntries(context.session, _SNYK_CACHE_MODULE)
+            cache_entry_key = f"{context.github_project.owner}/{context.github_project.repository}:{branch}"
+            fingerprint = await audit_utils.get_snyk_fingerprint(
+                context.module_config.get("snyk", {}),
+                local_config.get("snyk", {}),
+                cwd,
+            )
+            cached = await cache_entries.get(cache_entry_key)
+            now = datetime.datetime.now(datetime.UTC)
+            reuse = _is_snyk_result_reusable(cached, fingerprint, now)
+
+            if reuse:
+                assert cached is not None
+                _LOGGER.info(
+                    "The Snyk inputs of the branch %s didn't change, reuse the results of %s",
                     branch,
-                    context.module_config,
-                    local_config,
-                    context.module_config.get("snyk", {}),
-                    local_config.get("snyk", {}),
-                    logs_url,
-                    env,
-                    cwd,
+                    cached["tested_at"],
                 )
-
-                # Run a second Snyk JSON test with --ignore-policy to find ignored vulnerabilities
-                ignored_vulns: dict[str, list[audit_utils.VulnerabilityData]] = {}
-                all_file_vulns = await audit_utils.snyk_test_ignored(
-                    branch,
-                    context.module_config.get("snyk", {}),
-                    local_config.get("snyk", {}),
-                    env,
-                    cwd,
+                snyk_cached = True
+                error_message: list[str | models.OutputData] = cached["messages"]
+                body = None
+                short_message = list(cached["short_message"])
+                new_success = True
+                file_vulnerabilities = _vulnerabilities_from_json(cached["vulnerabilities"])
+                ignored_vulns = _vulnerabilities_from_json(cached["ignored_vulnerabilities"])
+            else:
+                async with toolchains.TOOLCHAIN_REGISTRY.environment(await _get_python_version(cwd)) as env:
+                    (
+                        result,
+                        body,
+                        short_message,
+                        new_success,
+                        file_vulnerabilities,
+                        ignored_vulns,
+                    ) = await audit_utils.snyk(
+                        branch,
+                        context.module_config,
+                        local_config,
+                        context.module_config.get("snyk", {}),
+                        local_config.get("snyk", {}),
+                        logs_url,
+                        env,
+                        cwd,
+                    )
+                error_message = [{"title": m.title, "children": [m.to_html("no-title")]} for m in result]
+                del result
+
+                if new_success and fingerprint is not None:
+                    # The results should be refreshed when an ignore rule expires
+                    policy_expires = await audit_utils.get_snyk_policy_expiry(cwd)
+                    cache_entries.set(
+                        cache_entry_key,
+                        {
+                            "fingerprint": fingerprint,
+                            "tested_at": now.isoformat(),
+                            "policy_expires": policy_expires.isoformat() if policy_expires else None,
+                            "messages": error_message,
+                            "short_message": short_message,
+                            "vulnerabilities": _vulnerabilities_to_json(file_vulnerabilities),
+                            "ignored_vulnerabilities": _vulnerabilities_to_json(ignored_vulns),
+                        },
+                    )
+                    cache_entries.delete_older(settings.audit.snyk_cache_duration)
+                    if not await cache_entries.flush():
+                        _LOGGER.warning("The Snyk cache of the branch %s was updated by another job", branch)
+
+            # Parse .snyk files for ignore reasons
+            snyk_ignore_reasons: dict[str, str] = {}
+            snyk_files = await audit_utils.find_snyk_files(cwd)
+            for snyk_file in snyk_files:
+                reasons = await audit_utils.parse_snyk_ignore_reasons(snyk_file)
+                snyk_ignore_reasons.update(reasons)
+
+            # The upload doesn't delay the results, it's done by a background job
+            if _is_snyk_monitor_needed(
+                await cache_entries.get(f"{cache_entry_key}:monitor"), fingerprint, now
+            ):
+                actions.append(
+                    module.Action(
+                        priority=module.PRIORITY_BACKGROUND,
+                        data=_EventData(type="snyk-monitor", version=branch),
+                        title=f"snyk monitor ({branch})",
+                    ),
                 )
 
-                # Build a set of (snyk_id, package_version, file) for non-ignored vulns
-                non_ignored_keys: set[tuple[str, str, str]] = set()
-                for file_name, vulns in file_vulnerabilities.items():
-                    for vuln in vulns:
-                        non_ignored_keys.add((vuln.snyk_id, vuln.package_version, file_name))
-
-                # Find vulns present in all but not in non-ignored → these are ignored
-                for file_name, vulns in all_file_vulns.items():
-                    for vuln in vulns:
-                        vuln_key = (vuln.snyk_id, vuln.package_version, file_name)
-                        if vuln_key not in non_ignored_keys:
-                            ignored_vulns.setdefault(file_name, []).append(vuln)
-
-                # Parse .snyk files for ignore reasons
-                snyk_ignore_reasons: dict[str, str] = {}
-                snyk_files = await audit_utils.find_snyk_files(cwd)
-                for snyk_file in snyk_files:
-                    reasons = await audit_utils.parse_snyk_ignore_reasons(snyk_file)
-                    snyk_ignore_reasons.update(reasons)
-
             body_md = body.to_markdown() if body is not None else ""
             del body
             success &= new_success
@@ -393,7 +488,7 @@ async def _process_snyk_dpkg(
                 context,
                 key,
                 issue_check,
-                [{"title": m.title, "children": [m.to_html("no-title")]} for m in result],
+                error_message,
                 ", ".join(short_message),
             )
             message: module_utils.Message = module_utils.HtmlMessage(
@@ -464,6 +559,14 @@ async def _process_snyk_dpkg(
                     if vuln_severity >= min_advisory_severity:
                         high_critical_vulns.append(vuln)
 
+            # Structured data for the dashboard, one by vulnerability even if it's in several files
+            severity_by_id = {
+                vuln.snyk_id: vuln.severity for vulns in filtered_vulns.values() for vuln in vulns
+            }
+            vulnerability_ids = sorted(severity_by_id)
+            for vuln_severity_name in severity_by_id.values():
+                severities[vuln_severity_name] = severities.get(vuln_severity_name, 0) + 1
+
             if filtered_vulns or ignored_vulns:
                 vuln_data = (
                     {
@@ -558,10 +661,11 @@ async def _process_snyk_dpkg(
                 )
 
             # Create security advisories for HIGH and CRITICAL CVEs
-            if high_critical_vulns and _ADVISORY:
-                await _create_security_advisories(context, high_critical_vulns)
+            # Also without vulnerabilities, to close the fixed ones
+            if _ADVISORY:
+                await _create_security_advisories(context, branch, high_critical_vulns)
 
-        if context.module_event_data.type == "dpkg":
+        if check_type == "dpkg":
             body_md = "Update dpkg packages"
 
             if (
@@ -577,18 +681,20 @@ async def _process_snyk_dpkg(
         body_md += "\n" if body_md else ""
         body_md += f"[Logs]({logs_url})"
 
-        new_success, pr_messages = await _create_pull_request_if_changes(
-            branch,
-            new_branch,
-            key,
-            body_md,
-            context,
-            local_config,
-            cwd,
-            issue_check,
-        )
-        success &= new_success
-        short_message.extend(pr_messages)
+        # Nothing was fixed, keep the pull request of the last run
+        if not snyk_cached:
+            new_success, pr_messages = await _create_pull_request_if_changes(
+                branch,
+                new_branch,
+                key,
+                body_md,
+                context,
+                local_config,
+                cwd,
+                issue_check,
+            )
+            success &= new_success
+            short_message.extend(pr_messages)
 
     transversal_message = ", ".join(short_message)
     intermediate_status.status.types[key] = _TransversalStatusTool(
@@ -597,76 +703,163 @@ async def _process_snyk_dpkg(
         status="success" if success else "error",
         logs_url=logs_url,
         output_url=output_tool.output_url,
+        severities=severities,
+        vulnerabilities=vulnerability_ids,
     )
 
-    return short_message, success
+    return short_message, success, actions
 
 
-async def _use_python_version(python_version: str, cwd: anyio.Path) -> dict[str, str]:
-    command = ["pyenv", "local", python_version]
-    proc = await asyncio.create_subprocess_exec(
-        *command,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        cwd=cwd,
-    )
-    async with asyncio.timeout(300):
-        stdout, stderr = await proc.communicate()
-    message = module_utils.AnsiProcessMessage.from_async_artifacts(
-        command,
-        proc,
-        stdout,
-        stderr,
-    )
-    if proc.returncode != 0:
-        message.title = f"Error while setting the Python version to {python_version}"
-        _LOGGER.error(message)
-    else:
-        message.title = f"Setting the Python version to {python_version}"
-        _LOGGER.debug(message)
-    command = ["python", "--version"]
-    proc = await asyncio.create_subprocess_exec(
-        *command,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-        cwd=cwd,
-    )
-    async with asyncio.timeout(5):
-        stdout, stderr = await proc.communicate()
-
-    # Get path from /pyenv/versions/{python_version}.*/bin/
-    env = os.environ.copy()
-    bin_paths = [path async for path in anyio.Path("/pyenv/versions/").glob(f"{python_version}.*/bin")]
-    if bin_paths:
-        env["PATH"] = f"{bin_paths[0]}:{env['PATH']}"
-
-    message = module_utils.AnsiProcessMessage.from_async_artifacts(
-        command,
-        proc,
-        stdout,
-        stderr,
-    )
-    message.title = "Python version"
-    _LOGGER.debug(message)
+async def _process_branch(
+    context: module.ProcessContext[configuration.AuditConfiguration, _EventData],
+    issue_check: module_utils.DashboardIssue,
+    intermediate_status: _IntermediateStatus,
+    check_types: list[str],
+) -> tuple[list[str], bool, list[module.Action[_EventData]]]:
+    """
+    Run the checks of a branch concurrently, each one in its own working tree.
+
+    The number of checks run concurrently by the worker is limited by the checks concurrency setting.
+    Only the Snyk check uses the database session, it isn't shared by concurrent tasks.
+    """
 
-    # Cleanup the packages
-    await anyio.to_thread.run_sync(
-        lambda: shutil.rmtree(f"/var/www/.local/lib/python{python_version}", ignore_errors=True)
+    async def process_check(check_type: str) -> tuple[list[str], bool, list[module.Action[_EventData]]]:
+        async with _CHECKS_SEMAPHORE:
+            return await _process_snyk_dpkg(context, issue_check, intermediate_status, check_type)
+
+    results = await asyncio.gather(
+        *(process_check(check_type) for check_type in check_types),
+        return_exceptions=True,
     )
+    short_message: list[str] = []
+    success = True
+    actions: list[module.Action[_EventData]] = []
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+        short_message.extend(result[0])
+        success &= result[1]
+        actions.extend(result[2])
+    return short_message, success, actions
+
+
+def _is_snyk_result_reusable(
+    cached: dict[str, Any] | None,
+    fingerprint: str | None,
+    now: datetime.datetime,
+) -> bool:
+    """
+    Check if the cached Snyk results of a branch can be reused.
+
+    The results are reused while the fingerprint of the Snyk inputs doesn't change, and `snyk test`
+    is run again after the refresh interval to get the new vulnerabilities, or when an ignore rule
+    of the `.snyk` policies expired.
+    """
+    if fingerprint is None or cached is None or cached.get("fingerprint") != fingerprint:
+        return False
+    policy_expires = cached.get("policy_expires")
+    if policy_expires is not None and datetime.datetime.fromisoformat(policy_expires) <= now:
+        return False
+    return now - datetime.datetime.fromisoformat(cached["tested_at"]) <= settings.audit.snyk_refresh_interval
+
+
+def _is_snyk_monitor_needed(
+    monitored: dict[str, Any] | None,
+    fingerprint: str | None,
+    now: datetime.datetime,
+) -> bool:
+    """
+    Check if the dependencies of a branch should be uploaded with `snyk monitor`.
 
-    # Cleanup poetry virtual environments
-    await module_utils.run_timeout(
-        ["poetry", "env", "remove", "--all"],
-        env,
-        120,
-        success_message="Poetry virtual environments removed",
-        error_message="Failed to remove poetry virtual environments",
-        timeout_message="Poetry virtual environments removal timed out",
-        cwd=cwd,
-        error=False,
+    They are uploaded when the fingerprint changed since the last successful upload,
+    and again after the cache duration.
+    """
+    if fingerprint is None or monitored is None or monitored.get("fingerprint") != fingerprint:
+        return True
+    return (
+        now - datetime.datetime.fromisoformat(monitored["monitored_at"]) > settings.audit.snyk_cache_duration
     )
 
-    return env
+
+async def _process_snyk_monitor(
+    context: module.ProcessContext[configuration.AuditConfiguration, _EventData],
+) -> module.ProcessOutput[_EventData, _IntermediateStatus]:
+    """
+    Upload the dependencies of a branch with `snyk monitor`.
+
+    The jobs are coalesced by branch: the dependencies are only uploaded if they changed since the
+    last successful upload, e.g. by another job of the same branch.
+    """
+    branch: str = cast("str", context.module_event_data.version)
+    cache_entries = module.TransversalStatusEntries(context.session, _SNYK_CACHE_MODULE)
+    monitor_entry_key = f"{context.github_project.owner}/{context.github_project.repository}:{branch}:monitor"
+
+    async with module_utils.GIT_WORKTREE_CACHE.working_tree(context.github_project, branch) as cwd:
+        local_config = await _get_local_config(cwd)
+        fingerprint = await audit_utils.get_snyk_fingerprint(
+            context.module_config.get("snyk", {}),
+            local_config.get("snyk", {}),
+            cwd,
+        )
+        now = datetime.datetime.now(datetime.UTC)
+        if not _is_snyk_monitor_needed(await cache_entries.get(monitor_entry_key), fingerprint, now):
+            _LOGGER.info("The dependencies of the branch %s are already monitored", branch)
+            return module.ProcessOutput(success=True)
+
+        async with toolchains.TOOLCHAIN_REGISTRY.environment(await _get_python_version(cwd)) as env:
+            success = await audit_utils.snyk_monitor(
+                branch,
+                context.module_config.get("snyk", {}),
+                local_config.get("snyk", {}),
+                env,
+                cwd,
+            )
+
+    if success and fingerprint is not None:
+        cache_entries.set(monitor_entry_key, {"fingerprint": fingerprint, "monitored_at": now.isoformat()})
+        if not await cache_entries.flush():
+            _LOGGER.warning("The Snyk monitor state of the branch %s was updated by another job", branch)
+    return module.ProcessOutput(success=success)
+
+
+def _vulnerabilities_to_json(
+    vulnerabilities: dict[str, list[audit_utils.VulnerabilityData]],
+) -> dict[str, list[dict[str, Any]]]:
+    return {file_name: [vuln._asdict() for vuln in vulns] for file_name, vulns in vulnerabilities.items()}
+
+
+def _vulnerabilities_from_json(
+    vulnerabilities: dict[str, list[dict[str, Any]]],
+) -> dict[str, list[audit_utils.VulnerabilityData]]:
+    return {
+        file_name: [audit_utils.VulnerabilityData(**vuln) for vuln in vulns]
+        for file_name, vulns in vulnerabilities.items()
+    }
+
+
+async def _get_local_config(cwd: anyio.Path) -> configuration.AuditConfiguration:
+    """Get the audit configuration of the `.github/ghci.yaml` file of the working tree."""
+    ghci_config_path = cwd / ".github" / "ghci.yaml"
+    if not await ghci_config_path.exists():
+        return {}
+    async with await ghci_config_path.open("r", encoding="utf-8") as file:
+        return yaml.load(
+            await file.read(),
+            Loader=yaml.SafeLoader,
+        ).get("audit", {})
+
+
+async def _get_python_version(cwd: anyio.Path) -> str | None:
+    """Get the minor Python version of the `.tool-versions` file of the working tree."""
+    tool_versions = cwd / ".tool-versions"
+    if await tool_versions.exists():
+        async with await tool_versions.open("r", encoding="utf-8") as file:
+            for line in (await file.read()).splitlines():
+                if line.startswith("python "):
+                    return ".".join(
+                        line.split(" ")[1].split(".")[0:2],
+                    ).strip()
+    return None
 
 
 async def _create_pull_request_if_changes(
@@ -727,7 +920,10 @@ async def _create_pull_request_if_changes(
                     cwd,
                     pre_commit_config.get("enabled", True),
                     pre_commit_config.get("skip-hooks", []),
+                    await audit_utils.get_changed_files(cwd),
+                    await environment_cache.PRE_COMMIT_CACHE.get_env(cwd),
                 )
+                await environment_cache.PRE_COMMIT_CACHE.collect()
                 success &= new_success
                 if not new_success:
                     _LOGGER.error(
@@ -765,89 +961,336 @@ def _add_missing_fields(item: dict[str, Any]) -> dict[str, Any]:
     return {**item, "publisher": None, "author": None}
 
 
+_ADVISORY_FINGERPRINT_RE = re.compile(r"^Fingerprint: (ghci-[0-9a-f]+)$", re.MULTILINE)
+
+
+def _get_advisory_fingerprint(branch: str, vuln: audit_utils.VulnerabilityData) -> str:
+    """Get the stable fingerprint of the advisory of a vulnerability, also stored in its description."""
+    key = json.dumps([branch, vuln.package_manager, vuln.package_name, vuln.snyk_id])
+    return f"ghci-{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+
+
+def _package_version_key(version: str) -> tuple[int, packaging.version.Version | str]:
+    """Get the sort key of a package version, the versions that aren't PEP 440 compatible sort after, as text."""
+    try:
+        return (0, packaging.version.Version(version))
+    except packaging.version.InvalidVersion:
+        return (1, version)
+
+
+def _get_advisory_data(
+    branch: str,
+    fingerprint: str,
+    vulns: list[audit_utils.VulnerabilityData],
+) -> RepositoryAdvisoryCreateType:
+    """Get the advisory of the vulnerability, found in one or more files."""
+    vuln = vulns[0]
+    cve_id = vuln.cve_ids[0] if vuln.cve_ids else None
+    ecosystem = cast(
+        "Literal['rubygems', 'npm', 'pip', 'maven', 'nuget', 'composer', 'go', 'rust', 'erlang', 'actions', 'pub', 'other', 'swift']",
+        audit_utils.ECOSYSTEM_MAP.get(vuln.package_manager, "other"),
+    )
+
+    vulnerability_package = RepositoryAdvisoryCreatePropVulnerabilitiesItemsPropPackageType(
+        ecosystem=ecosystem,
+        name=vuln.package_name,
+    )
+    package_versions = sorted({v.package_version for v in vulns}, key=_package_version_key)
+    vuln_version_range = f">= {package_versions[0]}"
+    patched_versions = ", ".join(vuln.fixed_in) if vuln.fixed_in else None
+    vulnerability_item = RepositoryAdvisoryCreatePropVulnerabilitiesItemsType(
+        package=vulnerability_package,
+        vulnerable_version_range=vuln_version_range,
+        patched_versions=patched_versions,
+    )
+
+    severity = vuln.severity if vuln.severity in ("critical", "high", "medium", "low") else "high"
+    cwe_ids = [cwe for cwe in vuln.cwe_ids if cwe.startswith("CWE-")] or None
+    files = sorted({v.file for v in vulns})
+
+    return {
+        "summary": vuln.package_name if cve_id is None else f"{cve_id} in {vuln.package_name}",
+        "description": (
+            f"Vulnerability detected in {', '.join(files)} on the branch {branch}:\n\n"
+            f"Package: {vuln.package_name}@{', '.join(package_versions)}\n"
+            f"Snyk ID: {vuln.snyk_id}\n"
+            f"Severity: {vuln.severity}\n"
+            f"File: {', '.join(files)}\n"
+            f"Fingerprint: {fingerprint}"
+        ),
+        "vulnerabilities": [vulnerability_item],
+        "severity": cast(
+            "Literal['critical', 'high', 'medium', 'low'] | None",
+            severity,
+        ),
+        "cve_id": cve_id,
+        "cwe_ids": cwe_ids,
+    }
+
+
+def _is_advisory_changed(advisory: RepositoryAdvisory, data: RepositoryAdvisoryCreateType) -> bool:
+    """Check if the advisory differs from the desired one."""
+    vulnerabilities = [
+        (
+            vulnerability.package.name if vulnerability.package else None,
+            vulnerability.vulnerable_version_range,
+            vulnerability.patched_versions,
+        )
+        for vulnerability in advisory.vulnerabilities or []
+    ]
+    desired_vulnerabilities = [
+        (
+            vulnerability["package"]["name"],
+            vulnerability["vulnerable_version_range"],
+            vulnerability.get("patched_versions"),
+        )
+        for vulnerability in data["vulnerabilities"]
+    ]
+    return (
+        advisory.summary != data["summary"]
+        or advisory.description != data["description"]
+        or advisory.severity != data.get("severity")
+        or vulnerabilities != desired_vulnerabilities
+    )
+
+
 async def _create_security_advisories(
     context: module.ProcessContext[configuration.AuditConfiguration, _EventData],
+    branch: str,
     vulnerabilities: list[audit_utils.VulnerabilityData],
 ) -> None:
-    """Create GitHub Security Advisories for the given vulnerabilities."""
-    # List existing advisories to avoid duplicates
-    existing_advisory_ids: set[str] = set()
-    paginator = context.github_project.aio_github.rest.paginate(
-        context.github_project.aio_github.rest.security_advisories.async_list_repository_advisories,
+    """
+    Reconcile the GitHub Security Advisories of a branch with its vulnerabilities.
+
+    The existing advisories are listed once and compared in memory with the desired ones, by fingerprint.
+    Only the needed create, update and close calls are done, concurrently, and limited by the
+    remaining rate limit. The advisories are closed only while they are drafts.
+    """
+    owner = context.github_project.owner
+    repository = context.github_project.repository
+    aio_github = context.github_project.aio_github
+
+    desired: dict[str, list[audit_utils.VulnerabilityData]] = {}
+    for vuln in vulnerabilities:
+        desired.setdefault(_get_advisory_fingerprint(branch, vuln), []).append(vuln)
+
+    existing: dict[str, RepositoryAdvisory] = {}
+    # The advisories created before the fingerprints, matched by CVE
+    legacy_cve_ids: set[str] = set()
+    paginator = aio_github.rest.paginate(
+        aio_github.rest.security_advisories.async_list_repository_advisories,
         map_func=lambda response: type_validate_python(
             list[RepositoryAdvisory],
             [_add_missing_fields(item) for item in response.json()],
         ),
-        owner=context.github_project.owner,
-        repo=context.github_project.repository,
-        state="published",
+        owner=owner,
+        repo=repository,
     )
     async for advisory in paginator:
-        if advisory.identifiers:
-            for identifier in advisory.identifiers:
-                if identifier.type == "CVE":
-                    existing_advisory_ids.add(identifier.value)
-                    break
+        match = _ADVISORY_FINGERPRINT_RE.search(advisory.description or "")
+        if match is not None:
+            existing[match.group(1)] = advisory
+        elif advisory.state == "published":
+            legacy_cve_ids.update(
+                identifier.value for identifier in advisory.identifiers or [] if identifier.type == "CVE"
+            )
 
-    for vuln in vulnerabilities:
-        cve_id = vuln.cve_ids[0] if vuln.cve_ids else None
-        if cve_id and cve_id in existing_advisory_ids:
-            _LOGGER.debug("Security advisory already exists for %s", cve_id)
-            continue
+    calls: list[tuple[str, str, Any]] = []
+    for fingerprint, vulns in desired.items():
+        data = _get_advisory_data(branch, fingerprint, vulns)
+        existing_advisory = existing.get(fingerprint)
+        if existing_advisory is None:
+            if data["cve_id"] is not None and data["cve_id"] in legacy_cve_ids:
+                _LOGGER.debug("Security advisory already exists for %s", data["cve_id"])
+                continue
+            calls.append(("create", vulns[0].snyk_id, data))
+        elif existing_advisory.state == "closed":
+            # The vulnerability is back
+            calls.append(("reopen", existing_advisory.ghsa_id, {**data, "state": "draft"}))
+        elif existing_advisory.state != "published" and _is_advisory_changed(existing_advisory, data):
+            calls.append(("update", existing_advisory.ghsa_id, data))
+    branch_marker = f"on the branch {branch}:"
+    for fingerprint, advisory in existing.items():
+        if (
+            fingerprint not in desired
+            and advisory.state in ("draft", "triage")
+            and branch_marker in (advisory.description or "")
+        ):
+            calls.append(("close", advisory.ghsa_id, {"state": "closed"}))
+
+    if not calls:
+        return
+
+    rate_limit = (await aio_github.rest.rate_limit.async_get()).parsed_data
+    budget = rate_limit.resources.core.remaining - settings.audit.advisory_rate_limit_reserve
+    if budget < len(calls):
+        _LOGGER.warning(
+            "Not enough rate limit to reconcile the security advisories, %s of %s calls postponed",
+            len(calls) - max(budget, 0),
+            len(calls),
+        )
+        calls = calls[: max(budget, 0)]
 
-        try:
-            ecosystem = cast(
-                "Literal['rubygems', 'npm', 'pip', 'maven', 'nuget', 'composer', 'go', 'rust', 'erlang', 'actions', 'pub', 'other', 'swift']",
-                audit_utils.ECOSYSTEM_MAP.get(vuln.package_manager, "other"),
-            )
+    semaphore = asyncio.Semaphore(settings.audit.advisory_concurrency)
+
+    async def call(action: str, identifier: str, data: Any) -> None:
+        async with semaphore:
+            if action == "create":
+                await aio_github.rest.security_advisories.async_create_repository_advisory(
+                    owner=owner,
+                    repo=repository,
+                    data=data,
+                )
+            else:
+                await aio_github.rest.security_advisories.async_update_repository_advisory(
+                    owner=owner,
+                    repo=repository,
+                    ghsa_id=identifier,
+                    data=data,
+                )
+            _LOGGER.info("Security advisory %s: %s", action, identifier)
 
-            vulnerability_package = RepositoryAdvisoryCreatePropVulnerabilitiesItemsPropPackageType(
-                ecosystem=ecosystem,
-                name=vuln.package_name,
+    results = await asyncio.gather(*(call(*c) for c in calls), return_exceptions=True)
+    errors = []
+    for (action, identifier, _), result in zip(calls, results, strict=True):
+        if isinstance(result, githubkit.exception.RequestFailed):
+            _LOGGER.warning(
+                "Failed to %s the security advisory %s: %s",
+                action,
+                identifier,
+                result.response.text if result.response else str(result),
             )
-            vuln_version_range = f">= {vuln.package_version}"
-            patched_versions = ", ".join(vuln.fixed_in) if vuln.fixed_in else None
-            vulnerability_item = RepositoryAdvisoryCreatePropVulnerabilitiesItemsType(
-                package=vulnerability_package,
-                vulnerable_version_range=vuln_version_range,
-                patched_versions=patched_versions,
+        if isinstance(result, BaseException):
+            errors.append(result)
+    if errors:
+        raise errors[0]
+
+
+def _get_branch_name(type_key: str) -> str | None:
+    """Get the branch of a check type key, e.g. `Snyk check/fix master`, None for the repository checks."""
+    if type_key == _OUTDATED:
+        return None
+    parts = type_key.rsplit(" ", 1)
+    return parts[-1] if len(parts) > 1 else None
+
+
+def _get_repository_summary(repository: _TransversalStatusRepo, now: datetime.datetime) -> _RepositorySummary:
+    """Summarize the status of a repository for the dashboard overview."""
+    summary = _RepositorySummary(updated_at=now)
+    for type_key, type_data in repository.types.items():
+        for severity, count in type_data.severities.items():
+            summary.severities[severity] = summary.severities.get(severity, 0) + count
+        if type_data.unresolved_since is not None and (
+            summary.unresolved_since is None or type_data.unresolved_since < summary.unresolved_since
+        ):
+            summary.unresolved_since = type_data.unresolved_since
+            summary.unresolved_name = type_key
+        branch = _get_branch_name(type_key)
+        if branch is not None and type_data.updated_at is not None:
+            summary.branches[branch] = max(
+                summary.branches.get(branch, type_data.updated_at), type_data.updated_at
             )
+    summary.severity = max(
+        summary.severities,
+        key=lambda severity: audit_utils.SEVERITY_ORDER.get(severity, 0),
+        default="",
+    )
+    return summary
 
-            severity = vuln.severity if vuln.severity in ("critical", "high", "medium", "low") else "high"
-            cwe_ids = [cwe for cwe in vuln.cwe_ids if cwe.startswith("CWE-")] or None
-
-            data: RepositoryAdvisoryCreateType = {
-                "summary": vuln.package_name if cve_id is None else f"{cve_id} in {vuln.package_name}",
-                "description": (
-                    f"Vulnerability detected in {vuln.file}:\n\n"
-                    f"Package: {vuln.package_name}@{vuln.package_version}\n"
-                    f"Snyk ID: {vuln.snyk_id}\n"
-                    f"Severity: {vuln.severity}\n"
-                    f"File: {vuln.file}"
-                ),
-                "vulnerabilities": [vulnerability_item],
-                "severity": cast(
-                    "Literal['critical', 'high', 'medium', 'low'] | None",
-                    severity,
-                ),
-                "cve_id": cve_id,
-                "cwe_ids": cwe_ids,
-            }
-            await context.github_project.aio_github.rest.security_advisories.async_create_repository_advisory(
-                owner=context.github_project.owner,
-                repo=context.github_project.repository,
-                data=data,
+
+def _update_aggregate(
+    entries: module.TransversalStatusEntries,
+    repository: str,
+    old_summary: _RepositorySummary | None,
+    summary: _RepositorySummary | None,
+) -> None:
+    """Apply the difference between the old and the new summary of a repository on the aggregate entry."""
+    counts: dict[str, int] = {}
+    repositories_by_severity: dict[str, int] = {}
+    vulnerabilities_by_severity: dict[str, int] = {}
+    for repository_summary, sign in ((old_summary, -1), (summary, 1)):
+        if repository_summary is None:
+            continue
+        counts["repositories"] = counts.get("repositories", 0) + sign
+        if repository_summary.severity:
+            repositories_by_severity[repository_summary.severity] = (
+                repositories_by_severity.get(repository_summary.severity, 0) + sign
             )
-            if cve_id:
-                existing_advisory_ids.add(cve_id)
-            _LOGGER.info("Created security advisory for %s", vuln.snyk_id)
-        except githubkit.exception.RequestFailed as exception:
-            _LOGGER.warning(
-                "Failed to create security advisory for %s: %s",
-                vuln.snyk_id,
-                exception.response.text if exception.response else str(exception),
+        for severity, count in repository_summary.severities.items():
+            vulnerabilities_by_severity[severity] = (
+                vulnerabilities_by_severity.get(severity, 0) + sign * count
             )
-            raise
+    for group, group_counts in (
+        ("counts", counts),
+        ("repositories_by_severity", repositories_by_severity),
+        ("vulnerabilities_by_severity", vulnerabilities_by_severity),
+    ):
+        changed_counts = {name: count for name, count in group_counts.items() if count}
+        if changed_counts:
+            entries.increment(_AGGREGATE_KEY, group, changed_counts)
+
+    unresolved = None
+    if summary is not None and summary.unresolved_since is not None:
+        unresolved = _AggregateUnresolved(name=summary.unresolved_name, since=summary.unresolved_since)
+    entries.set_items(
+        _AGGREGATE_KEY,
+        "unresolved",
+        {repository: unresolved.model_dump(mode="json") if unresolved is not None else None},
+    )
+    entries.set_items(
+        _AGGREGATE_KEY,
+        "branches",
+        {
+            repository: {branch: updated_at.isoformat() for branch, updated_at in summary.branches.items()}
+            if summary is not None and summary.branches
+            else None
+        },
+    )
+    if summary is not None:
+        entries.set_items(_AGGREGATE_KEY, "last_update", {"updated_at": summary.updated_at.isoformat()})
+
+
+def _get_overview(aggregate: _AggregateStatus, now: datetime.datetime) -> dict[str, Any]:
+    """Get the dashboard overview data from the aggregate status, the stale branches relative to `now`."""
+    oldest_unresolved = min(
+        (
+            _UnresolvedIssue(repository=repository, name=unresolved.name, since=unresolved.since)
+            for repository, unresolved in aggregate.unresolved.items()
+        ),
+        key=lambda unresolved: unresolved.since,
+        default=None,
+    )
+    stale_branches = sorted(
+        (
+            _StaleBranch(repository=repository, branch=branch, updated_at=updated_at)
+            for repository, branches in aggregate.branches.items()
+            for branch, updated_at in branches.items()
+            if now - updated_at > settings.audit.stale_branch_duration
+        ),
+        key=lambda stale_branch: stale_branch.updated_at,
+    )
+    severities = sorted(
+        {
+            *(severity for severity, count in aggregate.repositories_by_severity.items() if count > 0),
+            *(severity for severity, count in aggregate.vulnerabilities_by_severity.items() if count > 0),
+        },
+        key=lambda severity: audit_utils.SEVERITY_ORDER.get(severity, 0),
+        reverse=True,
+    )
+    return {
+        "updated_at": aggregate.last_update.get("updated_at"),
+        "repositories_count": aggregate.counts.get("repositories", 0),
+        "severities": [
+            {
+                "name": severity,
+                "repositories": aggregate.repositories_by_severity.get(severity, 0),
+                "vulnerabilities": aggregate.vulnerabilities_by_severity.get(severity, 0),
+            }
+            for severity in severities
+        ],
+        "oldest_unresolved": oldest_unresolved,
+        "stale_branches": stale_branches,
+    }
 
 
 class Audit(
@@ -887,10 +1330,7 @@ class Audit(
         Note that this function is called in the web server Pod who has low resources, and this call should be fast
         """
         if context.module_event_name == "pull_request":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             if event_data_pull_request.action == "closed":
                 return [
                     module.Action(
@@ -901,10 +1341,7 @@ class Audit(
                 ]
 
         if context.module_event_name == "push":
-            event_data_push = githubkit.webhooks.parse_obj(
-                "push",
-                context.github_event_data,
-            )
+            event_data_push = context.github_event.parse("push")
             for commit in event_data_push.commits:
                 # Check if SECURITY.md is removed on the default branch
                 if (
@@ -1015,10 +1452,7 @@ class Audit(
         intermediate_status = _IntermediateStatus(status=_TransversalStatusRepo())
 
         if context.module_event_data.type == "close-pull-request-issues":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             await module_utils.close_pull_request_related_issues(
                 context.github_project,
                 event_data_pull_request.pull_request.number,
@@ -1276,45 +1710,71 @@ class Audit(
                     title="cleanup",
                 )
             ]
-            for version in mapped_versions:
-                if context.module_event_data.snyk and context.module_config.get(
-                    "snyk",
-                    {},
-                ).get(
-                    "enabled",
-                    configuration.ENABLE_SNYK_DEFAULT,
-                ):
-                    actions.append(
-                        module.Action(
-                            priority=priority,
-                            data=_EventData(type="snyk", version=version),
-                            title=f"snyk ({version})",
-                        ),
-                    )
-                if context.module_event_data.dpkg and context.module_config.get(
-                    "dpkg",
-                    {},
-                ).get(
-                    "enabled",
-                    configuration.ENABLE_DPKG_DEFAULT,
-                ):
-                    actions.append(
-                        module.Action(
-                            priority=priority,
-                            data=_EventData(type="dpkg", version=version),
-                            title=f"dpkg ({version})",
-                        ),
+            snyk = context.module_event_data.snyk and context.module_config.get("snyk", {}).get(
+                "enabled",
+                configuration.ENABLE_SNYK_DEFAULT,
+            )
+            dpkg = context.module_event_data.dpkg and context.module_config.get("dpkg", {}).get(
+                "enabled",
+                configuration.ENABLE_DPKG_DEFAULT,
+            )
+            if snyk or dpkg:
+                # One job by branch, the checks of the branch are run concurrently
+                check_names = "+".join(name for name, enabled in (("snyk", snyk), ("dpkg", dpkg)) if enabled)
+                actions.extend(
+                    module.Action(
+                        priority=priority,
+                        data=_EventData(type="branch", version=version, snyk=snyk, dpkg=dpkg),
+                        title=f"{check_names} ({version})",
                     )
+                    for version in mapped_versions
+                )
             return ProcessOutput(
                 actions=actions,
                 intermediate_status=intermediate_status,
                 updated_transversal_status=True,
             )
+        elif context.module_event_data.type == "branch":
+            check_types = [
+                check_type
+                for check_type, enabled in (
+                    ("snyk", context.module_event_data.snyk),
+                    ("dpkg", context.module_event_data.dpkg),
+                )
+                if enabled
+            ]
+            short_message, success, actions = await _process_branch(
+                context,
+                issue_check,
+                intermediate_status,
+                check_types,
+            )
+            return _get_process_output(
+                context,
+                issue_check,
+                short_message,
+                success,
+                intermediate_status,
+                check_types,
+                actions,
+            )
+        elif context.module_event_data.type == "snyk-monitor":
+            return await _process_snyk_monitor(context)
         else:
-            short_message, success = await _process_snyk_dpkg(
+            assert context.module_event_data.type is not None
+            short_message, success, actions = await _process_snyk_dpkg(
                 context,
                 issue_check,
                 intermediate_status,
+                context.module_event_data.type,
+            )
+            return _get_process_output(
+                context,
+                issue_check,
+                short_message,
+                success,
+                intermediate_status,
+                actions=actions,
             )
 
         return _get_process_output(
@@ -1325,23 +1785,76 @@ class Audit(
             intermediate_status,
         )
 
-    async def update_transversal_status(
+    def has_transversal_status_entries(self) -> bool:
+        """Store the transversal status by repository."""
+        return True
+
+    async def update_transversal_status_entries(
         self,
         context: module.ProcessContext[configuration.AuditConfiguration, _EventData],
         intermediate_status: _IntermediateStatus,
-        transversal_status: _TransversalStatus,
-    ) -> _TransversalStatus:
-        """Update the transversal status with the intermediate status."""
+        entries: module.TransversalStatusEntries,
+    ) -> None:
+        """
+        Update the repository entry with the intermediate status, and the aggregate status.
+
+        The aggregate entry is changed with the difference of the repository summary, without reading it;
+        the repositories not updated since the status max age are removed.
+        """
         key = f"{context.github_project.owner}/{context.github_project.repository}"
-        module_utils.manage_updated_separated(
-            transversal_status.updated,
-            transversal_status.repositories,
-            key,
+        now = datetime.datetime.now(datetime.UTC)
+        existing = _TransversalStatusRepo.model_validate(await entries.get(key) or {})
+        old_summary = existing.summary
+        for type_key, type_data in intermediate_status.status.types.items():
+            type_data.updated_at = now
+            if type_data.status == "error":
+                previous = existing.types.get(type_key)
+                type_data.unresolved_since = (
+                    previous.unresolved_since
+                    if previous is not None and previous.unresolved_since is not None
+                    else now
+                )
+            existing.types[type_key] = type_data
+        existing.summary = _get_repository_summary(existing, now)
+        entries.set(key, json.loads(existing.model_dump_json(exclude_none=True)))
+        _update_aggregate(entries, key, old_summary, existing.summary)
+
+        for older_key in await entries.get_older_keys(_STATUS_MAX_AGE):
+            if older_key in (key, _AGGREGATE_KEY):
+                continue
+            older = _TransversalStatusRepo.model_validate(await entries.get(older_key) or {})
+            _update_aggregate(entries, older_key, older.summary, None)
+            entries.delete(older_key)
+
+    def get_transversal_status_entry_keys(self, params: dict[str, str]) -> list[str] | None:
+        """Load only the aggregate entry for the overview, and the repository entry for a repository."""
+        if "repository" in params:
+            return [params["repository"]]
+        if params.get("view") == "repositories":
+            return None
+        return [_AGGREGATE_KEY]
+
+    def transversal_status_from_entries(self, entries: dict[str, dict[str, Any]]) -> _TransversalStatus:
+        """Create the full transversal status from the repository entries."""
+        aggregate = entries.get(_AGGREGATE_KEY)
+        return _TransversalStatus(
+            repositories={
+                key: _TransversalStatusRepo.model_validate(data)
+                for key, data in entries.items()
+                if key != _AGGREGATE_KEY
+            },
+            aggregate=_AggregateStatus.model_validate(aggregate) if aggregate is not None else None,
         )
-        existing = transversal_status.repositories.get(key, _TransversalStatusRepo())
-        existing.types.update(intermediate_status.status.types)
-        transversal_status.repositories[key] = existing
-        return transversal_status
+
+    def transversal_status_to_entries(
+        self, transversal_status: _TransversalStatus
+    ) -> dict[str, dict[str, Any]]:
+        """Split the transversal status in repository entries."""
+        return {
+            key: json.loads(repo.model_dump_json(exclude_none=True))
+            for key, repo in transversal_status.repositories.items()
+            if key in transversal_status.updated
+        }
 
     async def get_json_schema(self) -> dict[str, Any]:
         """Get the JSON schema of the module configuration."""
@@ -1375,7 +1888,22 @@ class Audit(
         self,
         context: module.TransversalDashboardContext[_TransversalStatus],
     ) -> module.TransversalDashboardOutput:
-        """Get the transversal dashboard content."""
+        """
+        Get the transversal dashboard content.
+
+        The overview is rendered from the aggregate status, the repositories only with the `view=repositories`
+        or the `repository` query parameter.
+        """
+        if "repository" not in context.params and context.params.get("view") != "repositories":
+            return module.TransversalDashboardOutput(
+                renderer="github_app_geo_project:module/audit/dashboard.html",
+                data={
+                    "overview": _get_overview(
+                        context.status.aggregate or _AggregateStatus(), datetime.datetime.now(datetime.UTC)
+                    )
+                },
+            )
+
         repositories = []
         for repository, data in context.status.repositories.items():
             if not data.types:
@@ -0,0 +1,295 @@
+# Copyright (c) 2026, Camptocamp SA
+
+"""Persistent store of the APT package indexes, used by the dpkg audit."""
+
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import lzma
+import os
+from typing import Any
+
+import aiohttp
+import anyio
+import anyio.to_thread
+import debian_inspector.version
+
+from github_app_geo_project.module.audit import configuration
+from github_app_geo_project.settings import settings
+
+_LOGGER = logging.getLogger(__name__)
+
+_ARCHITECTURE = "amd64"
+_DECOMPRESS = {
+    ".xz": lzma.decompress,
+    ".gz": gzip.decompress,
+    "": lambda content: content,
+}
+
+
+def _get_key(*data: Any) -> str:
+    return hashlib.sha256(json.dumps(data).encode()).hexdigest()[:16]
+
+
+def _parse_release_hashes(content: str) -> dict[str, str]:
+    """Get the SHA256 hashes of the indexes listed in a Release file, by path."""
+    hashes = {}
+    in_sha256 = False
+    for line in content.splitlines():
+        if not line.startswith(" "):
+            in_sha256 = line.strip() == "SHA256:"
+            continue
+        if in_sha256:
+            values = line.split()
+            if len(values) == 3:
+                hashes[values[2]] = values[0]
+    return hashes
+
+
+def _is_newer(version: str, other: str) -> bool:
+    from_string = debian_inspector.version.Version.from_string
+    try:
+        return from_string(version) > from_string(other)
+    except ValueError as exception:
+        _LOGGER.warning("Error while comparing the versions %s and %s: %s", version, other, exception)
+        return False
+
+
+def _merge_version(versions: dict[str, str], package: str, version: str) -> None:
+    current = versions.get(package)
+    if current is None or (current != version and _is_newer(version, current)):
+        versions[package] = version
+
+
+def _parse_packages(content: bytes, suffix: str) -> dict[str, str]:
+    """Get the latest version of each package of a compressed Packages file, CPU-bound."""
+    versions: dict[str, str] = {}
+    package = None
+    for line in _DECOMPRESS[suffix](content).decode("utf-8").splitlines():
+        if line.startswith("Package: "):
+            package = line[9:].strip()
+        elif line.startswith("Version: ") and package is not None:
+            _merge_version(versions, package, line[9:].strip())
+            package = None
+    return versions
+
+
+def _merge_tables(tables: list[dict[str, str]]) -> dict[str, str]:
+    versions: dict[str, str] = {}
+    for table in tables:
+        for package, version in table.items():
+            _merge_version(versions, package, version)
+    return versions
+
+
+class AptIndexStore:
+    """
+    On-disk store of the APT package indexes, shared by the processes.
+
+    Each distribution has a compact lookup table of the latest version of each package.
+    The tables are revalidated after the dpkg cache duration: the `Release` files are downloaded
+    with `If-Modified-Since`, and only the `Packages` files whose hash changed are downloaded again,
+    concurrently.
+    """
+
+    def __init__(self, cache_dir: anyio.Path | None = None) -> None:
+        """Initialize the store.
+
+        Arguments:
+        ---------
+        cache_dir: The directory where the indexes will be stored.
+            Defaults to ~/.cache/ghci/apt/
+        """
+        self._cache_dir: anyio.Path | None = cache_dir
+        self._tables: dict[str, dict[str, Any]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def _get_cache_dir(self) -> anyio.Path:
+        """Get the cache directory, initializing it lazily if needed."""
+        if self._cache_dir is None:
+            self._cache_dir = await anyio.Path.home() / ".cache" / "ghci" / "apt"
+        await self._cache_dir.mkdir(parents=True, exist_ok=True)
+        return self._cache_dir
+
+    async def _read(self, name: str) -> dict[str, Any] | None:
+        path = await self._get_cache_dir() / f"{name}.json"
+        try:
+            return json.loads(await path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            _LOGGER.warning("Invalid APT index file %s, ignoring it", path)
+            return None
+
+    async def _write(self, name: str, data: dict[str, Any]) -> None:
+        """Write the file atomically, it can be read by other processes."""
+        path = await self._get_cache_dir() / f"{name}.json"
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        await temp_path.write_text(json.dumps(data), encoding="utf-8")
+        await temp_path.rename(path)
+
+    async def get_version(
+        self,
+        dist: str,
+        package: str,
+        config: configuration.DpkgConfiguration,
+        local_config: configuration.DpkgConfiguration,
+    ) -> str | None:
+        """Get the latest version of a package of a distribution, None if it isn't found."""
+        conf = local_config.get("sources", config.get("sources", configuration.DPKG_SOURCES_DEFAULT))
+        if dist not in conf:
+            message = f"The distribution {dist} is not in the configuration"
+            raise ValueError(message)
+        sources = [
+            (str(source["url"]), str(source["distribution"]), list(source["components"]))
+            for source in conf[dist]
+        ]
+        table = await self._get_table(_get_key(dist, sources), sources)
+        return table["versions"].get(package)
+
+    def _is_fresh(self, table: dict[str, Any] | None) -> bool:
+        if table is None:
+            return False
+        checked_at = datetime.datetime.fromisoformat(table["checked_at"])
+        return datetime.datetime.now(datetime.UTC) - checked_at < settings.audit.dpkg_cache_duration
+
+    async def _get_table(self, key: str, sources: list[tuple[str, str, list[str]]]) -> dict[str, Any]:
+        table = self._tables.get(key)
+        if self._is_fresh(table):
+            assert table is not None
+            return table
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        async with self._locks[key]:
+            # Probably refreshed by a concurrent job or another process
+            table = self._tables.get(key)
+            if not self._is_fresh(table):
+                table = await self._read(f"dist-{key}")
+            if not self._is_fresh(table):
+                table = await self._refresh(key, sources, table)
+            assert table is not None
+            self._tables[key] = table
+            return table
+
+    async def _refresh(
+        self,
+        key: str,
+        sources: list[tuple[str, str, list[str]]],
+        table: dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=settings.audit_timeouts.apt_index.total_seconds()),
+        ) as session:
+            semaphore = asyncio.Semaphore(settings.audit.apt_index_concurrency)
+            releases = await asyncio.gather(
+                *(self._get_release_hashes(session, semaphore, url, dist) for url, dist, _ in sources),
+            )
+            components = [
+                (url, dist, component, hashes.get(f"{component}/binary-{_ARCHITECTURE}/Packages"))
+                for (url, dist, components), hashes in zip(sources, releases, strict=True)
+                for component in components
+            ]
+            components_hash = [hash_ for _, _, _, hash_ in components]
+            if (
+                table is not None
+                and None not in components_hash
+                and table.get("components_hash") == components_hash
+            ):
+                _LOGGER.info("The APT indexes didn't change")
+                tables = None
+            else:
+                results = await asyncio.gather(
+                    *(
+                        self._get_packages(session, semaphore, url, dist, component, hash_)
+                        for url, dist, component, hash_ in components
+                    ),
+                )
+                tables = [versions for versions, _ in results]
+                # Download the failed components again on the next refresh
+                components_hash = [
+                    hash_ if success else None
+                    for hash_, (_, success) in zip(components_hash, results, strict=True)
+                ]
+
+        if tables is None:
+            assert table is not None
+            versions = table["versions"]
+        else:
+            versions = await anyio.to_thread.run_sync(_merge_tables, tables)
+        table = {
+            "checked_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            "components_hash": components_hash,
+            "versions": versions,
+        }
+        await self._write(f"dist-{key}", table)
+        return table
+
+    async def _get_release_hashes(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        url: str,
+        dist: str,
+    ) -> dict[str, str]:
+        """Get the hashes of the indexes of a repository, revalidating the cached `Release` file."""
+        name = f"release-{_get_key(url, dist)}"
+        cached = await self._read(name)
+        headers = {}
+        if cached is not None and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        release_url = f"{url.rstrip('/')}/dists/{dist}/Release"
+        try:
+            async with semaphore, session.get(release_url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    return cached["hashes"]
+                response.raise_for_status()
+                content = await response.text()
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, TimeoutError):
+            _LOGGER.exception("Error while getting the Release file %s", release_url)
+            return cached["hashes"] if cached is not None else {}
+        hashes = _parse_release_hashes(content)
+        await self._write(name, {"last_modified": last_modified, "hashes": hashes})
+        return hashes
+
+    async def _get_packages(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        url: str,
+        dist: str,
+        component: str,
+        hash_: str | None,
+    ) -> tuple[dict[str, str], bool]:
+        """
+        Get the versions table of a component, downloaded only if its hash changed.
+
+        Returns the last downloaded table and False on error.
+        """
+        name = f"packages-{_get_key(url, dist, component)}"
+        cached = await self._read(name)
+        if cached is not None and hash_ is not None and cached["hash"] == hash_:
+            return cached["versions"], True
+        base_url = f"{url.rstrip('/')}/dists/{dist}/{component}/binary-{_ARCHITECTURE}/Packages"
+        for suffix in _DECOMPRESS:
+            try:
+                async with semaphore, session.get(f"{base_url}{suffix}") as response:
+                    if response.status == 404:
+                        continue
+                    response.raise_for_status()
+                    content = await response.read()
+            except (aiohttp.ClientError, TimeoutError):
+                _LOGGER.exception("Error while getting the Packages file %s%s", base_url, suffix)
+                break
+            versions = await anyio.to_thread.run_sync(_parse_packages, content, suffix)
+            await self._write(name, {"hash": hash_, "versions": versions})
+            return versions, True
+        else:
+            _LOGGER.error("No Packages file found for %s", base_url)
+        return (cached["versions"] if cached is not None else {}), False
+
+
+APT_INDEX_STORE = AptIndexStore()
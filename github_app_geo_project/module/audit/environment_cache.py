@@ -0,0 +1,399 @@
+# Copyright (c) 2026, Camptocamp SA
+
+"""Size-bounded local caches of the installed dependencies and pre-commit environments, used by the audit."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import anyio
+import anyio.to_thread
+import yaml
+
+from github_app_geo_project.settings import settings
+
+_LOGGER = logging.getLogger(__name__)
+
+_COMPLETE_MARKER = ".complete"
+# The size of the entry, to avoid walking the whole cache on each eviction
+_SIZE_FILE = ".size"
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    """Hard link the file, the installed files are replaced and not modified in place; copy as fallback."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _get_size(path: Path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                size += (Path(root) / file_name).lstat().st_size
+            except OSError:
+                pass
+    return size
+
+
+def _clear(targets: list[Path]) -> None:
+    for target in targets:
+        shutil.rmtree(target, ignore_errors=True)
+
+
+def _restore(entry: Path, targets: list[Path]) -> None:
+    _clear(targets)
+    for index, target in enumerate(targets):
+        source = entry / str(index)
+        if source.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copytree(source, target, symlinks=True, copy_function=_link_or_copy)
+    # Used for the least recently used eviction
+    (entry / _COMPLETE_MARKER).touch()
+
+
+def _store(cache_dir: Path, key: str, targets: list[Path]) -> bool:
+    """Store the entry, return False if it already exists, e.g. stored by another job."""
+    entry = cache_dir / key
+    if entry.exists():
+        return False
+    temp_entry = cache_dir / f"{key}.{os.getpid()}.tmp"
+    shutil.rmtree(temp_entry, ignore_errors=True)
+    temp_entry.mkdir(parents=True)
+    try:
+        for index, target in enumerate(targets):
+            if target.exists():
+                shutil.copytree(target, temp_entry / str(index), symlinks=True)
+        (temp_entry / _SIZE_FILE).write_text(str(_get_size(temp_entry)), encoding="utf-8")
+        (temp_entry / _COMPLETE_MARKER).touch()
+        try:
+            temp_entry.rename(entry)
+        except OSError:
+            if not entry.exists():
+                raise
+            # Stored concurrently by another job
+            return False
+    finally:
+        shutil.rmtree(temp_entry, ignore_errors=True)
+    return True
+
+
+def _reserve(entry: Path) -> bool:
+    """Reserve the entry to be installed in place, return False if it exists, e.g. reserved by another job."""
+    try:
+        entry.mkdir()
+    except FileExistsError:
+        return False
+    return True
+
+
+def _complete(entry: Path) -> None:
+    (entry / _SIZE_FILE).write_text(str(_get_size(entry)), encoding="utf-8")
+    (entry / _COMPLETE_MARKER).touch()
+
+
+def _get_entry_size(entry: Path) -> int:
+    try:
+        return int((entry / _SIZE_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return _get_size(entry)
+
+
+def _evict_least_recently_used(
+    entries: list[tuple[float, Path, int]], max_size: int, min_age: float
+) -> list[str]:
+    """Remove the least recently used entries (last used time, path, size) over the maximum size."""
+    entries.sort()
+    total_size = sum(size for _, _, size in entries)
+    evicted = []
+    for last_used, entry, size in entries:
+        # The most recently used entries can be used by a running job
+        if total_size <= max_size or time.time() - last_used < min_age:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
+        evicted.append(entry.name)
+    return evicted
+
+
+def _evict(cache_dir: Path, max_size: int, min_age: float) -> list[str]:
+    entries = []
+    for entry in cache_dir.iterdir():
+        marker = entry / _COMPLETE_MARKER
+        try:
+            if not marker.exists():
+                # Incomplete entry, probably from an interrupted store
+                if time.time() - entry.stat().st_mtime > 86400:
+                    shutil.rmtree(entry, ignore_errors=True)
+                continue
+            entries.append((marker.stat().st_mtime, entry, _get_entry_size(entry)))
+        except OSError:
+            # Probably removed by another process
+            continue
+    return _evict_least_recently_used(entries, max_size, min_age)
+
+
+class EnvironmentCache:
+    """
+    Local cache of installed dependencies directories.
+
+    An entry contains a copy of the target directories (e.g. the user site-packages or a virtual
+    environment) after the installation, and is restored with hard links.
+    The environments that aren't relocatable (the virtual environments) are installed and used in place,
+    in the `env` directory of the entry.
+    The least recently used entries are evicted when the total size exceeds the maximum size.
+    """
+
+    def __init__(self, cache_dir: anyio.Path | None = None, max_size: int | None = None) -> None:
+        """Initialize the cache.
+
+        Arguments:
+        ---------
+        cache_dir: The directory where the cache will be stored.
+            Defaults to ~/.cache/ghci/environments/
+        max_size: The maximum size of the cache in bytes, 0 to disable the cache.
+            Defaults to the audit environment cache size setting.
+        """
+        self._cache_dir: anyio.Path | None = cache_dir
+        self._max_size = max_size
+
+    @property
+    def max_size(self) -> int:
+        """Get the maximum size of the cache in bytes."""
+        return self._max_size if self._max_size is not None else settings.audit.environment_cache_max_size
+
+    async def _get_cache_dir(self) -> anyio.Path:
+        """Get the cache directory, initializing it lazily if needed."""
+        if self._cache_dir is None:
+            self._cache_dir = await anyio.Path.home() / ".cache" / "ghci" / "environments"
+        await self._cache_dir.mkdir(parents=True, exist_ok=True)
+        return self._cache_dir
+
+    async def restore(self, key: str, targets: list[anyio.Path]) -> bool:
+        """
+        Replace the target directories by the cached ones.
+
+        Return False if the key isn't in the cache or on error, then the dependencies should be installed.
+        """
+        if self.max_size <= 0:
+            return False
+        try:
+            entry = await self._get_cache_dir() / key
+            if not await (entry / _COMPLETE_MARKER).exists():
+                return False
+            await anyio.to_thread.run_sync(_restore, Path(entry), [Path(target) for target in targets])
+        except OSError:
+            _LOGGER.warning("Error while restoring the environment cache %s", key, exc_info=True)
+            return False
+        _LOGGER.info("Dependencies restored from the environment cache %s", key)
+        return True
+
+    async def clear_targets(self, targets: list[anyio.Path]) -> None:
+        """Remove the target directories, to install the dependencies in clean environments."""
+        await anyio.to_thread.run_sync(_clear, [Path(target) for target in targets])
+
+    async def store(self, key: str, targets: list[anyio.Path]) -> None:
+        """Store the target directories in the cache, and evict the least recently used entries."""
+        if self.max_size <= 0:
+            return
+        try:
+            cache_dir = Path(await self._get_cache_dir())
+            if not await anyio.to_thread.run_sync(
+                _store, cache_dir, key, [Path(target) for target in targets]
+            ):
+                return
+            evicted = await anyio.to_thread.run_sync(
+                _evict,
+                cache_dir,
+                self.max_size,
+                settings.process_queue.job_timeout.total_seconds(),
+            )
+        except OSError:
+            _LOGGER.warning("Error while storing the environment cache %s", key, exc_info=True)
+            return
+        if evicted:
+            _LOGGER.info("Evicted environment cache entries: %s", ", ".join(evicted))
+
+    async def get_in_place(self, key: str) -> tuple[anyio.Path | None, bool]:
+        """
+        Get the directory of an environment used in place, and if it's already installed.
+
+        When it isn't installed, the entry is reserved to be installed by this job, and `complete_in_place`
+        should be called after the installation.
+        The directory is None if the cache is disabled, on error, or if the entry is being installed by
+        another job, then the environment should be installed in the job environment.
+        """
+        if self.max_size <= 0:
+            return None, False
+        try:
+            entry = await self._get_cache_dir() / key
+            if await (entry / _COMPLETE_MARKER).exists():
+                # Used for the least recently used eviction
+                await (entry / _COMPLETE_MARKER).touch()
+                _LOGGER.info("Environment used from the environment cache %s", key)
+                return entry / "env", True
+            if not await anyio.to_thread.run_sync(_reserve, Path(entry)):
+                return None, False
+        except OSError:
+            _LOGGER.warning("Error while getting the environment cache %s", key, exc_info=True)
+            return None, False
+        return entry / "env", False
+
+    async def complete_in_place(self, key: str, success: bool) -> None:
+        """Mark the environment installed in place as usable, or remove it if the installation failed."""
+        try:
+            entry = Path(await self._get_cache_dir() / key)
+            if not success:
+                await anyio.to_thread.run_sync(_clear, [entry])
+                return
+            await anyio.to_thread.run_sync(_complete, entry)
+            evicted = await anyio.to_thread.run_sync(
+                _evict,
+                entry.parent,
+                self.max_size,
+                settings.process_queue.job_timeout.total_seconds(),
+            )
+        except OSError:
+            _LOGGER.warning("Error while storing the environment cache %s", key, exc_info=True)
+            return
+        if evicted:
+            _LOGGER.info("Evicted environment cache entries: %s", ", ".join(evicted))
+
+
+ENVIRONMENT_CACHE = EnvironmentCache()
+
+_LAST_USED_MARKER = ".last-used"
+
+
+def _get_pre_commit_key(content: str) -> str:
+    """Get the key of the hook environments of a pre-commit configuration."""
+    try:
+        config = yaml.safe_load(content)
+    except yaml.YAMLError:
+        config = None
+    if not isinstance(config, dict):
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+    repos = [
+        {
+            "repo": repo.get("repo"),
+            "rev": repo.get("rev"),
+            # The environments also depend on the additional dependencies and the language versions
+            "hooks": [
+                {
+                    key: hook.get(key)
+                    for key in ("id", "language", "language_version", "additional_dependencies")
+                }
+                for hook in repo.get("hooks", [])
+                if isinstance(hook, dict)
+            ],
+        }
+        for repo in config.get("repos", [])
+        if isinstance(repo, dict)
+    ]
+    key_data = {"repos": repos, "default_language_version": config.get("default_language_version")}
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _get_shared_entry_size(entry: Path) -> int:
+    """
+    Get the size of an entry that is modified in place, stored until the entry directory changes.
+
+    pre-commit creates the hook environments directories and updates its database in the entry directory.
+    """
+    size_file = entry / _SIZE_FILE
+    try:
+        if size_file.stat().st_mtime >= entry.stat().st_mtime:
+            return int(size_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    size = _get_size(entry)
+    size_file.write_text(str(size), encoding="utf-8")
+    return size
+
+
+def _evict_unused(cache_dir: Path, max_size: int, min_age: float) -> list[str]:
+    entries = []
+    for entry in cache_dir.iterdir():
+        try:
+            try:
+                last_used = (entry / _LAST_USED_MARKER).stat().st_mtime
+            except FileNotFoundError:
+                last_used = entry.stat().st_mtime
+            entries.append((last_used, entry, _get_shared_entry_size(entry)))
+        except OSError:
+            # Probably removed by another process
+            continue
+    return _evict_least_recently_used(entries, max_size, min_age)
+
+
+class PreCommitCache:
+    """
+    Local cache of the pre-commit hook environments.
+
+    The `PRE_COMMIT_HOME` directories are shared by the jobs, and keyed by the hook revisions of
+    the `.pre-commit-config.yaml` file. The least recently used directories are removed when the
+    total size exceeds the maximum size.
+    """
+
+    def __init__(self, cache_dir: anyio.Path | None = None, max_size: int | None = None) -> None:
+        """Initialize the cache.
+
+        Arguments:
+        ---------
+        cache_dir: The directory where the cache will be stored.
+            Defaults to ~/.cache/ghci/pre-commit/
+        max_size: The maximum size of the cache in bytes, 0 to disable the cache.
+            Defaults to the audit pre-commit cache size setting.
+        """
+        self._cache_dir: anyio.Path | None = cache_dir
+        self._max_size = max_size
+
+    @property
+    def max_size(self) -> int:
+        """Get the maximum size of the cache in bytes."""
+        return self._max_size if self._max_size is not None else settings.audit.pre_commit_cache_max_size
+
+    async def _get_cache_dir(self) -> anyio.Path:
+        """Get the cache directory, initializing it lazily if needed."""
+        if self._cache_dir is None:
+            self._cache_dir = await anyio.Path.home() / ".cache" / "ghci" / "pre-commit"
+        await self._cache_dir.mkdir(parents=True, exist_ok=True)
+        return self._cache_dir
+
+    async def get_env(self, cwd: anyio.Path) -> dict[str, str]:
+        """Get the environment variables to run pre-commit in the working tree, empty if the cache is disabled."""
+        config_file = cwd / ".pre-commit-config.yaml"
+        if self.max_size <= 0 or not await config_file.exists():
+            return {}
+        home = await self._get_cache_dir() / _get_pre_commit_key(
+            await config_file.read_text(encoding="utf-8")
+        )
+        await home.mkdir(exist_ok=True)
+        await (home / _LAST_USED_MARKER).touch()
+        return {"PRE_COMMIT_HOME": str(home)}
+
+    async def collect(self) -> None:
+        """Remove the least recently used hook environments over the maximum size."""
+        if self.max_size <= 0:
+            return
+        try:
+            evicted = await anyio.to_thread.run_sync(
+                _evict_unused,
+                Path(await self._get_cache_dir()),
+                self.max_size,
+                settings.process_queue.job_timeout.total_seconds(),
+            )
+        except OSError:
+            _LOGGER.warning("Error while collecting the pre-commit cache", exc_info=True)
+            return
+        if evicted:
+            _LOGGER.info("Evicted pre-commit cache entries: %s", ", ".join(evicted))
+
+
+PRE_COMMIT_CACHE = PreCommitCache()
@@ -0,0 +1,120 @@
+# Copyright (c) 2026, Camptocamp SA
+
+"""Registry of the Python and Java toolchains of the worker, used by the audit."""
+
+import logging
+import os
+import re
+import shutil
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import anyio
+import anyio.to_thread
+
+_LOGGER = logging.getLogger(__name__)
+
+_GRADLE_DISTRIBUTION_RE = re.compile(
+    r"^distributionUrl=.*/gradle-(\d+\.\d+)(?:\.\d+)*-[a-z]+\.zip$", re.MULTILINE
+)
+
+
+def _version_key(version: str) -> tuple[int, ...]:
+    return tuple(int(part) if part.isdigit() else -1 for part in version.split("."))
+
+
+class ToolchainRegistry:
+    """
+    Registry of the Python interpreters and JDKs installed on the worker.
+
+    The versions are resolved to their paths once per worker, and each job gets an isolated
+    environment directory: the user site-packages and the virtual environments are installed in it,
+    and it's removed at the end of the job, so the jobs can run concurrently.
+    """
+
+    def __init__(
+        self,
+        python_versions_dir: anyio.Path | None = None,
+        jobs_dir: anyio.Path | None = None,
+    ) -> None:
+        """Initialize the registry.
+
+        Arguments:
+        ---------
+        python_versions_dir: The directory where the Python versions are installed.
+            Defaults to /pyenv/versions/
+        jobs_dir: The directory where the job environments will be created.
+            Defaults to ~/.cache/ghci/toolchains/
+        """
+        self._python_versions_dir = python_versions_dir or anyio.Path("/pyenv/versions")
+        self._jobs_dir: anyio.Path | None = jobs_dir
+        self._python: dict[str, tuple[str, anyio.Path] | None] = {}
+        self._jdk: dict[str, bool] = {}
+
+    async def _get_jobs_dir(self) -> anyio.Path:
+        """Get the jobs directory, initializing it lazily if needed."""
+        if self._jobs_dir is None:
+            self._jobs_dir = await anyio.Path.home() / ".cache" / "ghci" / "toolchains"
+        await self._jobs_dir.mkdir(parents=True, exist_ok=True)
+        return self._jobs_dir
+
+    async def get_python(self, version: str) -> tuple[str, anyio.Path] | None:
+        """Get the full version and the `bin` directory of the latest installed Python `version`, e.g. `3.12`."""
+        if version not in self._python:
+            candidates = [
+                path
+                async for path in self._python_versions_dir.glob(f"{version}*")
+                if path.name == version or path.name.startswith(f"{version}.")
+            ]
+            candidates.sort(key=lambda path: _version_key(path.name))
+            if candidates:
+                self._python[version] = (candidates[-1].name, candidates[-1] / "bin")
+            else:
+                _LOGGER.warning("The Python version %s isn't installed", version)
+                self._python[version] = None
+        return self._python[version]
+
+    async def has_jdk(self, bin_path: str) -> bool:
+        """Check that the `bin` directory of a configured JDK exists."""
+        if bin_path not in self._jdk:
+            self._jdk[bin_path] = await (anyio.Path(bin_path) / "java").exists()
+            if not self._jdk[bin_path]:
+                _LOGGER.warning("The JDK %s isn't installed", bin_path)
+        return self._jdk[bin_path]
+
+    @asynccontextmanager
+    async def environment(self, python_version: str | None = None) -> AsyncIterator[dict[str, str]]:
+        """
+        Get the environment variables of an isolated job environment.
+
+        The Python version is selected with `PYENV_VERSION` and the `PATH`, without changing the working tree.
+        """
+        env = os.environ.copy()
+        if python_version:
+            python = await self.get_python(python_version)
+            if python is not None:
+                env["PYENV_VERSION"] = python[0]
+                env["PATH"] = f"{python[1]}:{env['PATH']}"
+
+        job_dir = await self._get_jobs_dir() / f"{os.getpid()}-{uuid.uuid4().hex}"
+        await job_dir.mkdir()
+        env["PYTHONUSERBASE"] = str(job_dir / "user")
+        env["WORKON_HOME"] = str(job_dir / "virtualenvs")
+        env["POETRY_VIRTUALENVS_PATH"] = str(job_dir / "poetry-virtualenvs")
+        try:
+            yield env
+        finally:
+            await anyio.to_thread.run_sync(lambda: shutil.rmtree(job_dir, ignore_errors=True))
+
+
+async def get_gradle_version(cwd: anyio.Path) -> str | None:
+    """Get the minor version of the Gradle wrapper from its properties, without running it."""
+    properties = cwd / "gradle" / "wrapper" / "gradle-wrapper.properties"
+    if not await properties.exists():
+        return None
+    match = _GRADLE_DISTRIBUTION_RE.search(await properties.read_text(encoding="utf-8"))
+    return match.group(1) if match is not None else None
+
+
+TOOLCHAIN_REGISTRY = ToolchainRegistry()
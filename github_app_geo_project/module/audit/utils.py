@@ -4,22 +4,23 @@
 
 import asyncio
 import datetime
+import hashlib
 import io
 import json
 import logging
 import os
 import subprocess
+from pathlib import PurePosixPath
 from typing import NamedTuple
 
 import anyio
-import apt_repo
 import debian_inspector.version
 import security_md
 import yaml  # nosec
 
 from github_app_geo_project import models, utils
 from github_app_geo_project.module import utils as module_utils
-from github_app_geo_project.module.audit import configuration
+from github_app_geo_project.module.audit import apt_index, configuration, environment_cache, toolchains
 from github_app_geo_project.settings import settings
 
 _LOGGER = logging.getLogger(__name__)
@@ -140,17 +141,19 @@ async def snyk(
     logs_url: str,
     env: dict[str, str],
     cwd: anyio.Path,
-    ignore_policy: bool = False,
 ) -> tuple[
     list[module_utils.Message],
     module_utils.HtmlMessage | None,
     list[str],
     bool,
     dict[str, list[VulnerabilityData]],
+    dict[str, list[VulnerabilityData]],
 ]:
     """
     Audit the code with Snyk.
 
+    The dependencies aren't uploaded, see `snyk_monitor`.
+
     Return:
     ------
         the output messages (Install errors, high of upgradable vulnerabilities),
@@ -158,16 +161,11 @@ async def snyk(
         the dashboard's message (with resume of the vulnerabilities),
         is on success (errors: vulnerability that can be fixed by upgrading the dependency).
         the file-grouped vulnerability data for dashboard display and advisory creation.
+        the file-grouped vulnerability data ignored by the `.snyk` policies.
     """
     result: list[module_utils.Message] = []
 
-    env["PATH"] = f"{env['HOME']}/.local/bin:{env['PATH']}"
-
-    await _select_java_version(config, local_config, env, cwd)
-
-    _LOGGER.debug("Updated path: %s", env["PATH"])
-
-    await _install_requirements_dependencies(config, local_config, result, env, cwd)
+    await _prepare_environment(config, local_config, result, env, cwd)
 
     command = ["pip", "freeze"]
     proc = await asyncio.create_subprocess_exec(
@@ -175,6 +173,7 @@ async def snyk(
         stdin=asyncio.subprocess.PIPE,
         stdout=asyncio.subprocess.PIPE,
         cwd=cwd,
+        env=env,
     )  # nosec
     async with asyncio.timeout(_TIMEOUT_PIP_FREEZE.total_seconds()):
         stdout, stderr = await proc.communicate()
@@ -182,15 +181,10 @@ async def snyk(
     message.title = "Pip freeze"
     _LOGGER.info(message)
 
-    await _install_pipenv_dependencies(config, local_config, result, env, cwd)
-    await _install_poetry_dependencies(config, local_config, result, env, cwd)
-
     env["FORCE_COLOR"] = "true"
     env_no_debug = {**env}
     env["DEBUG"] = "*snyk*"  # debug mode
 
-    await _snyk_monitor(branch, config, local_config, result, env, cwd)
-
     (
         high_vulnerabilities,
         fixable_vulnerabilities,
@@ -198,7 +192,8 @@ async def snyk(
         fixable_files_npm,
         vulnerabilities_in_requirements,
         file_vulnerabilities,
-    ) = await _snyk_test(branch, config, local_config, result, env_no_debug, cwd, ignore_policy=ignore_policy)
+        ignored_file_vulnerabilities,
+    ) = await _snyk_test(branch, config, local_config, result, env_no_debug, cwd)
 
     snyk_fix_success, snyk_fix_message = await _snyk_fix(
         branch,
@@ -229,13 +224,20 @@ async def snyk(
     fix_success = True
 
     pre_commit_config = get_pre_commit_config(audit_config, audit_local_config)
-    if pre_commit_config.get("enabled", True) and await (cwd / ".pre-commit-config.yaml").exists():
+    changed_files = await get_changed_files(cwd)
+    if (
+        pre_commit_config.get("enabled", True)
+        and changed_files
+        and await (cwd / ".pre-commit-config.yaml").exists()
+    ):
+        # Only the hooks of the fixed files are run
         command = [
             "pre-commit",
             "run",
-            "--all-files",
             "--show-diff-on-failure",
             "--config=.pre-commit-config.yaml",
+            "--files",
+            *changed_files,
         ]
         proc = await asyncio.create_subprocess_exec(
             *command,
@@ -244,6 +246,7 @@ async def snyk(
             cwd=cwd,
             env={
                 **os.environ,
+                **await environment_cache.PRE_COMMIT_CACHE.get_env(cwd),
                 "SKIP": ",".join(
                     pre_commit_config.get("skip-hooks", []),
                 ),
@@ -254,6 +257,7 @@ async def snyk(
         message = module_utils.AnsiProcessMessage.from_async_artifacts(command, proc, stdout, stderr)
         message.title = "Run pre-commit"
         _LOGGER.debug(message)
+        await environment_cache.PRE_COMMIT_CACHE.collect()
 
     command = ["git", "diff", "--quiet"]
     diff_proc = await asyncio.create_subprocess_exec(*command, cwd=cwd)
@@ -267,9 +271,8 @@ async def snyk(
             fixable_files_npm,
             vulnerabilities_in_requirements,
             file_vulnerabilities,
-        ) = await _snyk_test(
-            branch, config, local_config, result, env_no_debug, cwd, ignore_policy=ignore_policy
-        )
+            ignored_file_vulnerabilities,
+        ) = await _snyk_test(branch, config, local_config, result, env_no_debug, cwd)
 
     return_message = [
         *[f"{number} {severity} vulnerabilities" for severity, number in high_vulnerabilities.items()],
@@ -280,7 +283,49 @@ async def snyk(
         *([] if not fix_has_errors else ["Error while fixing the vulnerabilities"]),
     ]
 
-    return result, fix_message, return_message, fix_success, file_vulnerabilities
+    return (
+        result,
+        fix_message,
+        return_message,
+        fix_success,
+        file_vulnerabilities,
+        ignored_file_vulnerabilities,
+    )
+
+
+async def snyk_monitor(
+    branch: str,
+    config: configuration.SnykConfiguration,
+    local_config: configuration.SnykConfiguration,
+    env: dict[str, str],
+    cwd: anyio.Path,
+) -> bool:
+    """Upload the dependencies of the branch to Snyk with `snyk monitor`, return the success."""
+    result: list[module_utils.Message] = []
+    await _prepare_environment(config, local_config, result, env, cwd)
+    env["FORCE_COLOR"] = "true"
+    env["DEBUG"] = "*snyk*"  # debug mode
+    success = await _snyk_monitor(branch, config, local_config, result, env, cwd)
+    for message in result:
+        _LOGGER.info(message)
+    return success
+
+
+async def _prepare_environment(
+    config: configuration.SnykConfiguration,
+    local_config: configuration.SnykConfiguration,
+    result: list[module_utils.Message],
+    env: dict[str, str],
+    cwd: anyio.Path,
+) -> None:
+    """Select the Java version and install the dependencies to be tested by Snyk."""
+    env["PATH"] = f"{_get_user_base(env)}/bin:{env['PATH']}"
+
+    await _select_java_version(config, local_config, env, cwd)
+
+    _LOGGER.debug("Updated path: %s", env["PATH"])
+
+    await _install_dependencies(config, local_config, result, env, cwd)
 
 
 async def _select_java_version(
@@ -292,6 +337,36 @@ async def _select_java_version(
     if not await (cwd / "gradlew").exists():
         return
 
+    java_path_for_gradle = local_config.get("java-path-for-gradle", config.get("java-path-for-gradle", {}))
+    # Read from the wrapper properties, to avoid downloading and starting Gradle
+    minor_gradle_version = await toolchains.get_gradle_version(cwd)
+    if minor_gradle_version is None:
+        minor_gradle_version = await _get_gradle_version(cwd)
+    if minor_gradle_version not in java_path_for_gradle:
+        _LOGGER.warning(
+            "Gradle version %s is not in the configuration: %s.",
+            minor_gradle_version,
+            ", ".join(java_path_for_gradle.keys()),
+        )
+        await module_utils.run_timeout(
+            ["./gradlew", "--version"],
+            env,
+            _TIMEOUT_SUBPROCESS,
+            "Gradle version",
+            "Error on getting Gradle version",
+            "Timeout on getting Gradle version",
+            cwd,
+        )
+        return
+
+    java_path = java_path_for_gradle[minor_gradle_version]
+    if await toolchains.TOOLCHAIN_REGISTRY.has_jdk(java_path):
+        env["PATH"] = f"{java_path}:{env['PATH']}"
+        env["JAVA_HOME"] = str(anyio.Path(java_path).parent)
+
+
+async def _get_gradle_version(cwd: anyio.Path) -> str:
+    """Get the minor version of Gradle by running the wrapper."""
     command = ["./gradlew", "--version"]
     proc = await asyncio.create_subprocess_exec(  # nosec
         *command,
@@ -311,29 +386,7 @@ async def _select_java_version(
     gradle_version_out = stdout.decode().splitlines()
     gradle_version_out_filter = [line for line in gradle_version_out if line.startswith("Gradle ")]
     gradle_version = gradle_version_out_filter[0].split()[1]
-
-    minor_gradle_version = ".".join(gradle_version.split(".")[0:2])
-
-    java_path_for_gradle = local_config.get("java-path-for-gradle", config.get("java-path-for-gradle", {}))
-    if minor_gradle_version not in java_path_for_gradle:
-        _LOGGER.warning(
-            "Gradle version %s is not in the configuration: %s.",
-            minor_gradle_version,
-            ", ".join(java_path_for_gradle.keys()),
-        )
-        _LOGGER.debug("Gradle version out: %s", "\n".join(gradle_version_out))
-        await module_utils.run_timeout(
-            ["./gradlew", "--version"],
-            env,
-            _TIMEOUT_SUBPROCESS,
-            "Gradle version",
-            "Error on getting Gradle version",
-            "Timeout on getting Gradle version",
-            cwd,
-        )
-        return
-
-    env["PATH"] = f"{java_path_for_gradle[minor_gradle_version]}:{env['PATH']}"
+    return ".".join(gradle_version.split(".")[0:2])
 
 
 async def _install_requirements_dependencies(
@@ -342,7 +395,7 @@ async def _install_requirements_dependencies(
     result: list[module_utils.Message],
     env: dict[str, str],
     cwd: anyio.Path,
-) -> None:
+) -> bool:
     command = ["git", "ls-files", "requirements.txt", "*/requirements.txt"]
     proc = await asyncio.create_subprocess_exec(
         *command,
@@ -352,7 +405,9 @@ async def _install_requirements_dependencies(
     )
     async with asyncio.timeout(_TIMEOUT_GIT_LSFILES.total_seconds()):
         stdout, stderr = await proc.communicate()
+    success = True
     if proc.returncode != 0:
+        success = False
         message = module_utils.AnsiProcessMessage.from_async_artifacts(command, proc, stdout, stderr)
         message.title = "Error in ls-files"
         _LOGGER.warning(message)
@@ -364,7 +419,7 @@ async def _install_requirements_dependencies(
             if file in local_config.get("files-no-install", config.get("files-no-install", [])):
                 continue
 
-            _, _, proc_message = await module_utils.run_timeout(
+            _, proc_success, proc_message = await module_utils.run_timeout(
                 [
                     "python",
                     "-m",
@@ -380,8 +435,10 @@ async def _install_requirements_dependencies(
                 f"Timeout while installing the dependencies from {file}",
                 cwd,
             )
+            success &= proc_success
             if proc_message is not None:
                 result.append(proc_message)
+    return success
 
 
 async def _install_pipenv_dependencies(
@@ -390,7 +447,7 @@ async def _install_pipenv_dependencies(
     result: list[module_utils.Message],
     env: dict[str, str],
     cwd: anyio.Path,
-) -> None:
+) -> bool:
     command = ["git", "ls-files", "Pipfile", "*/Pipfile"]
     proc = await asyncio.create_subprocess_exec(
         *command,
@@ -400,7 +457,9 @@ async def _install_pipenv_dependencies(
     )
     async with asyncio.timeout(_TIMEOUT_GIT_LSFILES.total_seconds()):
         stdout, stderr = await proc.communicate()
+    success = True
     if proc.returncode != 0:
+        success = False
         message = module_utils.AnsiProcessMessage.from_async_artifacts(command, proc, stdout, stderr)
         message.title = "Error in ls-files"
         _LOGGER.warning(message)
@@ -413,7 +472,7 @@ async def _install_pipenv_dependencies(
                 continue
             directory = (await (cwd / file).resolve()).parent
 
-            _, _, proc_message = await module_utils.run_timeout(
+            _, proc_success, proc_message = await module_utils.run_timeout(
                 [
                     "pipenv",
                     "sync",
@@ -426,8 +485,10 @@ async def _install_pipenv_dependencies(
                 f"Timeout while installing the dependencies from {file}",
                 directory,
             )
+            success &= proc_success
             if proc_message is not None:
                 result.append(proc_message)
+    return success
 
 
 async def _install_poetry_dependencies(
@@ -436,7 +497,7 @@ async def _install_poetry_dependencies(
     result: list[module_utils.Message],
     env: dict[str, str],
     cwd: anyio.Path,
-) -> None:
+) -> bool:
     command = ["git", "ls-files", "poetry.lock", "*/poetry.lock"]
     proc = await asyncio.create_subprocess_exec(
         *command,
@@ -446,7 +507,9 @@ async def _install_poetry_dependencies(
     )
     async with asyncio.timeout(_TIMEOUT_GIT_LSFILES.total_seconds()):
         stdout, stderr = await proc.communicate()
+    success = True
     if proc.returncode != 0:
+        success = False
         message = module_utils.AnsiProcessMessage.from_async_artifacts(command, proc, stdout, stderr)
         message.title = "Error in ls-files"
         _LOGGER.warning(message)
@@ -458,21 +521,209 @@ async def _install_poetry_dependencies(
             if file in local_config.get("files-no-install", config.get("files-no-install", [])):
                 continue
 
-            _, _, proc_message = await module_utils.run_timeout(
-                [
-                    "poetry",
-                    "install",
-                    *local_config.get("poetry-install-arguments", config.get("poetry-install-arguments", [])),
-                ],
-                env,
+            directory = (await (cwd / file).resolve()).parent
+            arguments = local_config.get(
+                "poetry-install-arguments", config.get("poetry-install-arguments", [])
+            )
+
+            cached_venv, installed = await _get_cached_poetry_venv(directory, arguments, env, cwd)
+            if installed:
+                continue
+            # Install in the cached virtual environment, or in a virtual environment of the job environment
+            venv = cached_venv or get_poetry_venv(env, file)
+            if not await venv.exists():
+                await module_utils.run_timeout(
+                    ["python", "-m", "venv", str(venv)],
+                    env,
+                    _TIMEOUT_SUBPROCESS,
+                    f"Virtual environment created for {file}",
+                    f"Error while creating the virtual environment for {file}",
+                    f"Timeout while creating the virtual environment for {file}",
+                    cwd,
+                )
+            _, proc_success, proc_message = await module_utils.run_timeout(
+                ["poetry", "install", *arguments],
+                {**env, "VIRTUAL_ENV": str(venv), "PATH": f"{venv}/bin:{env['PATH']}"},
                 _TIMEOUT_PYTHON_INSTALL,
                 f"Dependencies installed from {file}",
                 f"Error while installing the dependencies from {file}",
                 f"Timeout while installing the dependencies from {file}",
-                (await (cwd / file).resolve()).parent,
+                directory,
             )
+            if cached_venv is not None:
+                await environment_cache.ENVIRONMENT_CACHE.complete_in_place(
+                    cached_venv.parent.name, proc_success
+                )
+            success &= proc_success
             if proc_message is not None:
                 result.append(proc_message)
+    return success
+
+
+async def _get_cached_poetry_venv(
+    directory: anyio.Path,
+    arguments: list[str],
+    env: dict[str, str],
+    cwd: anyio.Path,
+) -> tuple[anyio.Path | None, bool]:
+    """
+    Get the Poetry virtual environment of the environment cache, used in place, and if it's already installed.
+
+    The key depends on the Python and Poetry versions, the project files and the install arguments.
+    None if the virtual environment should be created in the job environment.
+    """
+    tool_versions = []
+    for command in (["python", "--version"], ["poetry", "--version"]):
+        stdout, success, _ = await module_utils.run_timeout(
+            command,
+            env,
+            _TIMEOUT_POETRY_VERSION,
+            "Tool version",
+            "Error while getting the tool version",
+            "Timeout while getting the tool version",
+            cwd,
+            error=False,
+        )
+        if not success or stdout is None:
+            return None, False
+        tool_versions.append(stdout.strip())
+    files_hash = {}
+    for file_name in ("pyproject.toml", "poetry.lock"):
+        file = directory / file_name
+        files_hash[file_name] = (
+            hashlib.sha256(await file.read_bytes()).hexdigest() if await file.exists() else None
+        )
+    key_data = {"files": files_hash, "tool-versions": tool_versions, "poetry-install-arguments": arguments}
+    return await environment_cache.ENVIRONMENT_CACHE.get_in_place(
+        f"poetry-{hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()}"
+    )
+
+
+def _get_user_base(env: dict[str, str]) -> str:
+    """Get the Python user base, in the job environment of the toolchain registry."""
+    return env.get("PYTHONUSERBASE", f"{env['HOME']}/.local")
+
+
+def get_poetry_venv(env: dict[str, str], file: str) -> anyio.Path:
+    """Get the virtual environment used to install the dependencies of a poetry.lock file."""
+    name = hashlib.sha256(file.encode()).hexdigest()[:16]
+    return anyio.Path(_get_user_base(env)) / "share" / "ghci" / "venvs" / name
+
+
+async def _git_ls_files(patterns: list[str], cwd: anyio.Path) -> list[str] | None:
+    """List the tracked files matching the patterns, None on error."""
+    stdout, success, _ = await module_utils.run_timeout(
+        ["git", "ls-files", *patterns],
+        None,
+        _TIMEOUT_GIT_LSFILES,
+        "Files listed",
+        "Error in ls-files",
+        "Timeout in ls-files",
+        cwd,
+    )
+    if not success or stdout is None:
+        return None
+    return [file for file in stdout.strip().split("\n") if file]
+
+
+async def get_changed_files(cwd: anyio.Path) -> list[str]:
+    """Get the modified tracked files of the working tree, the deleted files aren't included."""
+    stdout, success, _ = await module_utils.run_timeout(
+        ["git", "diff", "--name-only", "--diff-filter=d", "HEAD"],
+        None,
+        _TIMEOUT_GIT_DIFF,
+        "Changed files listed",
+        "Error while listing the changed files",
+        "Timeout while listing the changed files",
+        cwd,
+    )
+    if not success or stdout is None:
+        return []
+    return [file for file in stdout.strip().split("\n") if file]
+
+
+async def _get_environment_cache_key(
+    config: configuration.SnykConfiguration,
+    local_config: configuration.SnykConfiguration,
+    env: dict[str, str],
+    cwd: anyio.Path,
+) -> tuple[str | None, list[anyio.Path]]:
+    """
+    Get the key of the installed dependencies in the environment cache, and the directories to cache.
+
+    Only the user site-packages is cached, the key depends on the Python version, the requirements files,
+    the tool versions and the install arguments. None if the dependencies can't be cached.
+    The Poetry virtual environments aren't relocatable, they are cached in place (see `_get_cached_poetry_venv`).
+    The Pipenv environments aren't cached, they are found by Pipenv from the worktree path and
+    updated by Snyk fix.
+    """
+    files = await _git_ls_files(["requirements*.txt", "*/requirements*.txt"], cwd)
+    if files is None:
+        return None, []
+    files_no_install = local_config.get("files-no-install", config.get("files-no-install", []))
+
+    tool_versions = []
+    for command in (
+        ["python", "-c", "import site, sys; print(sys.version); print(site.getusersitepackages())"],
+        ["python", "-m", "pip", "--version"],
+    ):
+        stdout, success, _ = await module_utils.run_timeout(
+            command,
+            env,
+            _TIMEOUT_POETRY_VERSION,
+            "Tool version",
+            "Error while getting the tool version",
+            "Timeout while getting the tool version",
+            cwd,
+            error=False,
+        )
+        if not success or stdout is None:
+            return None, []
+        tool_versions.append(stdout.strip())
+
+    # The user site-packages is in the job environment, its path isn't part of the key
+    *python_version, user_site = tool_versions[0].split("\n")
+    tool_versions[0] = "\n".join(python_version)
+    targets = [anyio.Path(user_site)]
+    files_hash = {}
+    for file in sorted(files):
+        files_hash[file] = hashlib.sha256(await (cwd / file).read_bytes()).hexdigest()
+
+    key_data = {
+        "files": files_hash,
+        "files-no-install": files_no_install,
+        "tool-versions": tool_versions,
+        "pip-install-arguments": local_config.get(
+            "pip-install-arguments", config.get("pip-install-arguments", [])
+        ),
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest(), targets
+
+
+async def _install_dependencies(
+    config: configuration.SnykConfiguration,
+    local_config: configuration.SnykConfiguration,
+    result: list[module_utils.Message],
+    env: dict[str, str],
+    cwd: anyio.Path,
+) -> None:
+    """Install the Python dependencies, or restore the user site-packages from the environment cache."""
+    cache_key, targets = await _get_environment_cache_key(config, local_config, env, cwd)
+    restored = False
+    if cache_key is not None:
+        restored = await environment_cache.ENVIRONMENT_CACHE.restore(cache_key, targets)
+        if not restored:
+            # Start from clean environments, to have the same content as a restored one
+            await environment_cache.ENVIRONMENT_CACHE.clear_targets(targets)
+
+    if not restored:
+        success = await _install_requirements_dependencies(config, local_config, result, env, cwd)
+        if cache_key is not None and success:
+            await environment_cache.ENVIRONMENT_CACHE.store(cache_key, targets)
+
+    # Not cached with the user site-packages, see _get_environment_cache_key
+    await _install_pipenv_dependencies(config, local_config, result, env, cwd)
+    await _install_poetry_dependencies(config, local_config, result, env, cwd)
 
 
 async def _snyk_monitor(
@@ -482,7 +733,7 @@ async def _snyk_monitor(
     result: list[module_utils.Message],
     env: dict[str, str],
     cwd: anyio.Path,
-) -> None:
+) -> bool:
     command = [
         "snyk",
         "monitor",
@@ -514,7 +765,7 @@ async def _snyk_monitor(
             f"--project-tags={','.join(['='.join(tag) for tag in local_monitor_config.get('project-tags', monitor_config.get('project-tags', {}))])}",
         )
 
-    _, _, message = await module_utils.run_timeout(
+    _, success, message = await module_utils.run_timeout(
         command,
         env,
         _TIMEOUT_SNYK,
@@ -525,6 +776,7 @@ async def _snyk_monitor(
     )
     if message is not None:
         result.append(message)
+    return success
 
 
 async def _snyk_test(
@@ -534,7 +786,6 @@ async def _snyk_test(
     result: list[module_utils.Message],
     env_no_debug: dict[str, str],
     cwd: anyio.Path,
-    ignore_policy: bool = False,
 ) -> tuple[
     dict[str, int],
     dict[str, int],
@@ -542,26 +793,14 @@ async def _snyk_test(
     dict[str, set[str]],
     bool,
     dict[str, list[VulnerabilityData]],
+    dict[str, list[VulnerabilityData]],
 ]:
-    # Test with human output
-    if not ignore_policy:
-        command = [
-            "snyk",
-            "test",
-            *local_config.get(
-                "test-arguments",
-                config.get("test-arguments", configuration.SNYK_TEST_ARGUMENTS_DEFAULT),
-            ),
-        ]
-        await module_utils.run_timeout(
-            command,
-            env_no_debug,
-            _TIMEOUT_SNYK,
-            "Snyk test (human)",
-            "Error while testing the project",
-            "Timeout while testing the project",
-            cwd,
-        )
+    """
+    Run Snyk test once, with `--ignore-policy`, and apply the `.snyk` policies locally.
+
+    The summaries and the vulnerabilities ignored by the policies are derived from the same result.
+    """
+    policies = await get_snyk_ignore_reasons_by_directory(cwd)
 
     command = [
         "snyk",
@@ -571,7 +810,7 @@ async def _snyk_test(
             "test-arguments",
             config.get("test-arguments", configuration.SNYK_TEST_ARGUMENTS_DEFAULT),
         ),
-        *(["--ignore-policy"] if ignore_policy else []),
+        "--ignore-policy",
     ]
     test_json_str, _, message = await module_utils.run_timeout(
         command,
@@ -608,39 +847,36 @@ async def _snyk_test(
     fixable_files_npm: dict[str, set[str]] = {}
     vulnerabilities_in_requirements = False
     file_vulnerabilities: dict[str, list[VulnerabilityData]] = {}
+    ignored_file_vulnerabilities: dict[str, list[VulnerabilityData]] = {}
     for row in test_json:
         if "error" in row:
             _LOGGER.error(row["error"])
             continue
 
-        message = module_utils.HtmlMessage(
-            "\n".join(
-                [
-                    f"Package manager: {row.get('packageManager', '-')}",
-                    f"Target file: {row.get('displayTargetFile', '-')}",
-                    f"Project path: {row.get('path', '-')}",
-                    row.get("summary", ""),
-                ],
-            ),
-        )
-        message.title = f"{row.get('summary', 'Snyk test')} in {row.get('displayTargetFile', '-')}."
-        _LOGGER.info(message)
-
         package_manager = row.get("packageManager")
+        target_file = row.get("displayTargetFile", "-")
 
+        nb_vulnerabilities = 0
+        nb_ignored = 0
         for vuln in row.get("vulnerabilities", []):
+            ignored = is_snyk_ignored(policies, target_file, vuln["id"])
+            if ignored:
+                nb_ignored += 1
+            else:
+                nb_vulnerabilities += 1
             fixable = vuln.get("fixedIn", []) or vuln.get("isPatchable", False)
             severity = vuln["severity"]
             display = False
             if fixable:
-                fixable_vulnerabilities[severity] = fixable_vulnerabilities.get(severity, 0) + 1
+                if not ignored:
+                    fixable_vulnerabilities[severity] = fixable_vulnerabilities.get(severity, 0) + 1
                 display = True
             if severity in ("high", "critical"):
-                high_vulnerabilities[severity] = high_vulnerabilities.get(severity, 0) + 1
+                if not ignored:
+                    high_vulnerabilities[severity] = high_vulnerabilities.get(severity, 0) + 1
                 display = True
             if not display:
                 continue
-            severity = vuln["severity"]
             title = " ".join(
                 [
                     f"[{severity.upper()}]",
@@ -657,14 +893,18 @@ async def _snyk_test(
                 title += " [Patch available]."
             else:
                 title += "."
-            if vuln.get("fixedIn", []) or vuln.get("isUpgradable", False) or vuln.get("isPatchable", False):
-                fixable_vulnerabilities_summary[vuln["id"]] = title
-                if vuln.get("packageManager") == "npm":
-                    fixable_files_npm.setdefault(row.get("displayTargetFile"), set()).add(title)
-            elif package_manager == "pip":
-                vulnerabilities_in_requirements = True
-
-            target_file = row.get("displayTargetFile", "-")
+            if not ignored:
+                if (
+                    vuln.get("fixedIn", [])
+                    or vuln.get("isUpgradable", False)
+                    or vuln.get("isPatchable", False)
+                ):
+                    fixable_vulnerabilities_summary[vuln["id"]] = title
+                    if vuln.get("packageManager") == "npm":
+                        fixable_files_npm.setdefault(row.get("displayTargetFile"), set()).add(title)
+                elif package_manager == "pip":
+                    vulnerabilities_in_requirements = True
+
             cve_ids = vuln.get("identifiers", {}).get("CVE", [])
             cwe_ids = vuln.get("identifiers", {}).get("CWE", [])
             vuln_data = VulnerabilityData(
@@ -681,13 +921,30 @@ async def _snyk_test(
                 is_upgradable=vuln.get("isUpgradable", False),
                 is_patchable=vuln.get("isPatchable", False),
             )
-            existing_vulns = file_vulnerabilities.setdefault(target_file, [])
+            existing_vulns = (ignored_file_vulnerabilities if ignored else file_vulnerabilities).setdefault(
+                target_file, []
+            )
             if not any(
                 v.snyk_id == vuln_data.snyk_id and v.package_version == vuln_data.package_version
                 for v in existing_vulns
             ):
                 existing_vulns.append(vuln_data)
 
+        # Human readable summary, derived from the JSON result
+        summary = f"{nb_vulnerabilities} vulnerable dependency paths, {nb_ignored} ignored by the policy"
+        message = module_utils.HtmlMessage(
+            "\n".join(
+                [
+                    f"Package manager: {package_manager or '-'}",
+                    f"Target file: {target_file}",
+                    f"Project path: {row.get('path', '-')}",
+                    summary,
+                ],
+            ),
+        )
+        message.title = f"{summary} in {target_file}."
+        _LOGGER.info(message)
+
     _LOGGER.debug("End parsing the vulnerabilities")
     return (
         high_vulnerabilities,
@@ -696,6 +953,7 @@ async def _snyk_test(
         fixable_files_npm,
         vulnerabilities_in_requirements,
         file_vulnerabilities,
+        ignored_file_vulnerabilities,
     )
 
 
@@ -840,74 +1098,17 @@ def outdated_versions(
     return errors
 
 
-_GENERATION_TIME = None
-_SOURCES: dict[str, apt_repo.APTSources] = {}
-_PACKAGE_VERSION: dict[str, debian_inspector.version.Version] = {}
-
-
-def _get_sources(
-    dist: str,
-    config: configuration.DpkgConfiguration,
-    local_config: configuration.DpkgConfiguration,
-) -> apt_repo.APTSources:
-    """Get the sources for the distribution."""
-    if dist not in _SOURCES:
-        conf = local_config.get("sources", config.get("sources", configuration.DPKG_SOURCES_DEFAULT))
-        if dist not in conf:
-            message = f"The distribution {dist} is not in the configuration"
-            raise ValueError(message)
-        _SOURCES[dist] = apt_repo.APTSources(
-            [
-                apt_repo.APTRepository(
-                    source["url"],
-                    source["distribution"],
-                    source["components"],
-                )
-                for source in conf[dist]
-            ],
-        )
-        try:
-            for package in _SOURCES[dist].packages:
-                name = f"{dist}/{package.package}"
-                try:
-                    version = debian_inspector.version.Version.from_string(package.version)
-                    if name not in _PACKAGE_VERSION or version > _PACKAGE_VERSION[name]:
-                        _PACKAGE_VERSION[name] = version
-                except ValueError as exception:
-                    _LOGGER.warning(
-                        "Error while parsing the package %s/%s version of %s: %s",
-                        dist,
-                        package.package,
-                        package.version,
-                        exception,
-                    )
-        except AttributeError as exception:
-            _LOGGER.error("Error while loading the distribution %s: %s", dist, exception)  # noqa: TRY400
-
-    return _SOURCES[dist]
-
-
 async def _get_packages_version(
     package: str,
     config: configuration.DpkgConfiguration,
     local_config: configuration.DpkgConfiguration,
 ) -> str | None:
     """Get the version of the package."""
-    global _GENERATION_TIME  # noqa: PLW0603
-    if (
-        _GENERATION_TIME is None
-        or datetime.datetime.now(datetime.UTC) - settings.audit.dpkg_cache_duration > _GENERATION_TIME
-    ):
-        _PACKAGE_VERSION.clear()
-        _SOURCES.clear()
-        _GENERATION_TIME = datetime.datetime.now(datetime.UTC)
-    if package not in _PACKAGE_VERSION:
-        dist = package.split("/", maxsplit=1)[0]
-        await asyncio.to_thread(_get_sources, dist, config, local_config)
-    if package not in _PACKAGE_VERSION:
+    dist, name = package.split("/", maxsplit=1)
+    version = await apt_index.APT_INDEX_STORE.get_version(dist, name, config, local_config)
+    if version is None:
         _LOGGER.warning("No version found for %s", package)
-        return None
-    return str(_PACKAGE_VERSION[package])
+    return version
 
 
 async def dpkg(
@@ -969,9 +1170,75 @@ async def dpkg(
     )
 
 
+# The files that define the dependencies tested by Snyk, or how they are installed
+_SNYK_MANIFEST_FILES = [
+    ".snyk",
+    ".tool-versions",
+    "requirements*.txt",
+    "Pipfile",
+    "Pipfile.lock",
+    "pyproject.toml",
+    "poetry.lock",
+    "setup.py",
+    "setup.cfg",
+    "package.json",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "pom.xml",
+    "build.gradle",
+    "build.gradle.kts",
+    "settings.gradle",
+    "settings.gradle.kts",
+    "gradle.lockfile",
+    "gradle-wrapper.properties",
+    "go.mod",
+    "go.sum",
+    "Gemfile",
+    "Gemfile.lock",
+    "composer.json",
+    "composer.lock",
+    "Cargo.toml",
+    "Cargo.lock",
+    "packages.config",
+    "*.csproj",
+]
+
+
+async def get_snyk_fingerprint(
+    config: configuration.SnykConfiguration,
+    local_config: configuration.SnykConfiguration,
+    cwd: anyio.Path,
+) -> str | None:
+    """
+    Get the fingerprint of the Snyk inputs of a branch.
+
+    Based on the Git blob hashes of the tracked manifest, lock and `.snyk` files, and on the Snyk
+    configuration (test and monitor arguments, severity thresholds, ...). None on error.
+    """
+    stdout, success, _ = await module_utils.run_timeout(
+        ["git", "ls-files", "--stage", "--", *[f":(glob)**/{name}" for name in _SNYK_MANIFEST_FILES]],
+        None,
+        _TIMEOUT_GIT_LSFILES,
+        "Files listed",
+        "Error in ls-files",
+        "Timeout in ls-files",
+        cwd,
+    )
+    if not success or stdout is None:
+        return None
+    key_data = {
+        # The lines are '<mode> <blob hash> <stage>\t<path>'
+        "files": sorted(line for line in stdout.strip().split("\n") if line),
+        "config": config,
+        "local-config": local_config,
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
+
+
 async def find_snyk_files(cwd: anyio.Path) -> list[anyio.Path]:
-    """Find all .snyk files in the repository."""
-    command = ["git", "ls-files", "**/.snyk"]
+    """Find all .snyk files in the repository, including the root one."""
+    command = ["git", "ls-files", ":(glob)**/.snyk"]
     proc = await asyncio.create_subprocess_exec(
         *command,
         stdin=asyncio.subprocess.PIPE,
@@ -984,6 +1251,53 @@ async def find_snyk_files(cwd: anyio.Path) -> list[anyio.Path]:
     return [cwd / f for f in result.split("\n") if f] if result else []
 
 
+def _get_expires(expires: datetime.date | str | None) -> datetime.datetime | None:
+    """Get the expiration date of a `.snyk` ignore rule, None if it doesn't expire."""
+    if expires is None:
+        return None
+    if isinstance(expires, str):
+        try:
+            expires = datetime.datetime.fromisoformat(expires)
+        except ValueError:
+            _LOGGER.warning("Invalid expiration date in .snyk file: %s", expires)
+            return None
+    if not isinstance(expires, datetime.datetime):
+        # A date without time, e.g. `expires: 2024-01-01`, is loaded as a date by YAML
+        expires = datetime.datetime.combine(expires, datetime.time())
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=datetime.UTC)
+    return expires
+
+
+def _is_expired(expires: datetime.date | str | None) -> bool:
+    """Check if the expiration date of a `.snyk` ignore rule is passed."""
+    expires_date = _get_expires(expires)
+    return expires_date is not None and expires_date < datetime.datetime.now(datetime.UTC)
+
+
+async def get_snyk_policy_expiry(cwd: anyio.Path) -> datetime.datetime | None:
+    """Get the earliest future expiration date of the `.snyk` ignore rules, None if there is none."""
+    now = datetime.datetime.now(datetime.UTC)
+    expiry: datetime.datetime | None = None
+    for snyk_file in await find_snyk_files(cwd):
+        try:
+            data = yaml.safe_load(await snyk_file.read_text(encoding="utf-8"))
+        except (OSError, yaml.YAMLError):
+            continue
+        ignore = data.get("ignore", {}) if isinstance(data, dict) else {}
+        if not isinstance(ignore, dict):
+            continue
+        for entries in ignore.values():
+            for entry in entries if isinstance(entries, list) else []:
+                for details in entry.values() if isinstance(entry, dict) else []:
+                    if not isinstance(details, dict):
+                        continue
+                    expires = _get_expires(details.get("expires"))
+                    if expires is not None and expires > now and (expiry is None or expires < expiry):
+                        expiry = expires
+    return expiry
+
+
 async def parse_snyk_ignore_reasons(snyk_file: anyio.Path) -> dict[str, str]:
     """Parse a .snyk file and return a dict mapping Snyk ID to ignore reason."""
     if not await snyk_file.exists():
@@ -1001,28 +1315,32 @@ async def parse_snyk_ignore_reasons(snyk_file: anyio.Path) -> dict[str, str]:
             if isinstance(entry, dict):
                 for details in entry.values():
                     if isinstance(details, dict) and "reason" in details:
+                        if _is_expired(details.get("expires")):
+                            break
                         reasons[str(snyk_id)] = details["reason"]
                         break
     return reasons
 
 
-async def snyk_test_ignored(
-    branch: str,
-    config: configuration.SnykConfiguration,
-    local_config: configuration.SnykConfiguration,
-    env: dict[str, str],
-    cwd: anyio.Path,
-) -> dict[str, list[VulnerabilityData]]:
-    """Run snyk test --json --ignore-policy and return file-grouped vulnerability data."""
-    env_no_debug = {**env}
-    result: list[module_utils.Message] = []
-    _, _, _, _, _, file_vulnerabilities = await _snyk_test(
-        branch,
-        config,
-        local_config,
-        result,
-        env_no_debug,
-        cwd,
-        ignore_policy=True,
-    )
-    return file_vulnerabilities
+async def get_snyk_ignore_reasons_by_directory(cwd: anyio.Path) -> dict[str, dict[str, str]]:
+    """Get the ignore reasons of all the `.snyk` files, by directory relative to cwd ("." for the root)."""
+    return {
+        str(snyk_file.relative_to(cwd).parent): await parse_snyk_ignore_reasons(snyk_file)
+        for snyk_file in await find_snyk_files(cwd)
+    }
+
+
+def is_snyk_ignored(policies: dict[str, dict[str, str]], target_file: str, snyk_id: str) -> bool:
+    """
+    Check if a vulnerability is ignored by the nearest `.snyk` policy of the target file.
+
+    The dependency paths of the ignore rules aren't taken into account.
+    """
+    directory = PurePosixPath(target_file).parent
+    while True:
+        policy = policies.get(str(directory))
+        if policy is not None:
+            return snyk_id in policy
+        if directory == directory.parent:
+            return False
+        directory = directory.parent
@@ -9,8 +9,6 @@ from abc import abstractmethod
 from pathlib import Path
 from typing import Any
 
-import githubkit
-import githubkit.webhooks
 import githubkit_schemas.latest.models
 
 from github_app_geo_project import module
@@ -64,10 +62,7 @@ class Auto(
         Note that this function is called in the web server Pod who has low resources, and this call should be fast
         """
         if context.module_event_name == "pull_request":
-            event_data = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("pull_request")
             if event_data.action in ("opened", "reopened") and event_data.pull_request.state == "open":
                 return [
                     module.Action(
@@ -103,10 +98,7 @@ class Auto(
         Note that this method is called in the queue consuming Pod
         """
         assert context.module_event_name == "pull_request"
-        event_data = githubkit.webhooks.parse_obj(
-            "pull_request",
-            context.github_event_data,
-        )
+        event_data = context.github_event.parse("pull_request")
         for condition in context.module_config.get("conditions", []):
             if (
                 equals_if_defined(
@@ -10,7 +10,6 @@ from typing import Any, cast
 
 import anyio
 import githubkit.exception
-import githubkit.webhooks
 import githubkit_schemas.latest.models
 import githubkit_schemas.latest.webhooks
 import security_md
@@ -76,10 +75,7 @@ class Backport(
         """Get the action related to the module and the event."""
 
         if context.module_event_name == "pull_request":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
 
             # SECURITY.md update
             if (
@@ -129,10 +125,7 @@ class Backport(
                 )
             return actions
         if context.module_event_name == "push":
-            event_data_push = githubkit.webhooks.parse_obj(
-                "push",
-                context.github_event_data,
-            )
+            event_data_push = context.github_event.parse("push")
             for commit in event_data_push.commits:
                 if "SECURITY.md" in [
                     *(commit.modified or []),
@@ -160,10 +153,7 @@ class Backport(
     ) -> module.ProcessOutput[_ActionData, None]:
         """Process the action."""
         if context.module_event_data.type == "check":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             # get the BACKPORT_TODO file
             if event_data_pull_request.action in ("opened", "reopened", "synchronize"):
                 try:
@@ -201,10 +191,7 @@ class Backport(
             has_security_md = True
             branch = context.module_event_data.branch
             if branch is None:
-                event_data_pull_request = githubkit.webhooks.parse_obj(
-                    "pull_request",
-                    context.github_event_data,
-                )
+                event_data_pull_request = context.github_event.parse("pull_request")
                 has_security_md = False
                 if isinstance(
                     event_data_pull_request,
@@ -318,10 +305,7 @@ class Backport(
 
             return module.ProcessOutput()
         elif context.module_event_data.type == "backport":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             pull_request = event_data_pull_request.pull_request
             if event_data_pull_request.action in ("closed", "labeled") and pull_request.state == "closed":
                 branches = set()
@@ -351,10 +335,7 @@ class Backport(
             return module.ProcessOutput()
 
         if context.module_event_data.type == "version":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             assert context.module_event_data.pull_request_number is not None
             pull_request = event_data_pull_request.pull_request
             assert context.module_event_data.branch is not None
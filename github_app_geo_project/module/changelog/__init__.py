@@ -9,7 +9,6 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Any, NamedTuple, cast
 
 import githubkit.exception
-import githubkit.webhooks
 import githubkit_schemas.latest.models
 import packaging.version
 
@@ -659,10 +658,7 @@ class Changelog(
         Note that this function is called in the web server Pod who has low resources, and this call should be fast
         """
         if context.module_event_name == "release":
-            event_data_release = githubkit.webhooks.parse_obj(
-                "release",
-                context.github_event_data,
-            )
+            event_data_release = context.github_event.parse("release")
             if event_data_release.action == "created":
                 return [
                     module.Action(
@@ -671,10 +667,7 @@ class Changelog(
                     ),
                 ]
         if context.module_event_name == "create":
-            event_data_create = githubkit.webhooks.parse_obj(
-                "create",
-                context.github_event_data,
-            )
+            event_data_create = context.github_event.parse("create")
             if event_data_create.ref_type == "tag":
                 return [
                     module.Action(
@@ -683,10 +676,7 @@ class Changelog(
                     ),
                 ]
         if context.module_event_name == "delete":
-            event_data_delete = githubkit.webhooks.parse_obj(
-                "delete",
-                context.github_event_data,
-            )
+            event_data_delete = context.github_event.parse("delete")
             if event_data_delete.ref_type == "tag":
                 return [
                     module.Action(
@@ -695,10 +685,7 @@ class Changelog(
                     ),
                 ]
         if context.module_event_name == "pull_request":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             if (
                 event_data_pull_request.action
                 in ("edited", "labeled", "unlabeled", "milestoned", "demilestoned")
@@ -740,10 +727,7 @@ class Changelog(
                 ]
 
         if context.module_event_name == "milestone":
-            event_data_milestone = githubkit.webhooks.parse_obj(
-                "milestone",
-                context.github_event_data,
-            )
+            event_data_milestone = context.github_event.parse("milestone")
             if (
                 event_data_milestone.action == "edited"
                 and event_data_milestone.milestone
@@ -761,10 +745,7 @@ class Changelog(
                     for version in versions
                 ]
         if context.module_event_name == "discussion":
-            event_data_discussion = githubkit.webhooks.parse_obj(
-                "discussion",
-                context.github_event_data,
-            )
+            event_data_discussion = context.github_event.parse("discussion")
             if event_data_discussion.action in ("created", "closed"):
                 return [
                     module.Action(
@@ -901,10 +882,7 @@ class Changelog(
             )
         if context.module_event_data.get("type") == "discussion":
             assert context.module_event_name == "discussion"
-            event_data = githubkit.webhooks.parse_obj(
-                "discussion",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("discussion")
             title = set()
             title.update(event_data.discussion.title.split())
             if (
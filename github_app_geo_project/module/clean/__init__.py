@@ -13,7 +13,6 @@ from typing import Any, cast
 import aiohttp
 import anyio
 import githubkit.exception
-import githubkit.webhooks
 import githubkit_schemas
 import githubkit_schemas.latest
 import githubkit_schemas.latest.models
@@ -83,10 +82,7 @@ class Clean(module.Module[configuration.CleanConfiguration, _ActionData, None, N
     ) -> list[module.Action[_ActionData]]:
         """Get the action related to the module and the event."""
         if context.module_event_name == "pull_request":
-            event_data_pull_request = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data_pull_request = context.github_event.parse("pull_request")
             if event_data_pull_request.action == "closed":
                 return [
                     module.Action(
@@ -101,10 +97,7 @@ class Clean(module.Module[configuration.CleanConfiguration, _ActionData, None, N
                     ),
                 ]
         if context.module_event_name == "delete":
-            event_data_delete = githubkit.webhooks.parse_obj(
-                "delete",
-                context.github_event_data,
-            )
+            event_data_delete = context.github_event.parse("delete")
             if event_data_delete.ref_type == "branch":
                 return [
                     module.Action(
@@ -180,10 +173,7 @@ class Clean(module.Module[configuration.CleanConfiguration, _ActionData, None, N
         context: module.ProcessContext[configuration.CleanConfiguration, _ActionData],
     ) -> None:
         """Delete the source branch when a closed non-merged pull request has bot-only commits."""
-        event_data_pull_request = githubkit.webhooks.parse_obj(
-            "pull_request",
-            context.github_event_data,
-        )
+        event_data_pull_request = context.github_event.parse("pull_request")
         if event_data_pull_request.action != "closed":
             return
         if event_data_pull_request.pull_request.merged:
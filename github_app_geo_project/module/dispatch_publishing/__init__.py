@@ -6,7 +6,6 @@ import logging
 import re
 from typing import Any
 
-import githubkit.webhooks
 import githubkit_schemas.latest.webhooks
 from pydantic import BaseModel
 
@@ -88,10 +87,7 @@ class DispatchPublishing(module.Module[None, None, None, None]):
         Note that this function is called in the web server Pod who has low resources, and this call should be fast
         """
         if context.module_event_name == "repository_dispatch":
-            event_data = githubkit.webhooks.parse_obj(
-                "repository_dispatch",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("repository_dispatch")
             if event_data.action == "published" and isinstance(
                 event_data,
                 githubkit_schemas.latest.webhooks.RepositoryDispatchEvent,
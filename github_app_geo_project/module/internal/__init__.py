@@ -2,15 +2,17 @@
 
 """Module to dispatch publishing event."""
 
+import datetime
+import hashlib
 import logging
 from typing import Any
 
-import githubkit.webhooks
+import githubkit.exception
 import sqlalchemy
 import sqlalchemy.dialects.postgresql
 from pydantic import BaseModel
 
-from github_app_geo_project import models, module
+from github_app_geo_project import configuration, models, module, project_configuration
 from github_app_geo_project.module import modules
 from github_app_geo_project.module import utils as module_utils
 from github_app_geo_project.settings import settings
@@ -21,6 +23,14 @@ _LOGGER = logging.getLogger(__name__)
 class _EventData(BaseModel):
     modules: list[str] = []
     """The list of modules to dispatch the event to."""
+    installation_id: int | None = None
+    """The installation of the repositories, for the repositories event."""
+    repositories: list[str] = []
+    """The repositories (<owner>/<name>) to dispatch the event to, for the repositories event."""
+    spread_start: datetime.datetime | None = None
+    """The start of the window over which the jobs are spread, for the repositories event."""
+    spread_window: datetime.timedelta | None = None
+    """The window over which the jobs are spread, for the repositories event."""
 
 
 class Dispatcher(module.Module[None, _EventData, None, None]):
@@ -83,10 +93,16 @@ class Dispatcher(module.Module[None, _EventData, None, None]):
                 check_output={"summary": "Event processed on repository"},
             )
 
-        re_requested_check_ids = _get_re_requested_check_suite_id(
-            context.github_event_name,
-            context.github_event_data,
-        )
+        if context.module_event_name == "repos_event":
+            nb_repositories, nb_modules_action = await _process_repos_event(context)
+            return module.ProcessOutput(
+                check_output={
+                    "summary": f"Event processed on {nb_repositories} repositories, "
+                    f"create {nb_modules_action} actions",
+                },
+            )
+
+        re_requested_check_ids = _get_re_requested_check_suite_id(context.github_event)
         outputs, nb_re_run = (
             await _re_requested_check_suite(context, *re_requested_check_ids)
             if re_requested_check_ids is not None
@@ -117,11 +133,51 @@ async def process_event(
     """Process the event."""
     owner = "camptocamp" if settings.test.app_name else context.github_project.owner
     repository = "test" if settings.test.app_name else context.github_project.repository
+    outputs: list[str] = []
+    new_jobs: list[tuple[dict[str, Any], module.Module[Any, Any, Any, Any], bool]] = []
+    number = await _get_jobs(context, owner, repository, context.module_event_data.modules, new_jobs, outputs)
+
+    jobs_ids = await module_utils.insert_jobs(context.session, [new_job for new_job, _, _ in new_jobs])
+    try:
+        await module_utils.create_jobs_checks(
+            context.session,
+            [
+                (job_id, current_module)
+                for job_id, (_, current_module, with_checks) in zip(jobs_ids, new_jobs, strict=True)
+                if with_checks
+            ],
+            context.github_project,
+            context.github_event,
+            context.service_url,
+        )
+    except Exception:  # pylint: disable=broad-except
+        _LOGGER.exception("Error while creating the check runs, they will be created by the jobs")
+    await context.session.commit()
+    return outputs, number
+
+
+async def _get_jobs(
+    context: module.ProcessContext[None, _EventData],
+    owner: str,
+    repository: str,
+    module_names: list[str],
+    new_jobs: list[tuple[dict[str, Any], module.Module[Any, Any, Any, Any], bool]],
+    outputs: list[str],
+    run_after: datetime.datetime | None = None,
+) -> int:
+    """
+    Get the jobs to create for the event on a repository.
+
+    The jobs are added to `new_jobs` as (job row, module, should create checks),
+    the new jobs already present in the database that are replaced are marked as skipped.
+    The jobs will not be run before `run_after`.
+
+    Returns the number of created actions.
+    """
     application = settings.test.app_name or context.github_project.application.name
     _LOGGER.debug("Processing event for application %s", application)
-    outputs = []
     number = 0
-    for name in context.module_event_data.modules:
+    for name in module_names:
         current_module = modules.MODULES.get(name)
         if current_module is None:
             _LOGGER.error("Unknown module %s", name)
@@ -143,6 +199,7 @@ async def process_event(
                     github_application=(
                         context.github_project.application if context.github_project else None
                     ),
+                    github_event=context.github_event,
                 ),
             ):
                 _LOGGER.info(
@@ -210,18 +267,26 @@ async def process_event(
 
                     await context.session.execute(update)
 
-                job = models.Queue()
-                job.priority = priority
-                job.application = application
-                job.owner = owner
-                job.repository = repository
-                job.github_event_name = github_event_name
-                job.github_event_data = context.github_event_data
-                job.module = name
-                job.module_event_name = module_event_name
-                job.module_event_data = module_data
-                context.session.add(job)
-                await context.session.flush()
+                new_job = {
+                    "priority": priority,
+                    "application": application,
+                    "owner": owner,
+                    "repository": repository,
+                    "github_event_name": github_event_name,
+                    "github_event_data": context.github_event_data,
+                    "module": name,
+                    "module_event_name": module_event_name,
+                    "module_event_data": module_data,
+                    "run_after": run_after,
+                }
+                if jobs_unique_on:
+                    # Also skip the jobs created by this event, they are not yet in the database
+                    new_jobs[:] = [
+                        (other_job, other_module, other_with_checks)
+                        for other_job, other_module, other_with_checks in new_jobs
+                        if other_job["module"] != name
+                        or any(other_job[key.value] != new_job[key.value] for key in jobs_unique_on)
+                    ]
 
                 should_create_checks = action.checks
                 if should_create_checks is None:
@@ -233,31 +298,24 @@ async def process_event(
                         "check_suite",
                         "workflow_run",
                     ]
-                if should_create_checks and context.github_project is not None:
-                    await module_utils.create_checks(
-                        job,
-                        context.session,
-                        current_module,
-                        context.github_project,
-                        context.service_url,
-                    )
+                new_jobs.append(
+                    (new_job, current_module, should_create_checks and context.github_project is not None),
+                )
         except Exception:  # pylint: disable=broad-except
             _LOGGER.exception("Error while getting actions for %s", name)
-    await context.session.commit()
-    return outputs, number
+
+    return number
 
 
 def _get_re_requested_check_suite_id(
-    github_event_name: str,
-    github_event_data: dict[str, Any],
+    github_event: module.GitHubEvent,
 ) -> tuple[int, int | None] | None:
     """
     Check if the event is a rerequested event and return relevant IDs.
 
     Arguments
     ---------
-        github_event_name: The name of the event.
-        github_event_data: The data associated with the event.
+        github_event: The event, with the name and the associated data.
 
     Returns
     -------
@@ -266,15 +324,15 @@ def _get_re_requested_check_suite_id(
             - check_run_id (int): The ID of the check run.
         Returns None if the event is not a rerequested check_run event or if the required data is missing.
     """
-    if github_event_name == "check_run":
-        event_data_check_run = githubkit.webhooks.parse_obj("check_run", github_event_data)
+    if github_event.name == "check_run":
+        event_data_check_run = github_event.parse("check_run")
         if event_data_check_run.action == "rerequested" and event_data_check_run.check_run.check_suite.id:
             return (
                 event_data_check_run.check_run.check_suite.id,
                 event_data_check_run.check_run.id,
             )
-    elif github_event_name == "check_suite":
-        event_data_check_suite = githubkit.webhooks.parse_obj("check_suite", github_event_data)
+    elif github_event.name == "check_suite":
+        event_data_check_suite = github_event.parse("check_suite")
         if event_data_check_suite.action == "rerequested":
             return event_data_check_suite.check_suite.id, None
     return None
@@ -325,13 +383,13 @@ async def _re_requested_check_suite(
                         },
                     ),
                 )
-                await context.session.commit()
-                await context.github_project.aio_github.rest.checks.async_update(
-                    owner=context.github_project.owner,
-                    repo=context.github_project.repository,
-                    check_run_id=check_run.id,
-                    data={"status": "queued"},
+                await module_utils.enqueue_check_run_update(
+                    context.session,
+                    context.github_project,
+                    check_run.id,
+                    {"status": "queued"},
                 )
+                await context.session.commit()
     except githubkit.exception.RequestFailed as exception:
         if exception.response.status_code == 404:
             _LOGGER.error(  # noqa: TRY400
@@ -367,6 +425,7 @@ async def _process_event(context: module.ProcessContext[None, _EventData]) -> No
         installations = (
             await context.github_project.application.aio_github.rest.apps.async_list_installations()
         ).parsed_data
+        spread_start = datetime.datetime.now(tz=datetime.UTC)
         for installation in installations:
             aoi_installation_auth_strategy = context.github_project.application.aio_auth.as_installation(
                 installation.id,
@@ -374,22 +433,40 @@ async def _process_event(context: module.ProcessContext[None, _EventData]) -> No
             aio_github = context.github_project.application.aio_github.with_auth(
                 aoi_installation_auth_strategy,
             )
-            full_repos = []
-            async for repo in aio_github.rest.paginate(
-                aio_github.rest.apps.async_list_repos_accessible_to_installation,
-                lambda response: response.parsed_data.repositories,
-            ):
-                full_repos.append(f"{repo.owner.login}/{repo.name}")
+            full_repos = [
+                f"{repo.owner.login}/{repo.name}"
+                async for repo in aio_github.rest.paginate(
+                    aio_github.rest.apps.async_list_repos_accessible_to_installation,
+                    lambda response: response.parsed_data.repositories,
+                )
+            ]
+            spread_window = settings.dispatcher.cron_spread_window
+            if settings.dispatcher.cron_installation_budget > 0:
+                # Stretch the window to stay in the hourly budget of the installation
+                spread_window = max(
+                    spread_window,
+                    datetime.timedelta(
+                        hours=len(full_repos)
+                        * len(context.module_event_data.modules)
+                        / settings.dispatcher.cron_installation_budget,
+                    ),
+                )
+            batch_size = max(1, settings.dispatcher.cron_batch_size)
+            for index in range(0, len(full_repos), batch_size):
                 job = models.Queue()
                 job.priority = 0
                 job.application = context.github_project.application.name
-                job.owner = repo.owner.login
-                job.repository = repo.name
                 job.github_event_name = "repo_event"
                 job.github_event_data = context.github_event_data
                 job.module = "dispatcher"
-                job.module_event_name = "repo_event"
-                job.module_event_data = context.module_event_data.model_dump()
+                job.module_event_name = "repos_event"
+                job.module_event_data = _EventData(
+                    modules=context.module_event_data.modules,
+                    installation_id=installation.id,
+                    repositories=full_repos[index : index + batch_size],
+                    spread_start=spread_start,
+                    spread_window=spread_window,
+                ).model_dump(mode="json")
                 context.session.add(job)
             _LOGGER.info(
                 "Processing event for installation %s with repositories:\n%s",
@@ -407,3 +484,85 @@ async def _process_repo_event(context: module.ProcessContext[None, _EventData])
         (settings.test.app_name or context.github_project.application.name),
     )
     await process_event(context)
+
+
+async def _process_repos_event(context: module.ProcessContext[None, _EventData]) -> tuple[int, int]:
+    """
+    Process the event on a batch of repositories of an installation.
+
+    The modules disabled in the repository configuration are skipped, the configuration is cached,
+    and all the created jobs are inserted at once.
+
+    Returns the number of repositories and the number of created actions.
+    """
+    application = context.github_project.application
+    _LOGGER.info(
+        "Process the event: %s, application: %s, on %s repositories",
+        context.github_event_data.get("name"),
+        application.name,
+        len(context.module_event_data.repositories),
+    )
+    assert context.module_event_data.installation_id is not None
+    aio_github = application.aio_github.with_auth(
+        application.aio_auth.as_installation(context.module_event_data.installation_id),
+    )
+    # The created jobs should be the same as the ones created by a job per repository
+    repo_context = context._replace(module_event_name="repo_event")
+    outputs: list[str] = []
+    number = 0
+    new_jobs: list[tuple[dict[str, Any], module.Module[Any, Any, Any, Any], bool]] = []
+    for full_repo in context.module_event_data.repositories:
+        owner, repository = full_repo.split("/", 1)
+        try:
+            project_config = await configuration.get_cached_configuration(
+                configuration.GithubProject(
+                    application=application,
+                    token=None,  # type: ignore[arg-type]
+                    owner=owner,
+                    repository=repository,
+                    aio_installation=None,  # type: ignore[arg-type]
+                    aio_github=aio_github,
+                ),
+            )
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error while getting the configuration of %s", full_repo)
+            continue
+        module_names = [
+            name
+            for name in context.module_event_data.modules
+            if project_config.get(name, {}).get("enabled", project_configuration.MODULE_ENABLED_DEFAULT)  # type: ignore[attr-defined]
+        ]
+        number += await _get_jobs(
+            repo_context,
+            owner,
+            repository,
+            module_names,
+            new_jobs,
+            outputs,
+            _get_run_after(
+                full_repo,
+                context.module_event_data.spread_start,
+                context.module_event_data.spread_window,
+            ),
+        )
+
+    # The check runs will be created by the jobs
+    await module_utils.insert_jobs(context.session, [new_job for new_job, _, _ in new_jobs])
+    await context.session.commit()
+    return len(context.module_event_data.repositories), number
+
+
+def _get_run_after(
+    full_repo: str,
+    spread_start: datetime.datetime | None,
+    spread_window: datetime.timedelta | None,
+) -> datetime.datetime | None:
+    """
+    Get the time after which the jobs of the repository can run.
+
+    The offset in the window is deterministic, a repository always runs at the same offset.
+    """
+    if spread_start is None or not spread_window:
+        return None
+    digest = hashlib.sha256(full_repo.encode("utf-8")).digest()
+    return spread_start + spread_window * (int.from_bytes(digest[:8]) / 2**64)
@@ -7,7 +7,6 @@ import logging
 from pathlib import Path
 from typing import Any
 
-import githubkit.webhooks
 import githubkit_schemas.latest.models
 from pydantic import BaseModel
 
@@ -90,10 +89,7 @@ class OutdatedComments(module.Module[_Config, _EventData, None, None]):
         Note that this function is called in the web server Pod who has low resources, and this call should be fast
         """
         if context.module_event_name == "pull_request_review":
-            event_data = githubkit.webhooks.parse_obj(
-                "pull_request_review",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("pull_request_review")
             if event_data.action == "submitted" and isinstance(
                 event_data,
                 githubkit_schemas.latest.models.WebhookPullRequestReviewSubmitted,
@@ -12,7 +12,6 @@ from collections.abc import AsyncIterator
 from typing import Any
 
 import githubkit.exception
-import githubkit.webhooks
 
 from github_app_geo_project import module
 from github_app_geo_project.module import utils as module_utils
@@ -122,10 +121,7 @@ class Patch(module.Module[dict[str, Any], dict[str, Any], dict[str, Any], Any]):
         Note that this function is called in the web server Pod who has low resources, and this call should be fast
         """
         if context.module_event_name == "workflow_job":
-            event_data_workflow_job = githubkit.webhooks.parse_obj(
-                "workflow_job",
-                context.github_event_data,
-            )
+            event_data_workflow_job = context.github_event.parse("workflow_job")
 
             _LOGGER.debug(
                 """Received workflow job with user information (will be used to check if the user is trusted):
@@ -143,10 +139,7 @@ class Patch(module.Module[dict[str, Any], dict[str, Any], dict[str, Any], Any]):
             ):
                 return [module.Action(priority=module.PRIORITY_STANDARD, data={})]
         if context.module_event_name == "workflow_run":
-            event_data_workflow_run = githubkit.webhooks.parse_obj(
-                "workflow_run",
-                context.github_event_data,
-            )
+            event_data_workflow_run = context.github_event.parse("workflow_run")
 
             _LOGGER.debug(
                 """Received workflow job with user information (will be used to check if the user is trusted):
@@ -180,10 +173,7 @@ class Patch(module.Module[dict[str, Any], dict[str, Any], dict[str, Any], Any]):
         Note that this method is called in the queue consuming Pod
         """
         if context.module_event_name == "workflow_job":
-            event_data_workflow_job = githubkit.webhooks.parse_obj(
-                "workflow_job",
-                context.github_event_data,
-            )
+            event_data_workflow_job = context.github_event.parse("workflow_job")
             run_id = event_data_workflow_job.workflow_job.run_id
             head_branch = event_data_workflow_job.workflow_job.head_branch
             is_clone = False
@@ -213,10 +203,7 @@ class Patch(module.Module[dict[str, Any], dict[str, Any], dict[str, Any], Any]):
                     exception.response.status_code,
                 )
         elif context.module_event_name == "workflow_run":
-            event_data_workflow_run = githubkit.webhooks.parse_obj(
-                "workflow_run",
-                context.github_event_data,
-            )
+            event_data_workflow_run = context.github_event.parse("workflow_run")
             run_id = event_data_workflow_run.workflow_run.id
             head_branch = event_data_workflow_run.workflow_run.head_branch
             is_clone = (
@@ -14,7 +14,6 @@ from typing import Any, cast
 
 import githubkit
 import githubkit.exception
-import githubkit.webhooks
 import githubkit_schemas.latest.models
 import githubkit_schemas.latest.webhooks
 
@@ -362,10 +361,7 @@ class Checks(
     ) -> list[module.Action[dict[str, Any]]]:
         """Get the actions to execute."""
         if context.module_event_name == "pull_request":
-            event_data = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("pull_request")
             if event_data.action in ("opened", "reopened", "edited", "synchronize"):
                 return [
                     module.Action(
@@ -388,10 +384,7 @@ class Checks(
         """Process the module."""
 
         assert context.module_event_name == "pull_request"
-        event_data = githubkit.webhooks.parse_obj(
-            "pull_request",
-            context.github_event_data,
-        )
+        event_data = context.github_event.parse("pull_request")
 
         # Get the pull request and commits concurrently
         pull_request_response, commits_response = await asyncio.gather(
@@ -7,7 +7,6 @@ import re
 from pathlib import Path
 from typing import Any
 
-import githubkit.webhooks
 
 from github_app_geo_project import module
 from github_app_geo_project.module.pull_request import links_configuration
@@ -139,10 +138,7 @@ class Links(
     ) -> list[module.Action[dict[str, Any]]]:
         """Get the actions to execute."""
         if context.module_event_name == "pull_request":
-            event_data = githubkit.webhooks.parse_obj(
-                "pull_request",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("pull_request")
             if event_data.action in ("opened", "reopened", "synchronize"):
                 return [
                     module.Action(
@@ -15,7 +15,7 @@ import urllib.parse
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, NamedTuple, cast
 
 import anyio
 import githubkit.exception
@@ -24,11 +24,13 @@ import html_sanitizer
 import markdownify
 import security_md
 import sqlalchemy.ext.asyncio
+import sqlalchemy.orm
 from ansi2html import Ansi2HTMLConverter
 from ansi2html.style import get_styles
 from pydantic import BaseModel
 
 from github_app_geo_project import configuration, models, module, utils
+from github_app_geo_project.settings import settings
 
 _LOGGER = logging.getLogger(__name__)
 WORKING_DIRECTORY_LOCK = asyncio.Lock()
@@ -954,12 +956,20 @@ async def create_commit_pull_request(
     cwd: anyio.Path,
     enable_pre_commit: bool = True,
     skip_pre_commit_hooks: list[str] | None = None,
+    pre_commit_files: list[str] | None = None,
+    pre_commit_env: dict[str, str] | None = None,
 ) -> tuple[bool, githubkit_schemas.latest.models.PullRequest | None]:
-    """Do a commit, then create a pull request."""
+    """
+    Do a commit, then create a pull request.
+
+    The pre-commit hooks are run on `pre_commit_files`, on all the files if None,
+    with the additional environment variables `pre_commit_env`.
+    """
     skip_pre_commit_hooks = skip_pre_commit_hooks or []
+    files_arguments = ["--all-files"] if pre_commit_files is None else ["--files", *pre_commit_files]
     if enable_pre_commit and await (cwd / ".pre-commit-config.yaml").exists():
         # If the .python-version file exists, we activate pyenv in the subprocess
-        env = dict(os.environ)
+        env = {**os.environ, **(pre_commit_env or {})}
         python_version_file = cwd / ".python-version"
         if await python_version_file.exists():
             # We search for pyenv in the PATH
@@ -974,7 +984,7 @@ async def create_commit_pull_request(
             env["PATH"] = f"{Path(pyenv_root) / 'shims'!s}:{Path(pyenv_root) / 'bin'!s}:{env['PATH']}"
         env["SKIP"] = ",".join(skip_pre_commit_hooks)
         await run_timeout(
-            ["prek", "run", "--all-files", "--show-diff-on-failure", "--config=.pre-commit-config.yaml"],
+            ["prek", "run", *files_arguments, "--show-diff-on-failure", "--config=.pre-commit-config.yaml"],
             env,
             600,
             "Run prek",
@@ -986,7 +996,7 @@ async def create_commit_pull_request(
             [
                 "pre-commit",
                 "run",
-                "--all-files",
+                *files_arguments,
                 "--show-diff-on-failure",
                 "--config=.pre-commit-config.yaml",
             ],
@@ -1383,49 +1393,16 @@ def manage_updated_separated(
             del data[other_key]
 
 
-async def create_checks(
-    job: models.Queue,
-    session: sqlalchemy.ext.asyncio.AsyncSession,
-    current_module: module.Module[Any, Any, Any, Any],
+async def get_checks_sha(
     github_project: configuration.GithubProject,
-    service_url: str,
-) -> githubkit_schemas.latest.models.CheckRun | None:
-    """Create the GitHub check run."""
-    # Get the job id from the database
-    await session.flush()
-
-    service_url = service_url if service_url.endswith("/") else service_url + "/"
-    service_url = urllib.parse.urljoin(service_url, "logs/")
-    service_url = urllib.parse.urljoin(service_url, str(job.id))
+    github_event: module.GitHubEvent,
+) -> str:
+    """
+    Get the sha on which the check runs of the event should be created.
 
-    sha = None
-    if job.github_event_name == "pull_request":
-        event_data_pull_request = githubkit.webhooks.parse_obj(  # type: ignore[attr-defined]
-            "pull_request",
-            job.github_event_data,
-        )
-        sha = event_data_pull_request.pull_request.head.sha
-    if job.github_event_name == "push":
-        event_data_push = githubkit.webhooks.parse_obj("push", job.github_event_data)  # type: ignore[attr-defined]
-        sha = event_data_push.before if event_data_push.deleted else event_data_push.after
-    if job.github_event_name == "workflow_run":
-        event_data_workflow_run = githubkit.webhooks.parse_obj(  # type: ignore[attr-defined]
-            "workflow_run",
-            job.github_event_data,
-        )
-        sha = event_data_workflow_run.workflow_run.head_sha
-    if job.github_event_name == "check_suite":
-        event_data_check_suite = githubkit.webhooks.parse_obj(  # type: ignore[attr-defined]
-            "check_suite",
-            job.github_event_data,
-        )
-        sha = event_data_check_suite.check_suite.head_sha
-    if job.github_event_name == "check_run":
-        event_data_check_run = githubkit.webhooks.parse_obj(  # type: ignore[attr-defined]
-            "check_run",
-            job.github_event_data,
-        )
-        sha = event_data_check_run.check_run.head_sha
+    It's the head sha of the event, or the head of the default branch.
+    """
+    sha = github_event.sha
     if sha is None:
         branch = (
             await github_project.aio_github.rest.repos.async_get_branch(
@@ -1436,31 +1413,389 @@ async def create_checks(
         ).parsed_data
         sha = branch.commit.sha
     if sha is None:
-        message = f"No sha found for the job {job.id} in {job.github_event_name}"
+        message = f"No sha found for the event {github_event.name}"
         raise ValueError(message)
+    return sha
+
+
+async def create_check_run(
+    job_id: int,
+    github_event_name: str,
+    sha: str,
+    current_module: module.Module[Any, Any, Any, Any],
+    github_project: configuration.GithubProject,
+    service_url: str,
+) -> githubkit_schemas.latest.models.CheckRun | None:
+    """Create the GitHub check run of a job, without touching the database."""
+    service_url = service_url if service_url.endswith("/") else service_url + "/"
+    service_url = urllib.parse.urljoin(service_url, "logs/")
+    service_url = urllib.parse.urljoin(service_url, str(job_id))
 
-    name = f"{current_module.title()}: {job.github_event_name}"
+    name = f"{current_module.title()}: {github_event_name}"
     try:
-        check_run = (
+        return (
             await github_project.aio_github.rest.checks.async_create(
                 owner=github_project.owner,
                 repo=github_project.repository,
                 name=name,
                 head_sha=sha,
                 details_url=service_url,
-                external_id=str(job.id),
+                external_id=str(job_id),
             )
         ).parsed_data
     except githubkit.exception.RequestFailed as exception:
         _LOGGER.warning(
             "Failed to create check run for job %s: %s - %s\n%s",
-            job.id,
+            job_id,
             exception.response.status_code,
             exception.response.reason_phrase,
             exception.response.text,
         )
         return None
+
+
+async def create_checks(
+    job: models.Queue,
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    current_module: module.Module[Any, Any, Any, Any],
+    github_project: configuration.GithubProject,
+    service_url: str,
+    github_event: module.GitHubEvent | None = None,
+) -> githubkit_schemas.latest.models.CheckRun | None:
+    """
+    Create the GitHub check run.
+
+    The head sha is read from the event payload, without validating it.
+    """
+    # Get the job id from the database
+    await session.flush()
+
+    if github_event is None:
+        github_event = module.GitHubEvent(job.github_event_name, job.github_event_data)
+    check_run = await create_check_run(
+        job.id,
+        job.github_event_name,
+        await get_checks_sha(github_project, github_event),
+        current_module,
+        github_project,
+        service_url,
+    )
+    if check_run is None:
+        return None
     job.check_run_id = check_run.id
     await session.commit()
     await session.refresh(job)
     return check_run
+
+
+async def insert_jobs(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    jobs: list[dict[str, Any]],
+) -> list[int]:
+    """
+    Insert the jobs in the queue with one statement.
+
+    The jobs are the values of the `Queue` columns, all with the same keys.
+
+    :return: The ids of the created jobs, in the same order.
+    """
+    if not jobs:
+        return []
+    return list(
+        await session.scalars(
+            sqlalchemy.insert(models.Queue).returning(models.Queue.id, sort_by_parameter_order=True),
+            jobs,
+        ),
+    )
+
+
+async def create_jobs_checks(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    jobs: list[tuple[int, module.Module[Any, Any, Any, Any]]],
+    github_project: configuration.GithubProject,
+    github_event: module.GitHubEvent,
+    service_url: str,
+) -> None:
+    """
+    Create the GitHub check runs of new jobs of the same event.
+
+    The check runs are created concurrently, and the ids are stored on the jobs with one update.
+    """
+    if not jobs:
+        return
+    sha = await get_checks_sha(github_project, github_event)
+    semaphore = asyncio.Semaphore(settings.process_queue.check_runs_concurrency)
+
+    async def _create(
+        job_id: int,
+        current_module: module.Module[Any, Any, Any, Any],
+    ) -> githubkit_schemas.latest.models.CheckRun | None:
+        async with semaphore:
+            return await create_check_run(
+                job_id,
+                github_event.name,
+                sha,
+                current_module,
+                github_project,
+                service_url,
+            )
+
+    check_runs = await asyncio.gather(
+        *(_create(job_id, current_module) for job_id, current_module in jobs),
+    )
+    check_run_ids = {
+        job_id: check_run.id
+        for (job_id, _), check_run in zip(jobs, check_runs, strict=True)
+        if check_run is not None
+    }
+    if check_run_ids:
+        await session.execute(
+            sqlalchemy.update(models.Queue)
+            .where(models.Queue.id.in_(check_run_ids))
+            .values(
+                check_run_id=sqlalchemy.case(
+                    {
+                        job_id: sqlalchemy.literal(check_run_id, sqlalchemy.BigInteger)
+                        for job_id, check_run_id in check_run_ids.items()
+                    },
+                    value=models.Queue.id,
+                ),
+            ),
+        )
+
+
+async def enqueue_check_run_update(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    github_project: configuration.GithubProject,
+    check_run_id: int,
+    data: dict[str, Any],
+) -> None:
+    """
+    Add a check run update in the outbox, it will be sent by `flush_check_run_updates`.
+
+    The outbox is append-only, nothing is locked: the pending updates of the same check run are
+    merged by the flush, so that e.g. queued → in_progress → completed is sent with one call.
+    The update is sent only after the commit of the session.
+    """
+    session.add(
+        models.CheckRunUpdate(
+            application=github_project.application.name,
+            owner=github_project.owner,
+            repository=github_project.repository,
+            check_run_id=check_run_id,
+            data=data,
+        ),
+    )
+
+
+def _merge_check_run_update(data: dict[str, Any], new_data: dict[str, Any]) -> dict[str, Any]:
+    merged_data = {**data, **new_data}
+    if merged_data.get("status") != "completed":
+        # A conclusion means completed for GitHub
+        merged_data.pop("conclusion", None)
+    return merged_data
+
+
+_GITHUB_PROJECTS_CACHE: dict[tuple[str, str, str], tuple[float, configuration.GithubProject]] = {}
+# The installation token is valid for one hour
+_GITHUB_PROJECTS_CACHE_DURATION = 30 * 60
+
+
+async def _get_cached_github_project(
+    application: str, owner: str, repository: str
+) -> configuration.GithubProject:
+    key = (application, owner, repository)
+    now = asyncio.get_running_loop().time()
+    if key in _GITHUB_PROJECTS_CACHE:
+        timestamp, github_project = _GITHUB_PROJECTS_CACHE[key]
+        if now - timestamp < _GITHUB_PROJECTS_CACHE_DURATION:
+            return github_project
+    github_project = await configuration.get_github_project(application, owner, repository)
+    _GITHUB_PROJECTS_CACHE[key] = (now, github_project)
+    return github_project
+
+
+class _ClaimedCheckRunUpdate(NamedTuple):
+    """The merged pending updates of a check run, claimed by a flush."""
+
+    ids: list[int]
+    application: str
+    owner: str
+    repository: str
+    check_run_id: int
+    data: dict[str, Any]
+    attempts: int
+
+
+# The claimed updates aren't sent by another flush during this time, e.g. if the worker is killed
+_CHECK_RUN_UPDATES_LEASE = datetime.timedelta(minutes=5)
+
+
+async def _claim_check_run_updates(
+    Session: sqlalchemy.ext.asyncio.async_sessionmaker[  # pylint: disable=invalid-name,unsubscriptable-object # noqa: N803
+        sqlalchemy.ext.asyncio.AsyncSession
+    ],
+) -> list[_ClaimedCheckRunUpdate]:
+    """
+    Claim the due check run updates, merged by check run.
+
+    The updates are leased and the transaction is committed, so no row is locked while sending them.
+    A check run is claimed only from its oldest update, to keep the order of its updates when an older
+    one is sent by another worker or waits to be retried.
+    """
+    async with Session() as session:
+        older = sqlalchemy.orm.aliased(models.CheckRunUpdate)
+        updates = (
+            (
+                await session.execute(
+                    sqlalchemy.select(models.CheckRunUpdate)
+                    .where(
+                        models.CheckRunUpdate.next_attempt_at <= sqlalchemy.func.now(),
+                        ~sqlalchemy.exists().where(
+                            older.check_run_id == models.CheckRunUpdate.check_run_id,
+                            older.id < models.CheckRunUpdate.id,
+                            older.next_attempt_at > sqlalchemy.func.now(),
+                        ),
+                    )
+                    .order_by(models.CheckRunUpdate.id)
+                    .limit(settings.process_queue.check_runs_concurrency * 10)
+                    .with_for_update(skip_locked=True),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not updates:
+            return []
+
+        oldest_ids = dict(
+            (
+                await session.execute(
+                    sqlalchemy.select(
+                        models.CheckRunUpdate.check_run_id, sqlalchemy.func.min(models.CheckRunUpdate.id)
+                    )
+                    .where(
+                        models.CheckRunUpdate.check_run_id.in_({update.check_run_id for update in updates})
+                    )
+                    .group_by(models.CheckRunUpdate.check_run_id),
+                )
+            ).all(),
+        )
+        claimed: dict[int, _ClaimedCheckRunUpdate] = {}
+        for update in updates:
+            if update.check_run_id in claimed:
+                merged = claimed[update.check_run_id]
+                merged.ids.append(update.id)
+                claimed[update.check_run_id] = merged._replace(
+                    data=_merge_check_run_update(merged.data, update.data),
+                    attempts=max(merged.attempts, update.attempts),
+                )
+            elif update.id == oldest_ids.get(update.check_run_id):
+                claimed[update.check_run_id] = _ClaimedCheckRunUpdate(
+                    ids=[update.id],
+                    application=update.application,
+                    owner=update.owner,
+                    repository=update.repository,
+                    check_run_id=update.check_run_id,
+                    data=update.data,
+                    attempts=update.attempts,
+                )
+        if claimed:
+            await session.execute(
+                sqlalchemy.update(models.CheckRunUpdate)
+                .where(
+                    models.CheckRunUpdate.id.in_([id_ for merged in claimed.values() for id_ in merged.ids])
+                )
+                .values(next_attempt_at=sqlalchemy.func.now() + _CHECK_RUN_UPDATES_LEASE),
+            )
+        await session.commit()
+        return list(claimed.values())
+
+
+async def flush_check_run_updates(
+    Session: sqlalchemy.ext.asyncio.async_sessionmaker[  # pylint: disable=invalid-name,unsubscriptable-object # noqa: N803
+        sqlalchemy.ext.asyncio.AsyncSession
+    ],
+) -> int:
+    """
+    Send the pending check run updates to GitHub.
+
+    The updates are claimed in a first transaction, sent without any open transaction,
+    and the results are stored in a second transaction.
+    The failed updates are retried with an exponential delay, up to
+    `settings.process_queue.check_runs_max_attempts` attempts.
+
+    :return: The number of sent check run updates.
+    """
+    claimed = await _claim_check_run_updates(Session)
+    if not claimed:
+        return 0
+
+    semaphore = asyncio.Semaphore(settings.process_queue.check_runs_concurrency)
+
+    async def _send(update: _ClaimedCheckRunUpdate) -> str | None:
+        """Send the update, return the error message on failure."""
+        async with semaphore:
+            try:
+                github_project = await _get_cached_github_project(
+                    update.application,
+                    update.owner,
+                    update.repository,
+                )
+                await github_project.aio_github.rest.checks.async_update(
+                    owner=update.owner,
+                    repo=update.repository,
+                    check_run_id=update.check_run_id,
+                    data=update.data,  # type: ignore[call-overload]
+                )
+            except githubkit.exception.RequestFailed as exception:
+                if exception.response.status_code in (404, 422):
+                    # Will never succeed
+                    _LOGGER.error(  # noqa: TRY400
+                        "Drop the update of the check run %s on %s/%s: %s - %s\n%s",
+                        update.check_run_id,
+                        update.owner,
+                        update.repository,
+                        exception.response.status_code,
+                        exception.response.reason_phrase,
+                        exception.response.text,
+                    )
+                    return None
+                return f"{exception.response.status_code} - {exception.response.reason_phrase}"
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                _LOGGER.warning("Failed to update the check run %s", update.check_run_id, exc_info=True)
+                return str(exception)
+            return None
+
+    errors = await asyncio.gather(*(_send(update) for update in claimed))
+
+    async with Session() as session:
+        for update, error in zip(claimed, errors, strict=True):
+            where = models.CheckRunUpdate.id.in_(update.ids)
+            if error is None:
+                await session.execute(sqlalchemy.delete(models.CheckRunUpdate).where(where))
+                continue
+            attempts = update.attempts + 1
+            if attempts >= settings.process_queue.check_runs_max_attempts:
+                _LOGGER.error(
+                    "Drop the update of the check run %s on %s/%s after %s attempts: %s",
+                    update.check_run_id,
+                    update.owner,
+                    update.repository,
+                    attempts,
+                    error,
+                )
+                await session.execute(sqlalchemy.delete(models.CheckRunUpdate).where(where))
+            else:
+                await session.execute(
+                    sqlalchemy.update(models.CheckRunUpdate)
+                    .where(where)
+                    .values(
+                        attempts=attempts,
+                        last_error=error,
+                        next_attempt_at=datetime.datetime.now(tz=datetime.UTC)
+                        + settings.process_queue.check_runs_retry_delay * 2 ** (attempts - 1),
+                    ),
+                )
+        await session.commit()
+    return len(claimed)
@@ -7,6 +7,8 @@ from __future__ import annotations
 import asyncio
 import base64
 import datetime
+import functools
+import hashlib
 import io
 import json
 import logging
@@ -14,9 +16,9 @@ import os
 import re
 import tomllib
 from enum import Enum, IntEnum
-from typing import TYPE_CHECKING, Any, cast
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO, cast
 
-import aiohttp
 import anyio
 import c2cciutils.configuration
 import githubkit.exception
@@ -29,16 +31,18 @@ from pydantic import BaseModel, Field, model_validator
 from github_app_geo_project import module, utils
 from github_app_geo_project.module import ProcessOutput
 from github_app_geo_project.module import utils as module_utils
-from github_app_geo_project.module.versions import configuration
+from github_app_geo_project.module.versions import configuration, endoflife
 from github_app_geo_project.settings import settings
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Iterable, Iterator
 
 _LOGGER = logging.getLogger(__name__)
 
 _UNSUPPORTED_CLASS = "dep-unsupported"
 _SUPPORTED_CLASS = "dep-supported"
+_INDEX_VERSION = 1
+_BRANCH_CACHE_MODULE = "versions-branch-cache"
 
 
 class _SupportCategory(IntEnum):
@@ -164,6 +168,14 @@ class _TransversalStatus(BaseModel):
     updated: dict[str, datetime.datetime] = {}
     """Repository updated time"""
     repositories: dict[str, _TransversalStatusRepo] = {}
+    index_version: int = 0
+    """Version of the global indexes, they are fully rebuilt when it's not `_INDEX_VERSION`"""
+    names: _Names = Field(default_factory=_Names)
+    """Global names index, merged from the repositories names_index"""
+    packages_repositories: dict[str, dict[str, list[str]]] = {}
+    """Index: datasource -> package_name -> repositories that provide it"""
+    dependents: dict[str, dict[str, list[str]]] = {}
+    """Reverse dependency index: datasource -> dependency_name[:dependency_version] -> dependent repositories"""
 
 
 class _IntermediateStatus(BaseModel):
@@ -415,35 +427,56 @@ class Versions(
                 version,
             )
 
-            async def _process_version(cwd: anyio.Path) -> ProcessOutput[_EventData, _IntermediateStatus]:
-                # Get Renovate configuration from master branch
-                try:
-                    renovate_file_content = (
-                        await context.github_project.aio_github.rest.repos.async_get_content(
-                            owner=context.github_project.owner,
-                            repo=context.github_project.repository,
-                            path=".github/renovate.json5",
-                        )
-                    ).parsed_data
-                    assert isinstance(
-                        renovate_file_content,
-                        githubkit_schemas.latest.models.ContentFile,
+            # Get Renovate configuration from master branch
+            renovate_config = None
+            try:
+                renovate_file_content = (
+                    await context.github_project.aio_github.rest.repos.async_get_content(
+                        owner=context.github_project.owner,
+                        repo=context.github_project.repository,
+                        path=".github/renovate.json5",
                     )
+                ).parsed_data
+                assert isinstance(
+                    renovate_file_content,
+                    githubkit_schemas.latest.models.ContentFile,
+                )
+                renovate_config = base64.b64decode(renovate_file_content.content).decode("utf-8")
+            except githubkit.exception.RequestFailed as exception:
+                if exception.response.status_code != 404:
+                    raise
+
+            cache_entries = module.TransversalStatusEntries(context.session, _BRANCH_CACHE_MODULE)
+            cache_entry_key = f"{context.github_project.owner}/{context.github_project.repository}:{version}"
+            cache_key = await _get_branch_cache_key(context, branch, renovate_config)
+            cached = await cache_entries.get(cache_entry_key)
+            if (
+                cached is not None
+                and cached.get("key") == cache_key
+                and "cached_at" in cached
+                and datetime.datetime.now(datetime.UTC) - datetime.datetime.fromisoformat(cached["cached_at"])
+                < settings.versions.branch_cache_duration
+            ):
+                _LOGGER.info("The branch %s didn't change, use the cached names and dependencies", branch)
+                cached_status = _IntermediateStatus.model_validate(cached["status"])
+                intermediate_status.version_names_by_datasource = cached_status.version_names_by_datasource
+                intermediate_status.version_dependencies_by_datasource = (
+                    cached_status.version_dependencies_by_datasource
+                )
+                return ProcessOutput(
+                    intermediate_status=intermediate_status,
+                    updated_transversal_status=True,
+                )
 
+            async def _process_version(cwd: anyio.Path) -> ProcessOutput[_EventData, _IntermediateStatus]:
+                if renovate_config is not None:
                     github_path = cwd / ".github"
                     await anyio.Path(github_path).mkdir(parents=True, exist_ok=True)
                     async with await anyio.open_file(
                         github_path / "renovate.json5",
                         "w",
                     ) as renovate_file:
-                        await renovate_file.write(
-                            base64.b64decode(renovate_file_content.content).decode(
-                                "utf-8",
-                            ),
-                        )
-                except githubkit.exception.RequestFailed as exception:
-                    if exception.response.status_code != 404:
-                        raise
+                        await renovate_file.write(renovate_config)
 
                 await _get_names(
                     context,
@@ -495,6 +528,21 @@ class Versions(
                 message.title = "Dependencies:"
                 _LOGGER.debug(message)
 
+                cache_entries.set(
+                    cache_entry_key,
+                    {
+                        "key": cache_key,
+                        "cached_at": datetime.datetime.now(datetime.UTC).isoformat(),
+                        "status": json.loads(
+                            intermediate_status.model_dump_json(
+                                include={"version_names_by_datasource", "version_dependencies_by_datasource"},
+                            ),
+                        ),
+                    },
+                )
+                cache_entries.delete_older(settings.versions.branch_cache_duration)
+                await cache_entries.flush()
+
                 return ProcessOutput(
                     intermediate_status=intermediate_status,
                     updated_transversal_status=True,
@@ -519,6 +567,16 @@ class Versions(
         """Update the transversal status with the intermediate status."""
         key = f"{context.github_project.owner}/{context.github_project.repository}"
 
+        # The repositories indexes are replaced when they are rebuilt, used to find the changed repositories
+        old_indexes = (
+            {
+                name: (repo_data.names_index, repo_data.dependencies_index)
+                for name, repo_data in transversal_status.repositories.items()
+            }
+            if transversal_status.index_version == _INDEX_VERSION
+            else None
+        )
+
         module_utils.manage_updated_separated(
             transversal_status.updated,
             transversal_status.repositories,
@@ -605,6 +663,11 @@ class Versions(
             _rebuild_repo_names(transversal_status.repositories[external_name])
             _rebuild_repo_dependencies(transversal_status.repositories[external_name])
 
+        if old_indexes is None:
+            _rebuild_global_indexes(transversal_status)
+        else:
+            _update_global_indexes(transversal_status, old_indexes)
+
         return transversal_status
 
     def has_transversal_dashboard(self) -> bool:
@@ -619,13 +682,10 @@ class Versions(
         transversal_status = context.status
 
         if "repository" in context.params:
-            names = _build_global_names(transversal_status)
-
-            message = module_utils.HtmlMessage(
-                utils.format_json_str(names.model_dump_json()),
-            )
-            message.title = "Names:"
-            _LOGGER.debug(message)
+            if transversal_status.index_version != _INDEX_VERSION:
+                # Not yet updated since the global indexes are stored
+                _rebuild_global_indexes(transversal_status)
+            names = transversal_status.names
 
             # branch = list of dependencies
             dependencies_branches = _DependenciesBranches()
@@ -682,10 +742,77 @@ class Versions(
             data={"repositories": list(transversal_status.repositories.keys())},
         )
 
+    def get_transversal_api(
+        self,
+        context: module.TransversalDashboardContext[_TransversalStatus],
+    ) -> dict[str, Any] | None:
+        """
+        Get the repositories and branches that depend on a package.
+
+        Query parameters: `datasource` and `package` are required, `version` is optional.
+        """
+        for param in ("datasource", "package"):
+            if not context.params.get(param):
+                message = f"Missing required parameter '{param}'"
+                raise ValueError(message)
+        datasource = context.params["datasource"]
+        package = context.params["package"]
+        version = context.params.get("version") or None
+
+        transversal_status = context.status
+        if transversal_status.index_version != _INDEX_VERSION:
+            _rebuild_global_indexes(transversal_status)
+        return {
+            "datasource": datasource,
+            "package": package,
+            "version": version,
+            "dependents": _get_dependents(transversal_status, datasource, package, version),
+        }
+
 
 _MINOR_VERSION_RE = re.compile(r"^(\d+\.\d+)(\..+)?$")
 
 
+_VERSION_RE = re.compile(r"^(\d+)(?:\.(\d+))?(?:\.(\d+))?$")
+_VERSION_CACHE_SIZE = 65536
+
+_VersionKey = tuple[int, tuple[int, int, int], str]
+
+
+@functools.lru_cache(maxsize=_VERSION_CACHE_SIZE)
+def _version_key(version: str) -> _VersionKey:
+    r"""
+    Get the sort key of a version string, parsed once and cached per string.
+
+    Numeric versions (matching `^\\d+(\\.(\\d+))?(\\.(\\d+))?$`, e.g. "20", "3.11",
+    "1.2.3") are compared numerically by major, minor, then patch component.
+    Missing minor/patch components are treated as 0 (so "20", "20.0", and "20.0.0"
+    are considered equal).
+    Non-numeric versions (e.g. branch names like "master") sort after all
+    numeric versions, in lexicographic order.
+
+    Arguments:
+    ---------
+        version: The version string
+
+    Returns
+    -------
+        A tuple that can be directly compared with the key of another version
+    """
+    match = _VERSION_RE.match(version)
+    if match is None:
+        return (1, (0, 0, 0), version)
+    return (
+        0,
+        (
+            int(match.group(1)),
+            int(match.group(2)) if match.group(2) is not None else 0,
+            int(match.group(3)) if match.group(3) is not None else 0,
+        ),
+        "",
+    )
+
+
 class _Version:
     """
     Helper class for comparing version strings.
@@ -695,9 +822,10 @@ class _Version:
     non-numeric branch names (like "master", "main", "develop").
 
     Non-numeric versions sort after all numeric versions.
+    The comparisons use the cached key from `_version_key`.
     """
 
-    _VERSION_RE = re.compile(r"^(\d+)(?:\.(\d+))?(?:\.(\d+))?$")
+    __slots__ = ("key", "version")
 
     def __init__(self, version: str) -> None:
         """
@@ -708,19 +836,12 @@ class _Version:
             version: The version string to wrap
         """
         self.version = version
+        self.key = _version_key(version)
 
     def __cmp__(self, other: _Version) -> int:
-        r"""
+        """
         Compare this version with another.
 
-        Numeric versions (matching `^\\d+(\\.(\\d+))?(\\.(\\d+))?(\\.\\d+)*$`,
-        e.g. "20", "3.11", "1.2.3") are compared numerically by major,
-        minor, then patch component; further components are ignored. Missing
-        minor/patch components are treated as 0 (so "20", "20.0", and "20.0.0"
-        are considered equal).
-        Non-numeric versions (e.g. branch names like "master") sort after all
-        numeric versions.
-
         Arguments:
         ---------
             other: The other version to compare with
@@ -729,29 +850,9 @@ class _Version:
         -------
             0 if equal, positive if self > other, negative if self < other
         """
-        if self.version == other.version:
-            return 0
-        match1 = self._VERSION_RE.match(self.version)
-        match2 = self._VERSION_RE.match(other.version)
-        if match1 is None and match2 is None:
-            return 1 if self.version > other.version else -1
-        if match1 is None:
-            return 1
-        if match2 is None:
-            return -1
-        tuple1 = (
-            int(match1.group(1)),
-            int(match1.group(2)) if match1.group(2) is not None else 0,
-            int(match1.group(3)) if match1.group(3) is not None else 0,
-        )
-        tuple2 = (
-            int(match2.group(1)),
-            int(match2.group(2)) if match2.group(2) is not None else 0,
-            int(match2.group(3)) if match2.group(3) is not None else 0,
-        )
-        if tuple1 == tuple2:
+        if self.key == other.key:
             return 0
-        return 1 if tuple1 > tuple2 else -1
+        return 1 if self.key > other.key else -1
 
     def __lt__(self, other: _Version) -> bool:
         """
@@ -765,14 +866,14 @@ class _Version:
         -------
             True if self < other, False otherwise
         """
-        return self.__cmp__(other) < 0
+        return self.key < other.key
 
 
 def _order_versions(versions: Iterable[str]) -> list[str]:
     """
     Sort a list of version strings in descending order.
 
-    Uses the custom _Version class to handle semantic versioning comparisons correctly.
+    Uses the cached `_version_key` to handle semantic versioning comparisons correctly.
 
     Arguments:
     ---------
@@ -782,7 +883,7 @@ def _order_versions(versions: Iterable[str]) -> list[str]:
     -------
         List of version strings sorted in descending order
     """
-    return sorted(versions, reverse=True, key=_Version)
+    return sorted(versions, reverse=True, key=_version_key)
 
 
 def _clean_version(version: str) -> str:
@@ -800,12 +901,15 @@ def _clean_version(version: str) -> str:
     return version.lstrip("v=")
 
 
+@functools.lru_cache(maxsize=_VERSION_CACHE_SIZE)
 def _canonical_minor_version(datasource: str, version: str) -> str:
     """
     Convert a version string to its canonical minor version representation.
 
     For non-docker datasources, this extracts the major.minor part of the version,
     handling various version prefixes and formats.
+    The result is cached per (datasource, version), the index rebuilds call it
+    for every branch and dependency.
 
     Arguments:
     ---------
@@ -893,36 +997,145 @@ def _rebuild_repo_dependencies(repo_data: _TransversalStatusRepo) -> None:
     repo_data.dependencies_index = dependencies_index
 
 
-def _build_global_names(transversal_status: _TransversalStatus) -> _Names:
+def _add_to_index(index: dict[str, dict[str, list[str]]], datasource: str, name: str, repo: str) -> None:
+    repositories = index.setdefault(datasource, {}).setdefault(name, [])
+    if repo not in repositories:
+        repositories.append(repo)
+
+
+def _remove_from_index(index: dict[str, dict[str, list[str]]], datasource: str, name: str, repo: str) -> None:
+    datasource_index = index.get(datasource, {})
+    repositories = datasource_index.get(name, [])
+    if repo in repositories:
+        repositories.remove(repo)
+    if not repositories:
+        datasource_index.pop(name, None)
+    if not datasource_index:
+        index.pop(datasource, None)
+
+
+def _rebuild_global_name(transversal_status: _TransversalStatus, datasource: str, package_name: str) -> None:
+    """Rebuild the global names entry of a package from the repositories that provide it."""
+    repositories = transversal_status.packages_repositories.get(datasource, {}).get(package_name, [])
+    ds_names = transversal_status.names.by_datasources.setdefault(datasource, _NamesByDataSources())
+    if not repositories:
+        ds_names.by_package.pop(package_name, None)
+        if not ds_names.by_package:
+            del transversal_status.names.by_datasources[datasource]
+        return
+    if len(repositories) > 1:
+        # The first repository (in the status order) gives the repository information
+        order = {name: index for index, name in enumerate(transversal_status.repositories)}
+        repositories.sort(key=lambda name: order[name])
+    pkg_status = _NamesStatus(
+        repo=repositories[0],
+        has_security_policy=transversal_status.repositories[repositories[0]].has_security_policy,
+    )
+    for repo_name in repositories:
+        pkg_status.status_by_version.update(
+            transversal_status.repositories[repo_name]
+            .names_index.by_datasource[datasource]
+            .by_package[package_name]
+            .by_version,
+        )
+    ds_names.by_package[package_name] = pkg_status
+
+
+def _update_global_indexes(
+    transversal_status: _TransversalStatus,
+    old_indexes: dict[
+        str,
+        tuple[_TransversalStatusNamesIndex, _TransversalStatusDependenciesIndex],
+    ],
+) -> None:
     """
-    Assemble the global names lookup from the per-repo persisted indices.
+    Update the global indexes for the changed repositories.
 
-    Merges all repos' pre-computed names_index into a single _Names structure
-    used by _build_internal_dependencies. Falls back to building from versions
-    data for repos that have no names_index yet (backward compatibility).
+    A repository is changed when its names_index or dependencies_index isn't the same object
+    as in `old_indexes` (they are replaced when rebuilt), or when it is added or removed.
 
     Arguments:
     ---------
-        transversal_status: The transversal status containing all repos
+        transversal_status: The transversal status to update in place
+        old_indexes: The repositories indexes before the update
+    """
+    changed_packages: set[tuple[str, str]] = set()
+    for repo_name in [
+        *old_indexes,
+        *(name for name in transversal_status.repositories if name not in old_indexes),
+    ]:
+        old = old_indexes.get(repo_name)
+        repo_data = transversal_status.repositories.get(repo_name)
+        if (
+            old is not None
+            and repo_data is not None
+            and old[0] is repo_data.names_index
+            and old[1] is repo_data.dependencies_index
+        ):
+            continue
+        if old is not None:
+            for datasource, ds_packages in old[0].by_datasource.items():
+                for package_name in ds_packages.by_package:
+                    _remove_from_index(
+                        transversal_status.packages_repositories, datasource, package_name, repo_name
+                    )
+                    changed_packages.add((datasource, package_name))
+            for datasource, ds_dependencies in old[1].by_datasource.items():
+                for dependency_name in ds_dependencies.by_dependency:
+                    _remove_from_index(transversal_status.dependents, datasource, dependency_name, repo_name)
+        if repo_data is not None:
+            for datasource, ds_packages in repo_data.names_index.by_datasource.items():
+                for package_name in ds_packages.by_package:
+                    _add_to_index(
+                        transversal_status.packages_repositories, datasource, package_name, repo_name
+                    )
+                    changed_packages.add((datasource, package_name))
+            for datasource, ds_dependencies in repo_data.dependencies_index.by_datasource.items():
+                for dependency_name in ds_dependencies.by_dependency:
+                    _add_to_index(transversal_status.dependents, datasource, dependency_name, repo_name)
 
-    Returns
-    -------
-        A _Names instance ready for dependency resolution
+    for datasource, package_name in changed_packages:
+        _rebuild_global_name(transversal_status, datasource, package_name)
+
+
+def _rebuild_global_indexes(transversal_status: _TransversalStatus) -> None:
+    """Rebuild all the global indexes from the repositories indexes."""
+    transversal_status.names = _Names()
+    transversal_status.packages_repositories = {}
+    transversal_status.dependents = {}
+    _update_global_indexes(transversal_status, {})
+    transversal_status.index_version = _INDEX_VERSION
+
+
+async def _get_branch_cache_key(
+    context: module.ProcessContext[configuration.VersionsConfiguration, _EventData],
+    branch: str,
+    renovate_config: str | None,
+) -> str:
     """
-    names = _Names()
-    for repo_name, repo_data in transversal_status.repositories.items():
-        for datasource, ds_packages in repo_data.names_index.by_datasource.items():
-            ds_names = names.by_datasources.setdefault(datasource, _NamesByDataSources())
-            for package_name, version_support in ds_packages.by_package.items():
-                pkg_status = ds_names.by_package.setdefault(
-                    package_name,
-                    _NamesStatus(
-                        repo=repo_name,
-                        has_security_policy=repo_data.has_security_policy,
-                    ),
-                )
-                pkg_status.status_by_version.update(version_support.by_version)
-    return names
+    Get the key of the cached names and dependencies of a branch.
+
+    The names and dependencies only change with the branch head, the Renovate configuration,
+    the package extractor configuration and the alternate versions.
+    """
+    branch_data = (
+        await context.github_project.aio_github.rest.repos.async_get_branch(
+            owner=context.github_project.owner,
+            repo=context.github_project.repository,
+            branch=branch,
+        )
+    ).parsed_data
+    return hashlib.sha256(
+        json.dumps(
+            {
+                "sha": branch_data.commit.sha,
+                "renovate-config": renovate_config,
+                "package-extractor": context.module_config.get("package-extractor", {}),
+                "alternate-versions": context.module_event_data.alternate_versions,
+            },
+            sort_keys=True,
+        ).encode(),
+    ).hexdigest()
 
 
 def _do_get_config(cwd: anyio.Path) -> dict[str, Any]:
@@ -1216,19 +1429,186 @@ async def _get_dependencies(
             message.title = "No output file found from renovate-graph"
             _LOGGER.error(message)
             raise VersionError(message.title)
-        async with await anyio.open_file(output_file, encoding="utf-8") as file:
-            content = await file.read()
+
+        def _read_output_file() -> None:
+            with Path(output_file).open(encoding="utf-8") as file:
+                _read_dependencies_stream(context, file, result)
+
+        await anyio.to_thread.run_sync(_read_output_file)
     else:
-        content = os.environ["RENOVATE_GRAPH"]
+        _read_dependencies_stream(context, io.StringIO(os.environ["RENOVATE_GRAPH"]), result)
 
-    message = module_utils.HtmlMessage(utils.format_json_str(content))
-    message.title = "Read dependencies from"
-    _LOGGER.debug(message)
-    data = json.loads(content)
-    _read_dependencies(context, {"config": data.get("packageData", {})}, result)
     return False
 
 
+class _JsonStreamReader:
+    """
+    Minimal streaming JSON reader.
+
+    Used to extract the needed values from a big JSON document without loading it in memory:
+    the containers are iterated, the needed values are decoded and the other values are skipped,
+    only one chunk of the document is buffered.
+    """
+
+    _STRUCTURE_RE = re.compile(r'["{}\[\]]')
+    _STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+    _WHITESPACE_RE = re.compile(r"\s*")
+    # A number followed by one of these characters can be cut by the end of the chunk, e.g. `1.` of `1.25`
+    _NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+    def __init__(self, file: TextIO, chunk_size: int = 1024 * 1024) -> None:
+        self._file = file
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Read the next chunk, return False at the end of the file."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _peek(self) -> str:
+        """Skip the whitespaces and return the next character."""
+        while True:
+            match = self._WHITESPACE_RE.match(self._buffer, self._pos)
+            assert match is not None
+            self._pos = match.end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                message = "Unexpected end of document"
+                raise self._error(message)
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if char not in chars:
+            message = f"Expecting one of '{chars}'"
+            raise self._error(message)
+        self._pos += 1
+        return char
+
+    def read_value(self) -> Any:
+        """Decode the next value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer, or followed by a number character, can be truncated
+            if (end == len(self._buffer) or self._buffer[end] in self._NUMBER_CHARS) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _skip_string(self) -> None:
+        while True:
+            match = self._STRING_RE.match(self._buffer, self._pos)
+            if match is not None:
+                self._pos = match.end()
+                return
+            if not self._fill():
+                message = "Unterminated string"
+                raise self._error(message)
+
+    def skip_value(self) -> None:
+        """Skip the next value without decoding it."""
+        char = self._peek()
+        if char == '"':
+            self._skip_string()
+            return
+        if char not in "{[":
+            self.read_value()
+            return
+        self._pos += 1
+        depth = 1
+        while depth:
+            match = self._STRUCTURE_RE.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = len(self._buffer)
+                if not self._fill():
+                    message = "Unexpected end of document"
+                    raise self._error(message)
+                continue
+            self._pos = match.start()
+            char = match.group()
+            if char == '"':
+                self._skip_string()
+                continue
+            depth += 1 if char in "{[" else -1
+            self._pos += 1
+
+    def iter_object(self) -> Iterator[str]:
+        """Iterate on the keys of an object, the value should be read or skipped by the caller."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self._expect(":")
+            yield key
+            if self._expect(",}") == "}":
+                return
+
+    def iter_array(self) -> Iterator[None]:
+        """Iterate on the elements of an array, the element should be read or skipped by the caller."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            if self._expect(",]") == "]":
+                return
+
+
+def _read_dependencies_stream(
+    context: module.ProcessContext[configuration.VersionsConfiguration, _EventData],
+    file: TextIO,
+    result: dict[str, _TransversalStatusNameInDatasource],
+) -> None:
+    """
+    Parse the dependency data from a renovate-graph output file.
+
+    Only the dependencies (`packageData.<manager>[].deps[]`) are decoded, one by one,
+    the rest of the document is skipped.
+
+    Arguments:
+    ---------
+        context: The process context
+        file: The renovate-graph output file
+        result: Output dictionary to store processed dependency information
+    """
+    reader = _JsonStreamReader(file)
+    for key in reader.iter_object():
+        if key != "packageData":
+            reader.skip_value()
+            continue
+        for _manager in reader.iter_object():
+            for _ in reader.iter_array():
+                for package_file_key in reader.iter_object():
+                    if package_file_key != "deps":
+                        reader.skip_value()
+                        continue
+                    for _ in reader.iter_array():
+                        _add_dependency(context, reader.read_value(), result)
+
+
 def _read_dependencies(
     context: module.ProcessContext[configuration.VersionsConfiguration, _EventData],
     data: dict[str, Any],
@@ -1249,30 +1629,35 @@ def _read_dependencies(
     for values in data.get("config", {}).values():
         for value in values:
             for dep in value.get("deps", []):
-                if "currentValue" not in dep:
-                    continue
-                if "datasource" not in dep:
-                    continue
-                for dependency, datasource, version in _dependency_extractor(
-                    context,
-                    dep["depName"],
-                    dep["datasource"],
-                    dep["currentValue"],
-                ):
-                    versions_by_names = result.setdefault(
-                        datasource,
-                        _TransversalStatusNameInDatasource(),
-                    ).versions_by_names
-                    versions = versions_by_names.setdefault(
-                        dependency,
-                        _TransversalStatusVersions(),
-                    ).versions
-                    if version not in versions:
-                        versions.append(version)
-
-    for datasource_value in result.values():
-        for dep, dep_value in datasource_value.versions_by_names.items():
-            datasource_value.versions_by_names[dep] = dep_value
+                _add_dependency(context, dep, result)
+
+
+def _add_dependency(
+    context: module.ProcessContext[configuration.VersionsConfiguration, _EventData],
+    dep: dict[str, Any],
+    result: dict[str, _TransversalStatusNameInDatasource],
+) -> None:
+    """Add a renovate-graph dependency to the result."""
+    if "currentValue" not in dep:
+        return
+    if "datasource" not in dep:
+        return
+    for dependency, datasource, version in _dependency_extractor(
+        context,
+        dep["depName"],
+        dep["datasource"],
+        dep["currentValue"],
+    ):
+        versions_by_names = result.setdefault(
+            datasource,
+            _TransversalStatusNameInDatasource(),
+        ).versions_by_names
+        versions = versions_by_names.setdefault(
+            dependency,
+            _TransversalStatusVersions(),
+        ).versions
+        if version not in versions:
+            versions.append(version)
 
 
 def _dependency_extractor(
@@ -1337,7 +1722,11 @@ async def _update_upstream_versions(
         context: The process context containing external packages configuration
         intermediate_status: The intermediate status to update with external package information
     """
-    for external_config in context.module_config.get("external-packages", []):
+    external_packages = context.module_config.get("external-packages", [])
+    all_cycles = await endoflife.ENDOFLIFE_CLIENT.get_all_cycles(
+        [external_config["package"] for external_config in external_packages],
+    )
+    for external_config in external_packages:
         package = external_config["package"]
         name = f"endoflife.date/{package}"
         datasource = external_config["datasource"]
@@ -1348,24 +1737,11 @@ async def _update_upstream_versions(
         intermediate_status.external_repositories[name] = package_status
         package_status.url = f"https://endoflife.date/{package}"
 
-        if package_status.upstream_updated and (
-            package_status.upstream_updated
-            > datetime.datetime.now(datetime.UTC) - settings.versions.external_packages_update_period
-        ):
-            return
+        cycles = all_cycles[package]
+        if cycles is None:
+            continue
         package_status.upstream_updated = datetime.datetime.now(datetime.UTC)
-
-        async with (
-            aiohttp.ClientSession() as session,
-            asyncio.timeout(120),
-            session.get(f"https://endoflife.date/api/{package}.json") as response,
-        ):
-            if not response.ok:
-                _LOGGER.error("Failed to get the data for %s", package)
-                package_status.upstream_updated = None
-                return
-            cycles = await response.json()
-        message = module_utils.HtmlMessage(utils.format_json(cycles))
+        message = module_utils.HtmlMessage(utils.format_json_str(json.dumps(cycles, indent=4)))
         message.title = f"Cycles {package}:"
         _LOGGER.debug(message)
         for cycle in cycles:
@@ -1598,6 +1974,70 @@ def _build_internal_dependencies(
                 )
 
 
+def _get_dependents(
+    transversal_status: _TransversalStatus,
+    datasource: str,
+    package: str,
+    version: str | None,
+) -> list[dict[str, Any]]:
+    """
+    Get the branches of the repositories that depend on a package, from the precomputed indexes.
+
+    Arguments:
+    ---------
+        transversal_status: The global status data, with up to date indexes
+        datasource: The datasource of the package
+        package: The package name
+        version: The version of the package, None for all the versions
+
+    Returns
+    -------
+        The dependent repositories, with the matching branches and the version of the dependency
+    """
+    datasource_dependents = transversal_status.dependents.get(datasource, {})
+    if datasource == "docker":
+        # The docker dependencies are indexed by name:tag
+        if version is None:
+            indexed_names = [name for name in datasource_dependents if name.startswith(f"{package}:")]
+        else:
+            indexed_names = [f"{package}:{version}"]
+        wanted_version = None
+    else:
+        indexed_names = [package]
+        wanted_version = None if version is None else _canonical_minor_version(datasource, version)
+
+    branches_by_repo: dict[str, dict[str, list[str]]] = {}
+    for indexed_name in indexed_names:
+        for repository in datasource_dependents.get(indexed_name, []):
+            repo_data = transversal_status.repositories.get(repository)
+            if repo_data is None:
+                continue
+            datasource_index = repo_data.dependencies_index.by_datasource.get(datasource)
+            if datasource_index is None or indexed_name not in datasource_index.by_dependency:
+                continue
+            for dependency_version, branches in datasource_index.by_dependency[
+                indexed_name
+            ].branches_by_version.items():
+                if wanted_version is not None and dependency_version != wanted_version:
+                    continue
+                repo_branches = branches_by_repo.setdefault(repository, {})
+                for branch in branches.branches:
+                    repo_branches.setdefault(branch, [])
+                    if dependency_version not in repo_branches[branch]:
+                        repo_branches[branch].append(dependency_version)
+
+    return [
+        {
+            "repository": repository,
+            "branches": [
+                {"branch": branch, "versions": sorted(repo_branches[branch])}
+                for branch in _order_versions(repo_branches)
+            ],
+        }
+        for repository, repo_branches in sorted(branches_by_repo.items())
+    ]
+
+
 def _build_reverse_dependency(
     repository: str,
     repo_data: _TransversalStatusRepo,
@@ -1627,9 +2067,18 @@ def _build_reverse_dependency(
         ) in version_name_data.names_by_datasource.items():
             for package_name in datasource_name_data.names:
                 all_datasource_names.setdefault(datasource_name, {})[package_name] = branch
-    for other_repo, other_repo_data in transversal_status.repositories.items():
-        if repository == other_repo:
+    if transversal_status.index_version != _INDEX_VERSION:
+        _rebuild_global_indexes(transversal_status)
+    dependent_repositories = {
+        dependent
+        for datasource_name, package_names in all_datasource_names.items()
+        for package_name in package_names
+        for dependent in transversal_status.dependents.get(datasource_name, {}).get(package_name, [])
+    }
+    for other_repo in transversal_status.repositories:
+        if repository == other_repo or other_repo not in dependent_repositories:
             continue
+        other_repo_data = transversal_status.repositories[other_repo]
 
         for datasource_name, datasource_data in other_repo_data.dependencies_index.by_datasource.items():
             if datasource_name not in all_datasource_names:
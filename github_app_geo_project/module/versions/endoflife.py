@@ -0,0 +1,134 @@
+# Copyright (c) 2026, Camptocamp SA
+
+"""Client for the endoflife.date API, used to get the upstream support of the external packages."""
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+import urllib.parse
+from typing import Any
+
+import aiohttp
+import anyio
+
+from github_app_geo_project.settings import settings
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EndOfLifeClient:
+    """
+    Client for the endoflife.date API.
+
+    Uses one pooled HTTP session, limits the number of concurrent requests, and caches the responses
+    on disk, revalidated after the external packages update period with the `ETag` and `Last-Modified` headers.
+    """
+
+    def __init__(self, cache_dir: anyio.Path | None = None) -> None:
+        """Initialize the client.
+
+        Arguments:
+        ---------
+        cache_dir: The directory where the responses will be cached.
+            Defaults to ~/.cache/ghci/endoflife/
+        """
+        self._cache_dir: anyio.Path | None = cache_dir
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def _get_cache_dir(self) -> anyio.Path:
+        """Get the cache directory, initializing it lazily if needed."""
+        if self._cache_dir is None:
+            self._cache_dir = await anyio.Path.home() / ".cache" / "ghci" / "endoflife"
+        await self._cache_dir.mkdir(parents=True, exist_ok=True)
+        return self._cache_dir
+
+    def _get_session(self) -> tuple[aiohttp.ClientSession, asyncio.Semaphore]:
+        """Get the HTTP session of the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.versions.endoflife_timeout.total_seconds()),
+            )
+            self._session_loop = loop
+            self._semaphore = asyncio.Semaphore(settings.versions.endoflife_concurrency)
+        assert self._semaphore is not None
+        return self._session, self._semaphore
+
+    async def close(self) -> None:
+        """Close the HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_cycles(self, package: str) -> list[dict[str, Any]] | None:
+        """
+        Get the release cycles of a package.
+
+        Returns the cached cycles when the API isn't available, None if there is no cached cycles.
+        """
+        cache_file = await self._get_cache_dir() / f"{urllib.parse.quote(package, safe='')}.json"
+        cached: dict[str, Any] | None = None
+        if await cache_file.exists():
+            try:
+                cached = json.loads(await cache_file.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                _LOGGER.warning("Invalid endoflife.date cache file for %s, ignoring it", package)
+
+        now = datetime.datetime.now(datetime.UTC)
+        if (
+            cached is not None
+            and cached.get("checked_at")
+            and now - datetime.datetime.fromisoformat(cached["checked_at"])
+            < settings.versions.external_packages_update_period
+        ):
+            return cached["cycles"]
+
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        url = f"{settings.versions.endoflife_url.rstrip('/')}/api/{package}.json"
+        session, semaphore = self._get_session()
+        try:
+            async with semaphore, session.get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    _LOGGER.debug("The endoflife.date data of %s didn't change", package)
+                    await self._write(cache_file, {**cached, "checked_at": now.isoformat()})
+                    return cached["cycles"]
+                if not response.ok:
+                    _LOGGER.error("Failed to get the data for %s: %s", package, response.status)
+                    return cached["cycles"] if cached is not None else None
+                cycles = await response.json()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, TimeoutError, ValueError):
+            # ValueError: invalid JSON body
+            _LOGGER.exception("Failed to get the data for %s", package)
+            return cached["cycles"] if cached is not None else None
+
+        await self._write(
+            cache_file,
+            {"etag": etag, "last_modified": last_modified, "checked_at": now.isoformat(), "cycles": cycles},
+        )
+        return cycles
+
+    async def _write(self, cache_file: anyio.Path, data: dict[str, Any]) -> None:
+        """Write the cache file atomically, it can be read by other processes."""
+        temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        await temp_file.write_text(json.dumps(data), encoding="utf-8")
+        await temp_file.rename(cache_file)
+
+    async def get_all_cycles(self, packages: list[str]) -> dict[str, list[dict[str, Any]] | None]:
+        """Get the release cycles of the packages, concurrently."""
+        results = await asyncio.gather(*(self.get_cycles(package) for package in packages))
+        return dict(zip(packages, results, strict=True))
+
+
+ENDOFLIFE_CLIENT = EndOfLifeClient()
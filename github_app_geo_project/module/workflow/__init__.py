@@ -8,9 +8,9 @@ import logging
 from typing import Any
 
 import githubkit.exception
-import githubkit.webhooks
 import githubkit_schemas.latest.models
 import security_md
+from pydantic import BaseModel
 
 from github_app_geo_project import module, utils
 from github_app_geo_project.module import utils as module_utils
@@ -18,7 +18,15 @@ from github_app_geo_project.module import utils as module_utils
 _LOGGER = logging.getLogger(__name__)
 
 
-class Workflow(module.Module[None, dict[str, Any], dict[str, Any], None]):
+class _IntermediateStatus(BaseModel):
+    """The remote data needed to update the transversal status."""
+
+    stabilization_branches: list[str]
+    jobs: list[dict[str, str]] = []
+    """The not successful jobs of the workflow run"""
+
+
+class Workflow(module.Module[None, dict[str, Any], dict[str, Any], _IntermediateStatus]):
     """Module to display the status of the workflows in the transversal dashboard."""
 
     def title(self) -> str:
@@ -56,10 +64,7 @@ class Workflow(module.Module[None, dict[str, Any], dict[str, Any], None]):
     ) -> list[module.Action[dict[str, Any]]]:
         """Get the action related to the module and the event."""
         if context.module_event_name == "workflow_run":
-            event_data = githubkit.webhooks.parse_obj(
-                "workflow_run",
-                context.github_event_data,
-            )
+            event_data = context.github_event.parse("workflow_run")
             if event_data.action == "completed" and event_data.workflow_run.event != "pull_request":
                 return [module.Action({}, priority=module.PRIORITY_STANDARD)]
         return []
@@ -67,19 +72,67 @@ class Workflow(module.Module[None, dict[str, Any], dict[str, Any], None]):
     async def process(
         self,
         context: module.ProcessContext[None, dict[str, Any]],
-    ) -> module.ProcessOutput[dict[str, Any], None]:
-        """Process the action."""
-        del context  # Unused
-        return module.ProcessOutput(updated_transversal_status=True)
+    ) -> module.ProcessOutput[dict[str, Any], _IntermediateStatus]:
+        """Get the stabilization branches and the failed jobs, used to update the transversal status."""
+        stabilization_branches = [await context.github_project.default_branch()]
+        security_file = None
+        try:
+            security_file = (
+                await context.github_project.aio_github.rest.repos.async_get_content(
+                    owner=context.github_project.owner,
+                    repo=context.github_project.repository,
+                    path="SECURITY.md",
+                )
+            ).parsed_data
+        except githubkit.exception.RequestFailed as exception:
+            if exception.response.status_code != 404:
+                raise
+        if (
+            isinstance(security_file, githubkit_schemas.latest.models.ContentFile)
+            and security_file.content is not None
+        ):
+            security = security_md.Security(
+                base64.b64decode(security_file.content).decode("utf-8"),
+            )
+
+            stabilization_branches += security.branches()
+
+        else:
+            _LOGGER.debug(
+                "No SECURITY.md file in the repository, apply on default branch",
+            )
+
+        intermediate_status = _IntermediateStatus(stabilization_branches=stabilization_branches)
+
+        assert context.module_event_name == "workflow_run"
+        event_data = context.github_event.parse("workflow_run")
+        if (
+            event_data.workflow_run.head_branch in stabilization_branches
+            and event_data.workflow_run.conclusion != "success"
+        ):
+            # Get workflow jobs
+            workflow_jobs = context.github_project.aio_github.rest.paginate(
+                context.github_project.aio_github.rest.actions.async_list_jobs_for_workflow_run,
+                owner=context.github_project.owner,
+                repo=context.github_project.repository,
+                run_id=event_data.workflow_run.id,
+                map_func=lambda response: response.parsed_data.jobs,
+            )
+            intermediate_status.jobs = [
+                {"name": job.name, "run_url": job.html_url}
+                async for job in workflow_jobs
+                if job.conclusion != "success"
+            ]
+
+        return module.ProcessOutput(intermediate_status=intermediate_status, updated_transversal_status=True)
 
     async def update_transversal_status(
         self,
         context: module.ProcessContext[None, dict[str, Any]],
-        intermediate_status: None,
+        intermediate_status: _IntermediateStatus,
         transversal_status: dict[str, Any],
     ) -> dict[str, Any] | None:
         """Update the transversal status."""
-        del intermediate_status
         full_repo = f"{context.github_project.owner}/{context.github_project.repository}"
 
         module_utils.manage_updated(transversal_status, full_repo, days_old=30)
@@ -122,43 +175,13 @@ class Workflow(module.Module[None, dict[str, Any], dict[str, Any], None]):
 
         repo_data = transversal_status[full_repo]
 
-        stabilization_branches = [await context.github_project.default_branch()]
-        security_file = None
-        try:
-            security_file = (
-                await context.github_project.aio_github.rest.repos.async_get_content(
-                    owner=context.github_project.owner,
-                    repo=context.github_project.repository,
-                    path="SECURITY.md",
-                )
-            ).parsed_data
-        except githubkit.exception.RequestFailed as exception:
-            if exception.response.status_code != 404:
-                raise
-        if (
-            isinstance(security_file, githubkit_schemas.latest.models.ContentFile)
-            and security_file.content is not None
-        ):
-            security = security_md.Security(
-                base64.b64decode(security_file.content).decode("utf-8"),
-            )
-
-            stabilization_branches += security.branches()
-
-        else:
-            _LOGGER.debug(
-                "No SECURITY.md file in the repository, apply on default branch",
-            )
-
+        stabilization_branches = intermediate_status.stabilization_branches
         for key in list(repo_data.keys()):
             if key not in stabilization_branches and key != "updated":
                 del repo_data[key]
 
         assert context.module_event_name == "workflow_run"
-        event_data = githubkit.webhooks.parse_obj(
-            "workflow_run",
-            context.github_event_data,
-        )
+        event_data = context.github_event.parse("workflow_run")
         head_branch = event_data.workflow_run.head_branch
         if head_branch not in stabilization_branches:
             _LOGGER.info(
@@ -183,33 +206,16 @@ class Workflow(module.Module[None, dict[str, Any], dict[str, Any], None]):
             )
             return transversal_status
 
-        workflow_data_jobs: list[Any] = []
-        workflow_data = {
+        branch_data[workflow_name] = {
             "url": event_data.workflow_run.html_url,
             "date": event_data.workflow_run.created_at.isoformat(),
-            "jobs": workflow_data_jobs,
+            "jobs": list(intermediate_status.jobs),
         }
-        branch_data[workflow_name] = workflow_data
         _LOGGER.info(
             "Workflow '%s' is not successful, adding it to the status",
             workflow_name,
         )
 
-        # Get workflow jobs
-        workflow_jobs = context.github_project.aio_github.rest.paginate(
-            context.github_project.aio_github.rest.actions.async_list_jobs_for_workflow_run,
-            owner=context.github_project.owner,
-            repo=context.github_project.repository,
-            run_id=event_data.workflow_run.id,
-            map_func=lambda response: response.parsed_data.jobs,
-        )
-        jobs_to_add = [
-            {"name": job.name, "run_url": job.html_url}
-            async for job in workflow_jobs
-            if job.conclusion != "success"
-        ]
-        workflow_data_jobs.extend(jobs_to_add)
-
         if repo_data.keys() == ["updated"]:
             del transversal_status[full_repo]
         message = module_utils.HtmlMessage(utils.format_json(transversal_status))
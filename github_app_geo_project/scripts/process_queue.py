@@ -32,9 +32,10 @@ import githubkit.webhooks
 import githubkit_schemas.latest.models
 import prometheus_client.exposition
 import sentry_sdk
+import sqlalchemy.dialects.postgresql
 import sqlalchemy.ext.asyncio
 import sqlalchemy.orm
-from prometheus_client import Gauge
+from prometheus_client import Counter, Gauge
 
 from github_app_geo_project import (
     configuration,
@@ -54,7 +55,16 @@ _LOGGER = logging.getLogger(__name__)
 _LOGGER_WSGI = logging.getLogger("prometheus_client.wsgi")
 
 _NB_JOBS = Gauge("ghci_jobs_number", "Number of jobs", ["status"])
-_MODULE_STATUS_LOCK: dict[str, asyncio.Lock] = {}
+_MODULE_STATUS_CONFLICTS = Counter(
+    "ghci_module_status_conflicts",
+    "Number of concurrent updates of the module transversal status",
+    ["module"],
+)
+_MODULE_STATUS_HTTP = Counter(
+    "ghci_module_status_update_github_api",
+    "Number of GitHub API uses by the modules during the transversal status update",
+    ["module"],
+)
 
 
 class _JobInfo(NamedTuple):
@@ -66,6 +76,11 @@ class _JobInfo(NamedTuple):
 
 
 _RUNNING_JOBS: dict[int, _JobInfo] = {}
+# The job shouldn't be run before its run after time (used to spread the cron jobs)
+_JOB_READY = sqlalchemy.or_(
+    models.Queue.run_after.is_(None),
+    models.Queue.run_after <= sqlalchemy.func.now(),
+)
 
 _LAST_RUN_TIME = time.time()
 
@@ -120,6 +135,28 @@ class _Formatter(logging.Formatter):
         return f"<pre>{str_msg}</pre>"
 
 
+async def _enqueue_check_run_failure(
+    session_factory: sqlalchemy.ext.asyncio.async_sessionmaker[sqlalchemy.ext.asyncio.AsyncSession],
+    github_project: configuration.GithubProject,
+    check_run_id: int,
+    title: str,
+    summary: str,
+) -> None:
+    """Store the check run failure in its own transaction, the job session can need a rollback."""
+    async with session_factory() as failure_session:
+        await module_utils.enqueue_check_run_update(
+            failure_session,
+            github_project,
+            check_run_id,
+            {
+                "status": "completed",
+                "conclusion": "failure",
+                "output": {"title": title, "summary": summary},
+            },
+        )
+        await failure_session.commit()
+
+
 async def _flush_job_logs(
     session_factory: sqlalchemy.ext.asyncio.async_sessionmaker[sqlalchemy.ext.asyncio.AsyncSession],
     handler: _Handler,
@@ -200,7 +237,7 @@ async def _process_job(
     module_config: project_configuration.ModuleConfiguration = {}
     github_project: configuration.GithubProject | None = None
     check_run: githubkit_schemas.latest.models.CheckRun | None = None
-    tasks: list[asyncio.Task[Any]] = []
+    github_event = module.GitHubEvent(job.github_event_name, job.github_event_data)
     if not settings.test.app_name:
         _LOGGER.debug("Get GitHub application %s for job id %s", job.application, job.id)
         github_application = await configuration.get_github_application(
@@ -295,6 +332,7 @@ async def _process_job(
                         current_module,
                         github_project,
                         settings.service_url,
+                        github_event,
                     )
 
                 if (
@@ -303,13 +341,15 @@ async def _process_job(
                     and check_run is not None
                 ):
                     _LOGGER.debug("Update check run %s to in_progress for job id %s", check_run.id, job.id)
-                    await github_project.aio_github.rest.checks.async_update(
-                        owner=job.owner,
-                        repo=job.repository,
-                        check_run_id=check_run.id,
-                        external_id=str(job.id),
-                        status="in_progress",
-                        details_url=logs_url,
+                    await module_utils.enqueue_check_run_update(
+                        session,
+                        github_project,
+                        check_run.id,
+                        {
+                            "external_id": str(job.id),
+                            "status": "in_progress",
+                            "details_url": logs_url,
+                        },
                     )
 
             # Close transaction if one is open
@@ -330,6 +370,7 @@ async def _process_job(
                 issue_data=issue_data,
                 job_id=job.id,
                 service_url=settings.service_url,
+                github_event=github_event,
             )
             result = None
             try:
@@ -351,63 +392,17 @@ async def _process_job(
                     if result.updated_transversal_status:
                         root_logger.removeHandler(handler)
                         await session.refresh(job)
-                        if job.module not in _MODULE_STATUS_LOCK:
-                            _MODULE_STATUS_LOCK[job.module] = asyncio.Lock()
-                        async with _MODULE_STATUS_LOCK[job.module]:
-                            module_status = (
-                                (
-                                    await session.execute(
-                                        sqlalchemy.select(models.ModuleStatus)
-                                        .where(models.ModuleStatus.module == job.module)
-                                        .with_for_update(),
-                                    )
-                                )
-                                .scalars()
-                                .one_or_none()
-                            )
-                            root_logger.addHandler(handler)
-                            transversal_status = current_module.transversal_status_from_json(
-                                (module_status.data if module_status is not None else None),
-                            )
-                            transversal_status = await current_module.update_transversal_status(
-                                context,
-                                result.intermediate_status,
-                                transversal_status,
-                            )
-                            if transversal_status is not None:
-                                root_logger.removeHandler(handler)
-                                root_logger.setLevel(old_level)
-                                _LOGGER.debug(
-                                    "Update module status %s `%s` (job id: %i, type: %s, %s)\n%s",
-                                    job.module,
-                                    current_module.title(),
-                                    job.id,
-                                    type(transversal_status),
-                                    transversal_status,
-                                    current_module.transversal_status_to_json(
-                                        transversal_status,
-                                    ),
-                                )
-                                if module_status is None:
-                                    module_status = models.ModuleStatus(
-                                        module=job.module,
-                                        data=current_module.transversal_status_to_json(
-                                            transversal_status,
-                                        ),
-                                    )
-                                    session.add(module_status)
-                                else:
-                                    await session.execute(
-                                        sqlalchemy.update(models.ModuleStatus)
-                                        .where(models.ModuleStatus.module == job.module)
-                                        .values(
-                                            data=current_module.transversal_status_to_json(
-                                                transversal_status,
-                                            ),
-                                        ),
-                                    )
-                                del module_status
-                                root_logger.addHandler(handler)
+                        transversal_status = await _update_transversal_status(
+                            session,
+                            current_module,
+                            context,
+                            job,
+                            result.intermediate_status,
+                            (root_logger, handler, old_level),
+                        )
+                        # Release the locks of the status entries, the shared ones are updated by all the jobs
+                        await session.commit()
+                        root_logger.addHandler(handler)
 
                 root_logger.removeHandler(handler)
                 await session.refresh(job)
@@ -505,51 +500,24 @@ async def _process_job(
                     check_output["summary"] = check_output["summary"][:65532] + "..."
                 if len(check_output.get("text", "")) > 65535:
                     check_output["text"] = check_output["text"][:65532] + "..."
-                try:
-                    _LOGGER.debug("Update check run %s", job.check_run_id)
-                    tasks.append(
-                        asyncio.create_task(
-                            github_project.aio_github.rest.checks.async_update(
-                                owner=job.owner,
-                                repo=job.repository,
-                                check_run_id=check_run.id,
-                                status="completed",
-                                conclusion=("success" if result is None or result.success else "failure"),
-                                output={
-                                    "title": check_output.get(
-                                        "title",
-                                        current_module.title(),
-                                    ),
-                                    "summary": check_output["summary"],
-                                    "text": check_output.get("text", ""),
-                                },
+                _LOGGER.debug("Update check run %s", job.check_run_id)
+                await module_utils.enqueue_check_run_update(
+                    session,
+                    github_project,
+                    check_run.id,
+                    {
+                        "status": "completed",
+                        "conclusion": ("success" if result is None or result.success else "failure"),
+                        "output": {
+                            "title": check_output.get(
+                                "title",
+                                current_module.title(),
                             ),
-                            name=f"Update check run {job.check_run_id}",
-                        ),
-                    )
-                except githubkit.exception.RequestFailed as exception:
-                    _LOGGER.exception(
-                        "Failed to update check run %s, return data:\n%s\nreturn headers:\n%s\nreturn message:\n%s\nreturn status: %s",
-                        job.check_run_id,
-                        exception.response.text,
-                        (
-                            "\n".join(f"{k}: {v}" for k, v in exception.response.headers.items())
-                            if exception.response.headers
-                            else ""
-                        ),
-                        exception.response.reason_phrase,
-                        exception.response.status_code,
-                    )
-                except TimeoutError:
-                    _LOGGER.exception(
-                        "Timeout while updating check run %s",
-                        job.check_run_id,
-                    )
-                except Exception:  # pylint: disable=broad-exception-caught
-                    _LOGGER.exception(
-                        "Failed to update check run %s",
-                        job.check_run_id,
-                    )
+                            "summary": check_output["summary"],
+                            "text": check_output.get("text", ""),
+                        },
+                    },
+                )
 
             job.status_enum = (
                 models.JobStatus.DONE if result is None or result.success else models.JobStatus.REPORT_ERROR
@@ -569,122 +537,68 @@ async def _process_job(
                 job_module = job.module
                 job_module_event_name = job.module_event_name
 
-                for action in result.actions:
-                    new_job = models.Queue()
-                    new_job.priority = action.priority if action.priority >= 0 else job_priority
-                    new_job.application = job_application
-                    new_job.owner = job_owner
-                    new_job.repository = job_repository
-                    new_job.github_event_name = job_github_event_name
-                    new_job.github_event_data = job_github_event_data
-                    new_job.module = job_module
-                    new_job.module_event_name = action.title or job_module_event_name
-                    new_job.module_event_data = current_module.event_data_to_json(
-                        action.data,
-                    )
-                    session.add(new_job)
-                    await module_utils.create_checks(
-                        new_job,
-                        session,
-                        current_module,
-                        github_project,
-                        settings.service_url,
-                    )
+                new_jobs_ids = await module_utils.insert_jobs(
+                    session,
+                    [
+                        {
+                            "priority": action.priority if action.priority >= 0 else job_priority,
+                            "application": job_application,
+                            "owner": job_owner,
+                            "repository": job_repository,
+                            "github_event_name": job_github_event_name,
+                            "github_event_data": job_github_event_data,
+                            "module": job_module,
+                            "module_event_name": action.title or job_module_event_name,
+                            "module_event_data": current_module.event_data_to_json(action.data),
+                        }
+                        for action in result.actions
+                    ],
+                )
+                await module_utils.create_jobs_checks(
+                    session,
+                    [(new_job_id, current_module) for new_job_id in new_jobs_ids],
+                    github_project,
+                    github_event,
+                    settings.service_url,
+                )
 
             new_issue_data = result.dashboard if result is not None else None
             _LOGGER.debug("Job queue updated")
         except githubkit.exception.RequestFailed as exception:
             job.status_enum = models.JobStatus.FAIL
             job.finished_at = datetime.datetime.now(tz=datetime.UTC)
-            if check_run is not None:
-                try:
-                    if github_project is not None and github_project.aio_github is not None:
-                        await github_project.aio_github.rest.checks.async_update(
-                            owner=job.owner,
-                            repo=job.repository,
-                            check_run_id=check_run.id,
-                            status="completed",
-                            conclusion="failure",
-                            output={
-                                "summary": f"Unexpected error: {exception}\n[See logs for more details]({logs_url})",
-                            },
-                        )
-                except githubkit.exception.RequestFailed as github_exception:
-                    root_logger.addHandler(handler)
-                    try:
-                        _LOGGER.exception(
-                            "Failed to update check run %s, return data:\n%s\nreturn headers:\n%s\nreturn message:\n%s\nreturn status: %s",
-                            job.check_run_id,
-                            github_exception.response.text,
-                            (
-                                "\n".join(f"{k}: {v}" for k, v in github_exception.response.headers.items())
-                                if github_exception.response.headers
-                                else ""
-                            ),
-                            github_exception.response.reason_phrase,
-                            github_exception.response.status_code,
-                        )
-                    finally:
-                        root_logger.removeHandler(handler)
-                raise
+            if check_run is not None and github_project is not None and github_project.aio_github is not None:
+                await _enqueue_check_run_failure(
+                    log_session_factory,
+                    github_project,
+                    check_run.id,
+                    current_module.title(),
+                    f"Unexpected error: {exception}\n[See logs for more details]({logs_url})",
+                )
+            raise
         except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as proc_error:
             job.status_enum = models.JobStatus.FAIL
             job.finished_at = datetime.datetime.now(tz=datetime.UTC)
-            if check_run is not None:
-                try:
-                    if github_project is not None and github_project.aio_github is not None:
-                        await github_project.aio_github.rest.checks.async_update(
-                            owner=job.owner,
-                            repo=job.repository,
-                            check_run_id=check_run.id,
-                            status="completed",
-                            conclusion="failure",
-                            output={
-                                "summary": f"Unexpected error: {proc_error}\n[See logs for more details]({logs_url})",
-                            },
-                        )
-                except githubkit.exception.RequestFailed as exception:
-                    _LOGGER.exception(
-                        "Failed to update check run %s, return data:\n%s\nreturn headers:\n%s\nreturn message:\n%s\nreturn status: %s",
-                        job.check_run_id,
-                        exception.response.text,
-                        (
-                            "\n".join(f"{k}: {v}" for k, v in exception.response.headers.items())
-                            if exception.response.headers
-                            else ""
-                        ),
-                        exception.response.reason_phrase,
-                        exception.response.status_code,
-                    )
+            if check_run is not None and github_project is not None and github_project.aio_github is not None:
+                await _enqueue_check_run_failure(
+                    log_session_factory,
+                    github_project,
+                    check_run.id,
+                    current_module.title(),
+                    f"Unexpected error: {proc_error}\n[See logs for more details]({logs_url})",
+                )
             raise
         except Exception as exception:
             job.status_enum = models.JobStatus.FAIL
             job.finished_at = datetime.datetime.now(tz=datetime.UTC)
             if check_run is not None and github_project is not None and github_project.aio_github is not None:
-                try:
-                    await github_project.aio_github.rest.checks.async_update(
-                        owner=job.owner,
-                        repo=job.repository,
-                        check_run_id=check_run.id,
-                        status="completed",
-                        conclusion="failure",
-                        output={
-                            "summary": f"Unexpected error: {exception}\n[See logs for more details]({logs_url}))",
-                        },
-                    )
-                except githubkit.exception.RequestFailed as github_exception:
-                    _LOGGER.exception(
-                        "Failed to update check run %s, return data:\n%s\nreturn headers:\n%s\nreturn message:\n%s\nreturn status: %s",
-                        job.check_run_id,
-                        github_exception.response.text,
-                        (
-                            "\n".join(f"{k}: {v}" for k, v in github_exception.response.headers.items())
-                            if github_exception.response.headers
-                            else ""
-                        ),
-                        github_exception.response.reason_phrase,
-                        github_exception.response.status_code,
-                    )
+                await _enqueue_check_run_failure(
+                    log_session_factory,
+                    github_project,
+                    check_run.id,
+                    current_module.title(),
+                    f"Unexpected error: {exception}\n[See logs for more details]({logs_url})",
+                )
             raise
         finally:
             root_logger.setLevel(old_level)
@@ -699,12 +613,14 @@ async def _process_job(
             _LOGGER.info("Module %s is disabled", job.module)
             job.status_enum = models.JobStatus.SKIPPED
             if check_run is not None and github_project is not None and github_project.aio_github is not None:
-                await github_project.aio_github.rest.checks.async_update(
-                    owner=job.owner,
-                    repo=job.repository,
-                    check_run_id=check_run.id,
-                    status="completed",
-                    conclusion="skipped",
+                await module_utils.enqueue_check_run_update(
+                    session,
+                    github_project,
+                    check_run.id,
+                    {
+                        "status": "completed",
+                        "conclusion": "skipped",
+                    },
                 )
 
             current_module.cleanup(
@@ -787,12 +703,180 @@ async def _process_job(
                     body=issue_full_data,
                 )
 
-    if tasks:
-        await asyncio.wait_for(asyncio.gather(*tasks), timeout=60)
-
     return True
 
 
+class _StatusUpdateGitHub:
+    """
+    Proxy of the GitHub client given to the module during the transversal status update.
+
+    The status update is applied again on conflict, so the remote data should be gathered
+    in the process method, this proxy flags the modules that use the GitHub API during the update.
+    """
+
+    def __init__(self, aio_github: Any, module_name: str) -> None:
+        self._aio_github = aio_github
+        self._module_name = module_name
+
+    def __getattr__(self, name: str) -> Any:
+        _MODULE_STATUS_HTTP.labels(self._module_name).inc()
+        _LOGGER.warning(
+            "The module %s uses the GitHub API (%s) during the transversal status update, "
+            "the remote data should be gathered in the process method",
+            self._module_name,
+            name,
+        )
+        return getattr(self._aio_github, name)
+
+
+async def _update_transversal_status(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    current_module: module.Module[Any, Any, Any, Any],
+    context: module.ProcessContext[Any, Any],
+    job: models.Queue,
+    intermediate_status: Any,
+    logging_state: tuple[logging.Logger, logging.Handler, int],
+) -> Any:
+    """Apply the intermediate status on the module transversal status, re-apply it on conflict."""
+    root_logger, handler, _ = logging_state
+    if context.github_project.aio_github is not None:
+        context = context._replace(
+            github_project=context.github_project._replace(
+                aio_github=cast(
+                    "githubkit.GitHub[githubkit.AppInstallationAuthStrategy]",
+                    _StatusUpdateGitHub(context.github_project.aio_github, job.module),
+                ),
+            ),
+        )
+    max_attempts = settings.process_queue.module_status_max_attempts
+    for attempt in range(1, max_attempts + 1):
+        transversal_status, stored = await _try_update_transversal_status(
+            session,
+            current_module,
+            context,
+            job,
+            intermediate_status,
+            logging_state,
+        )
+        if stored:
+            return transversal_status
+        _MODULE_STATUS_CONFLICTS.labels(job.module).inc()
+        root_logger.addHandler(handler)
+        _LOGGER.info(
+            "The status of the module %s was updated by another job, re-apply it (attempt %i/%i)",
+            job.module,
+            attempt,
+            max_attempts,
+        )
+        root_logger.removeHandler(handler)
+    message = f"Unable to update the status of the module {job.module} after {max_attempts} attempts"
+    raise GHCIError(message)
+
+
+async def _try_update_transversal_status(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    current_module: module.Module[Any, Any, Any, Any],
+    context: module.ProcessContext[Any, Any],
+    job: models.Queue,
+    intermediate_status: Any,
+    logging_state: tuple[logging.Logger, logging.Handler, int],
+) -> tuple[Any, bool]:
+    """
+    Apply the intermediate status on the module transversal status.
+
+    The status is written with a compare-and-swap on its version, return the updated status,
+    and `False` if it was changed by another job since it was read (nothing is stored).
+    """
+    root_logger, handler, old_level = logging_state
+    if current_module.has_transversal_status_entries():
+        await _migrate_module_status(session, current_module, job.module)
+        entries = module.TransversalStatusEntries(session, job.module)
+        root_logger.addHandler(handler)
+        await current_module.update_transversal_status_entries(context, intermediate_status, entries)
+        root_logger.removeHandler(handler)
+        changed = entries.changed or None
+        _LOGGER.debug(
+            "Update module status entries %s `%s` (job id: %i)\n%s",
+            job.module,
+            current_module.title(),
+            job.id,
+            changed,
+        )
+        return changed, await entries.flush()
+
+    module_status = (
+        await session.execute(
+            sqlalchemy.select(models.ModuleStatus.data, models.ModuleStatus.version).where(
+                models.ModuleStatus.module == job.module,
+            ),
+        )
+    ).one_or_none()
+    root_logger.addHandler(handler)
+    transversal_status = current_module.transversal_status_from_json(
+        module_status.data if module_status is not None else None,
+    )
+    transversal_status = await current_module.update_transversal_status(
+        context,
+        intermediate_status,
+        transversal_status,
+    )
+    root_logger.removeHandler(handler)
+    if transversal_status is None:
+        return None, True
+    root_logger.setLevel(old_level)
+    data = current_module.transversal_status_to_json(transversal_status)
+    _LOGGER.debug(
+        "Update module status %s `%s` (job id: %i, type: %s, %s)\n%s",
+        job.module,
+        current_module.title(),
+        job.id,
+        type(transversal_status),
+        transversal_status,
+        data,
+    )
+    if module_status is None:
+        result = await session.execute(
+            sqlalchemy.dialects.postgresql.insert(models.ModuleStatus)
+            .values(module=job.module, data=data)
+            .on_conflict_do_nothing(index_elements=[models.ModuleStatus.module]),
+        )
+    else:
+        result = await session.execute(
+            sqlalchemy.update(models.ModuleStatus)
+            .where(
+                models.ModuleStatus.module == job.module,
+                models.ModuleStatus.version == module_status.version,
+            )
+            .values(data=data, version=module_status.version + 1),
+        )
+    return transversal_status, bool(result.rowcount)  # type: ignore[attr-defined]
+
+
+async def _migrate_module_status(
+    session: sqlalchemy.ext.asyncio.AsyncSession,
+    current_module: module.Module[Any, Any, Any, Any],
+    module_name: str,
+) -> None:
+    """Split the transversal status stored in one document in entries, for the modules that use entries."""
+    module_status_data = (
+        await session.execute(
+            sqlalchemy.select(models.ModuleStatus.data).where(models.ModuleStatus.module == module_name),
+        )
+    ).scalar()
+    if module_status_data is None:
+        return
+    _LOGGER.info("Migrate the transversal status of the module %s to entries", module_name)
+    entries = module.TransversalStatusEntries(session, module_name)
+    for key, data in current_module.transversal_status_to_entries(
+        current_module.transversal_status_from_json(module_status_data),
+    ).items():
+        entries.set(key, data)
+    await entries.flush()
+    await session.execute(
+        sqlalchemy.delete(models.ModuleStatus).where(models.ModuleStatus.module == module_name)
+    )
+
+
 async def _get_dashboard_issue(
     github_project: configuration.GithubProject,
 ) -> githubkit_schemas.latest.models.Issue | None:
@@ -863,18 +947,20 @@ async def _process_dashboard_issue(
                         current_module.title(),
                     )
                     if current_module.required_issue_dashboard():
+                        dashboard_event_data = {
+                            "type": "dashboard",
+                            "old_data": module_old,
+                            "new_data": module_new,
+                        }
                         for action in current_module.get_actions(
                             module.GetActionContext(
                                 github_event_name="dashboard",
-                                github_event_data={
-                                    "type": "dashboard",
-                                    "old_data": module_old,
-                                    "new_data": module_new,
-                                },
+                                github_event_data=dashboard_event_data,
                                 owner=github_project.owner,
                                 repository=github_project.repository,
                                 github_application=github_project.application,
                                 module_event_name="dashboard",
+                                github_event=module.GitHubEvent("dashboard", dashboard_event_data),
                             ),
                         ):
                             job = models.Queue()
@@ -885,11 +971,7 @@ async def _process_dashboard_issue(
                             job.owner = github_project.owner
                             job.repository = github_project.repository
                             job.github_event_name = "dashboard"
-                            job.github_event_data = {
-                                "type": "dashboard",
-                                "old_data": module_old,
-                                "new_data": module_new,
-                            }
+                            job.github_event_data = dashboard_event_data
                             job.module = name
                             job.module_event_name = action.title or "dashboard"
                             job.module_event_data = current_module.event_data_to_json(
@@ -933,6 +1015,7 @@ async def _get_process_one_job(
             sqlalchemy.select(sqlalchemy.func.min(models.Queue.priority)).where(
                 models.Queue.status == models.JobStatus.NEW.name,
                 models.Queue.priority <= max_priority,
+                _JOB_READY,
             ),
         )
         job = None
@@ -943,6 +1026,7 @@ async def _get_process_one_job(
                     .where(
                         models.Queue.status == models.JobStatus.NEW.name,
                         models.Queue.priority == min_priority,
+                        _JOB_READY,
                     )
                     .order_by(models.Queue.created_at.asc())
                     # Limit to one row to not lock all the jobs of the priority level
@@ -1184,6 +1268,29 @@ class _Run:
             await asyncio.sleep(empty_thread_sleep if empty else 0)
 
 
+class _CheckRunsFlush:
+    def __init__(
+        self,
+        Session: sqlalchemy.ext.asyncio.async_sessionmaker[  # pylint: disable=invalid-name,unsubscriptable-object
+            sqlalchemy.ext.asyncio.AsyncSession
+        ],
+    ) -> None:
+        self.Session = Session  # pylint: disable=invalid-name
+
+    async def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        del args, kwargs
+        flush_interval = settings.process_queue.check_runs_flush_interval.total_seconds()
+
+        while True:
+            nb_updates = 0
+            try:
+                nb_updates = await module_utils.flush_check_run_updates(self.Session)
+            except Exception:  # pylint: disable=broad-exception-caught
+                _LOGGER.exception("Failed to flush the check run updates")
+
+            await asyncio.sleep(0 if nb_updates else flush_interval)
+
+
 class _PrometheusWatch:
     def __init__(
         self,
@@ -1472,6 +1579,8 @@ async def _async_main() -> None:
                 no_steal_long_pending=args.exit_when_empty,
                 make_pending=args.make_pending,
             )
+            while await module_utils.flush_check_run_updates(AsyncSession):
+                pass
             sys.exit(0)
         if args.make_pending:
             await _get_process_one_job(
@@ -1498,6 +1607,7 @@ async def _async_main() -> None:
         tasks = []
         if not args.exit_when_empty:
             tasks.append(asyncio.create_task(_WatchDog()(), name="Watch Dog"))
+            tasks.append(asyncio.create_task(_CheckRunsFlush(AsyncSession)(), name="Check Runs Flush"))
             tasks.append(
                 asyncio.create_task(
                     _PrometheusWatch(AsyncSession, loop)(),
@@ -1515,6 +1625,9 @@ async def _async_main() -> None:
             ],
         )
         await asyncio.gather(*tasks)
+        if args.exit_when_empty:
+            while await module_utils.flush_check_run_updates(AsyncSession):
+                pass
 
 
 def main() -> None:
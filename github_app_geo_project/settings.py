@@ -135,6 +135,9 @@ class _AuditTimeouts(BaseModel):
         seconds=10
     )
     npm_audit: Annotated[Duration, Field(description="npm audit timeout")] = datetime.timedelta(minutes=5)
+    apt_index: Annotated[Duration, Field(description="APT indexes download timeout")] = datetime.timedelta(
+        minutes=10
+    )
 
 
 class _ProcessQueueSettings(BaseModel):
@@ -151,6 +154,24 @@ class _ProcessQueueSettings(BaseModel):
     )
     debug: Annotated[bool, Field(description="Debug mode")] = False
     max_workers: Annotated[int, Field(description="Max thread pool workers")] = 2
+    check_runs_concurrency: Annotated[
+        int, Field(description="Maximum number of check runs created or updated concurrently")
+    ] = 10
+    check_runs_flush_interval: Annotated[
+        Duration, Field(description="Interval between two flushes of the pending check run updates")
+    ] = datetime.timedelta(seconds=2)
+    check_runs_retry_delay: Annotated[
+        Duration, Field(description="Delay before the first retry of a failed check run update")
+    ] = datetime.timedelta(seconds=30)
+    check_runs_max_attempts: Annotated[
+        int, Field(description="Maximum number of attempts of a check run update")
+    ] = 10
+    module_status_max_attempts: Annotated[
+        int,
+        Field(
+            description="Maximum number of attempts to apply a job on a concurrently updated module status"
+        ),
+    ] = 10
     slow_callback_duration: Annotated[Duration, Field(description="Slow callback duration")] = (
         datetime.timedelta(minutes=1)
     )
@@ -242,6 +263,25 @@ class _WebhookSettings(BaseModel):
     github_secret: Annotated[str | None, Field(description="GitHub webhook HMAC secret")] = None
 
 
+class _DispatcherSettings(BaseModel):
+    cron_batch_size: Annotated[
+        int, Field(description="Number of repositories processed by one job on a cron event")
+    ] = 50
+    configuration_cache_duration: Annotated[
+        Duration, Field(description="Duration of the repository configuration cache used on cron events")
+    ] = datetime.timedelta(hours=1)
+    cron_spread_window: Annotated[
+        Duration,
+        Field(
+            description="Window over which the jobs of a cron event are spread, e.g. `2h`, "
+            "0 to run them all at the cron time"
+        ),
+    ] = datetime.timedelta(0)
+    cron_installation_budget: Annotated[
+        int, Field(description="Maximum number of cron jobs per hour for an installation, 0 for no limit")
+    ] = 0
+
+
 class _DispatchPublishingSettings(BaseModel):
     config: Annotated[JsonDict, Field(description="Dispatch publish config")] = {}
 
@@ -251,9 +291,23 @@ class _VersionsSettings(BaseModel):
     renovate_graph_retry_delay: Annotated[Duration, Field(description="Renovate retry delay")] = (
         datetime.timedelta(minutes=10)
     )
-    external_packages_update_period: Annotated[Duration, Field(description="Update period")] = (
-        datetime.timedelta(days=30)
-    )
+    external_packages_update_period: Annotated[
+        Duration,
+        Field(description="Period after which the cached endoflife.date data of a package is revalidated"),
+    ] = datetime.timedelta(days=30)
+    endoflife_url: Annotated[
+        str, Field(description="Base URL of the endoflife.date API, can be a local mirror")
+    ] = "https://endoflife.date"
+    endoflife_concurrency: Annotated[
+        int, Field(description="Maximum number of concurrent requests to the endoflife.date API")
+    ] = 5
+    endoflife_timeout: Annotated[
+        Duration, Field(description="Timeout of a request to the endoflife.date API")
+    ] = datetime.timedelta(minutes=2)
+    branch_cache_duration: Annotated[
+        Duration,
+        Field(description="Maximum age of the cached names and dependencies of an unchanged branch"),
+    ] = datetime.timedelta(days=7)
 
 
 class _CacheCleanSettings(BaseModel):
@@ -282,6 +336,48 @@ class _AuditSettings(BaseModel):
     dpkg_cache_duration: Annotated[Duration, Field(description="DPKG cache duration")] = datetime.timedelta(
         hours=3
     )
+    checks_concurrency: Annotated[
+        int,
+        Field(description="Maximum number of audit checks (Snyk, dpkg) run concurrently by a worker"),
+    ] = 2
+    apt_index_concurrency: Annotated[
+        int, Field(description="Maximum number of APT indexes downloaded concurrently")
+    ] = 4
+    environment_cache_max_size: Annotated[
+        int,
+        Field(description="Maximum size in bytes of the installed dependencies cache, 0 to disable it"),
+    ] = 10 * 1024**3
+    pre_commit_cache_max_size: Annotated[
+        int,
+        Field(description="Maximum size in bytes of the pre-commit hook environments cache, 0 to disable it"),
+    ] = 5 * 1024**3
+    advisory_concurrency: Annotated[
+        int, Field(description="Maximum number of security advisories created or updated concurrently")
+    ] = 5
+    advisory_rate_limit_reserve: Annotated[
+        int,
+        Field(description="Remaining GitHub rate limit not used by the security advisories reconciliation"),
+    ] = 1000
+    snyk_cache_duration: Annotated[
+        Duration,
+        Field(
+            description="Duration after which the unchanged dependencies of a branch are uploaded again "
+            "with `snyk monitor`"
+        ),
+    ] = datetime.timedelta(days=7)
+    snyk_refresh_interval: Annotated[
+        Duration,
+        Field(
+            description="Interval after which `snyk test` is run again on an unchanged branch, "
+            "to get the new vulnerabilities"
+        ),
+    ] = datetime.timedelta(days=3)
+    stale_branch_duration: Annotated[
+        Duration,
+        Field(
+            description="Duration after which a branch not audited anymore is shown as stale on the dashboard"
+        ),
+    ] = datetime.timedelta(days=7)
 
 
 class _TestSettings(BaseModel):
@@ -321,12 +417,22 @@ class ApplicationSettings(BaseSettings):
         LogLevel.WARNING
     )
     session_secret: Annotated[str, Field(description="Session secret")] = "change-me"  # noqa: S105
+    dashboard_cache_duration: Annotated[
+        Duration,
+        Field(
+            description="Duration after which a cached dashboard is rendered again even if the status didn't "
+            "change, to update the relative times (ages, stale branches)"
+        ),
+    ] = datetime.timedelta(minutes=5)
     configuration: Annotated[str | None, Field(description="Config YAML path")] = None
     sqlalchemy: Annotated[_SqlAlchemySettings, Field(description="Database settings")] = _SqlAlchemySettings()
     test: Annotated[_TestSettings, Field(description="Test settings")] = _TestSettings()
     application_configs: Annotated[dict[str, _AppConfig], Field(description="Application configs")] = {}
     redis: Annotated[_RedisSettings, Field(description="Redis settings")] = _RedisSettings()
     webhook: Annotated[_WebhookSettings, Field(description="Webhook settings")] = _WebhookSettings()
+    dispatcher: Annotated[_DispatcherSettings, Field(description="Dispatcher settings")] = (
+        _DispatcherSettings()
+    )
     dispatch_publishing: Annotated[
         _DispatchPublishingSettings, Field(description="Dispatch publishing settings")
     ] = _DispatchPublishingSettings()
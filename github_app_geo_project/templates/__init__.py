@@ -94,6 +94,11 @@ def pprint_duration(duration: datetime.timedelta | None) -> str:
 
 async def render_template(renderer: str, data: dict[str, Any]) -> str:
     """Render a template from a renderer string in the format 'package:path'."""
+    return render_template_sync(renderer, data)
+
+
+def render_template_sync(renderer: str, data: dict[str, Any]) -> str:
+    """Render a template from a renderer string in the format 'package:path', usable in a worker thread."""
     package, path = renderer.split(":", 1)
     package_dir = anyio.Path(__file__).parent.parent.parent / package
     template_path = package_dir / path
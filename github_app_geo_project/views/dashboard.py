@@ -2,27 +2,50 @@
 
 """Dashboard view."""
 
+import asyncio
+import hashlib
+import json
 import logging
+import time
 from typing import Annotated, Any
 
+import anyio.to_thread
 import sqlalchemy
-from fastapi import Depends, HTTPException, Request
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from github_app_geo_project import models, module
 from github_app_geo_project.module import modules
 from github_app_geo_project.security import User, get_user
-from github_app_geo_project.templates import render_template
+from github_app_geo_project.settings import settings
+from github_app_geo_project.templates import render_template_sync
 from github_app_geo_project.utils import HTML_FORMATTER
 
 _LOGGER = logging.getLogger(__name__)
 
+# Parsed transversal status by module name and loaded entry keys, with the ETag of the stored status
+_STATUS_CACHE: dict[tuple[str, tuple[str, ...] | None], tuple[str, Any]] = {}
+_STATUS_CACHE_SIZE = 256
+# Rendered dashboards by module name: the ETag of the stored status with the time bucket,
+# and the rendered data by query parameters
+_RENDER_CACHE: dict[str, tuple[str, dict[tuple[tuple[str, str], ...], dict[str, str]]]] = {}
+_RENDER_CACHE_SIZE = 256
+# The parsed status is shared by the requests, the CPU-bound work on it is done by one thread at a time
+_MODULE_LOCKS: dict[str, asyncio.Lock] = {}
+
 
 async def dashboard(
     request: Request,
     module_name: str,
     user: Annotated[User, Depends(get_user)],
 ) -> dict[str, Any]:
-    """Render the dashboard for a module."""
+    """
+    Render the dashboard for a module.
+
+    The rendered dashboard is cached by status version, query parameters and time bucket
+    (`dashboard_cache_duration`, the dashboards contain relative times), and served with an ETag.
+    """
     if not user.is_admin:
         return {
             "request": request,
@@ -34,37 +57,216 @@ async def dashboard(
     if module_name not in modules.MODULES:
         raise HTTPException(status_code=404, detail=f"The module {module_name} does not exist")
     module_instance = modules.MODULES[module_name]
+    params = dict(request.query_params)
 
     async with request.app.state.async_session_factory() as session:
-        module_status = (
-            await session.execute(
-                sqlalchemy.select(models.ModuleStatus.data).where(models.ModuleStatus.module == module_name),
-            )
-        ).scalar()
-        if module_status is None:
-            module_status = {}
-
-        output = module_instance.get_transversal_dashboard(
-            module.TransversalDashboardContext(
-                module_instance.transversal_status_from_json(module_status or {}),
-                dict(request.query_params),
-            ),
-        )
-        data = output.data
+        status_etag = await _get_status_etag(session, module_name, module_instance)
+        render_etag = f"{status_etag}-{_get_time_bucket()}"
+        # The page also contains the user
+        etag_key = json.dumps([render_etag, sorted(params.items()), user.auth_type.value, user.login])
+        etag = f'W/"{hashlib.sha256(etag_key.encode()).hexdigest()[:32]}"'
+        if _etag_matches(request, etag):
+            return {"etag": etag, "not_modified": True}
 
-        data.setdefault("title", module_instance.title())
-        data.setdefault("styles", HTML_FORMATTER.get_style_defs())
-
-        if output.renderer:
-            data["html"] = await render_template(output.renderer, data)
+        data = await _get_rendered_dashboard(
+            session, module_name, module_instance, status_etag, render_etag, params
+        )
 
     return {
         "request": request,
         "user": user,
         "title": data["title"],
-        "html": data.get("html", ""),
+        "html": data["html"],
         "styles": data["styles"],
+        "etag": etag,
     }
 
 
 DashboardData = Annotated[dict[str, Any], Depends(dashboard)]
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check if the ETag is in the If-None-Match header of the request."""
+    return etag in [value.strip() for value in request.headers.get("if-none-match", "").split(",")]
+
+
+def _get_time_bucket() -> int:
+    """Get the current time bucket of the rendered dashboards, 0 when they don't expire."""
+    duration = settings.dashboard_cache_duration.total_seconds()
+    return int(time.time() // duration) if duration > 0 else 0
+
+
+def _get_module_lock(module_name: str) -> asyncio.Lock:
+    if module_name not in _MODULE_LOCKS:
+        _MODULE_LOCKS[module_name] = asyncio.Lock()
+    return _MODULE_LOCKS[module_name]
+
+
+def _render_dashboard(
+    module_instance: module.Module[Any, Any, Any, Any],
+    transversal_status: Any,
+    params: dict[str, str],
+) -> dict[str, str]:
+    """Get and render the dashboard content of a module, CPU-bound, run in a worker thread."""
+    output = module_instance.get_transversal_dashboard(
+        module.TransversalDashboardContext(transversal_status, params),
+    )
+    data = output.data
+
+    data.setdefault("title", module_instance.title())
+    data.setdefault("styles", HTML_FORMATTER.get_style_defs())
+
+    if output.renderer:
+        data["html"] = render_template_sync(output.renderer, data)
+    return {"title": data["title"], "html": data.get("html", ""), "styles": data["styles"]}
+
+
+async def _get_rendered_dashboard(
+    session: AsyncSession,
+    module_name: str,
+    module_instance: module.Module[Any, Any, Any, Any],
+    status_etag: str,
+    render_etag: str,
+    params: dict[str, str],
+) -> dict[str, str]:
+    """Get the rendered dashboard, from the cache if the status, the time bucket and the query parameters didn't change."""
+    params_key = tuple(sorted(params.items()))
+    cached = _RENDER_CACHE.get(module_name)
+    if cached is not None and cached[0] == render_etag and params_key in cached[1]:
+        return cached[1][params_key]
+
+    async with _get_module_lock(module_name):
+        # Probably rendered by a concurrent request
+        cached = _RENDER_CACHE.get(module_name)
+        if cached is not None and cached[0] == render_etag and params_key in cached[1]:
+            return cached[1][params_key]
+
+        transversal_status = await _get_transversal_status(
+            session, module_name, module_instance, status_etag, params
+        )
+        data = await anyio.to_thread.run_sync(_render_dashboard, module_instance, transversal_status, params)
+
+        if cached is None or cached[0] != render_etag:
+            cached = (render_etag, {})
+            _RENDER_CACHE[module_name] = cached
+        if len(cached[1]) >= _RENDER_CACHE_SIZE:
+            del cached[1][next(iter(cached[1]))]
+        cached[1][params_key] = data
+        return data
+
+
+async def _get_status_etag(
+    session: AsyncSession,
+    module_name: str,
+    module_instance: module.Module[Any, Any, Any, Any],
+) -> str:
+    """Get the ETag of the stored transversal status of a module, without loading it."""
+    if module_instance.has_transversal_status_entries():
+        count, versions, updated_at = (
+            await session.execute(
+                sqlalchemy.select(
+                    sqlalchemy.func.count(),
+                    sqlalchemy.func.coalesce(sqlalchemy.func.sum(models.ModuleStatusEntry.version), 0),
+                    sqlalchemy.func.max(models.ModuleStatusEntry.updated_at),
+                ).where(models.ModuleStatusEntry.module == module_name),
+            )
+        ).one()
+        updated = updated_at.timestamp() if updated_at is not None else 0
+        return f'W/"{module_name}-{count}-{versions}-{updated}"'
+    version = (
+        await session.execute(
+            sqlalchemy.select(models.ModuleStatus.version).where(models.ModuleStatus.module == module_name),
+        )
+    ).scalar()
+    return f'W/"{module_name}-{version if version is not None else "none"}"'
+
+
+async def _get_transversal_status(
+    session: AsyncSession,
+    module_name: str,
+    module_instance: module.Module[Any, Any, Any, Any],
+    etag: str,
+    params: dict[str, str],
+) -> Any:
+    """
+    Get the parsed transversal status of a module, reused while its ETag doesn't change.
+
+    Only the entries needed for the query parameters are loaded.
+    Should be called with the module lock.
+    """
+    keys = None
+    if module_instance.has_transversal_status_entries():
+        entry_keys = module_instance.get_transversal_status_entry_keys(params)
+        keys = tuple(sorted(entry_keys)) if entry_keys is not None else None
+    cache_key = (module_name, keys)
+    cached = _STATUS_CACHE.get(cache_key)
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    if module_instance.has_transversal_status_entries():
+        where = [models.ModuleStatusEntry.module == module_name]
+        if keys is not None:
+            where.append(models.ModuleStatusEntry.key.in_(keys))
+        entries = (
+            await session.execute(
+                sqlalchemy.select(models.ModuleStatusEntry.key, models.ModuleStatusEntry.data).where(*where),
+            )
+        ).all()
+        transversal_status = await anyio.to_thread.run_sync(
+            module_instance.transversal_status_from_entries,
+            dict(entries),
+        )
+    else:
+        module_status = (
+            await session.execute(
+                sqlalchemy.select(models.ModuleStatus.data).where(models.ModuleStatus.module == module_name),
+            )
+        ).scalar()
+        transversal_status = await anyio.to_thread.run_sync(
+            module_instance.transversal_status_from_json,
+            module_status or {},
+        )
+    # The statuses of the previous versions will not be used anymore
+    for key in [key for key, value in _STATUS_CACHE.items() if key[0] == module_name and value[0] != etag]:
+        del _STATUS_CACHE[key]
+    if len(_STATUS_CACHE) >= _STATUS_CACHE_SIZE:
+        del _STATUS_CACHE[next(iter(_STATUS_CACHE))]
+    _STATUS_CACHE[cache_key] = (etag, transversal_status)
+    return transversal_status
+
+
+async def dashboard_api(
+    request: Request,
+    module_name: str,
+    user: Annotated[User, Depends(get_user)],
+) -> Response:
+    """Get the read-only JSON data of the transversal status of a module, with ETag caching."""
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if module_name not in modules.MODULES:
+        raise HTTPException(status_code=404, detail=f"The module {module_name} does not exist")
+    module_instance = modules.MODULES[module_name]
+
+    async with request.app.state.async_session_factory() as session:
+        etag = await _get_status_etag(session, module_name, module_instance)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        async with _get_module_lock(module_name):
+            params = dict(request.query_params)
+            transversal_status = await _get_transversal_status(
+                session, module_name, module_instance, etag, params
+            )
+            try:
+                data = await anyio.to_thread.run_sync(
+                    module_instance.get_transversal_api,
+                    module.TransversalDashboardContext(transversal_status, params),
+                )
+            except ValueError as exception:
+                raise HTTPException(status_code=400, detail=str(exception)) from exception
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"The module {module_name} has no API")
+    return JSONResponse(data, headers=headers)
+
+
+DashboardApiData = Annotated[Response, Depends(dashboard_api)]
@@ -1,8 +1,11 @@
 # Copyright (c) 2026, Camptocamp SA
 
+import datetime
 from typing import Any
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
+import sqlalchemy.dialects.postgresql.asyncpg
 from pydantic import BaseModel
 
 from github_app_geo_project import module
@@ -177,3 +180,136 @@ def test_data_transversal_status_to_json(data, expected) -> None:
     test_module = TransversalStatusDataModule()
 
     assert test_module.transversal_status_to_json(data) == expected
+
+
+@pytest.mark.parametrize(
+    ("name", "data", "sha"),
+    [
+        ("pull_request", {"pull_request": {"number": 12, "head": {"sha": "abc", "ref": "feature"}}}, "abc"),
+        ("pull_request", {"pull_request": None}, None),
+        ("push", {"ref": "refs/heads/master", "after": "def", "before": "abc"}, "def"),
+        ("push", {"ref": "refs/tags/1.0.0", "after": "000", "before": "abc", "deleted": True}, "abc"),
+        ("workflow_run", {"workflow_run": {"head_sha": "abc", "head_branch": "master"}}, "abc"),
+        ("workflow_run", {"workflow_run": None}, None),
+        ("check_run", {"check_run": {"head_sha": "abc", "check_suite": {"head_branch": "master"}}}, "abc"),
+        ("repository_dispatch", {"type": "event"}, None),
+    ],
+)
+def test_github_event_fast_path(name, data, sha) -> None:
+    github_event = module.GitHubEvent(name, data)
+
+    assert github_event.sha == sha
+
+
+def test_github_event_parse_once() -> None:
+    github_event = module.GitHubEvent("pull_request", {"action": "opened"})
+
+    with patch("githubkit.webhooks.parse_obj", return_value=object()) as parse_obj:
+        parsed = github_event.parse()
+        assert github_event.parse("pull_request") is parsed
+        assert github_event.parse() is parsed
+
+    parse_obj.assert_called_once_with("pull_request", {"action": "opened"})
+
+
+def _get_entries_session(rows: dict[str, Any]) -> AsyncMock:
+    session = AsyncMock()
+    session.begin_nested = MagicMock()
+
+    async def execute(statement):
+        key = statement.compile().params.get("key_1")
+        row = rows.get(key)
+        return Mock(
+            one_or_none=Mock(return_value=None if row is None else Mock(data=row[0], version=row[1])),
+            rowcount=1,
+        )
+
+    session.execute.side_effect = execute
+    return session
+
+
+@pytest.mark.asyncio
+async def test_transversal_status_entries() -> None:
+    session = _get_entries_session({"a": ({"value": 1}, 3)})
+    entries = module.TransversalStatusEntries(session, "test")
+
+    assert await entries.get("a") == {"value": 1}
+    assert await entries.get("a") == {"value": 1}
+    assert await entries.get("c") is None
+    assert session.execute.await_count == 2
+    assert entries.changed == {}
+
+    entries.set("a", {"value": 2})
+    entries.set("b", {"value": 3})
+    entries.set("c", {"value": 4})
+    entries.delete_older(datetime.timedelta(days=1))
+    assert entries.changed == {"a": {"value": 2}, "b": {"value": 3}, "c": {"value": 4}}
+
+    session.execute.reset_mock()
+    assert await entries.flush()
+    statements = [str(call.args[0]) for call in session.execute.await_args_list]
+    assert len(statements) == 4
+    # Compare-and-swap update of the read entry
+    assert statements[0].startswith("UPDATE ghci.module_status_entry")
+    assert "ghci.module_status_entry.version = :version_1" in statements[0]
+    # Blind upsert of the not read entry
+    assert "ON CONFLICT ON CONSTRAINT uq_module_status_entry_module_key DO UPDATE" in statements[1]
+    # Insert of the entry read as missing
+    assert "ON CONFLICT ON CONSTRAINT uq_module_status_entry_module_key DO NOTHING" in statements[2]
+    assert statements[3].startswith("DELETE FROM ghci.module_status_entry")
+    assert "updated_at <" in statements[3]
+    assert entries.changed == {}
+
+
+@pytest.mark.asyncio
+async def test_transversal_status_entries_conflict() -> None:
+    session = _get_entries_session({"a": ({"value": 1}, 3)})
+    entries = module.TransversalStatusEntries(session, "test")
+    await entries.get("a")
+    entries.set("a", {"value": 2})
+
+    session.execute.side_effect = None
+    session.execute.return_value = Mock(rowcount=0)
+    assert not await entries.flush()
+    session.begin_nested.return_value.__aenter__.return_value.rollback.assert_awaited_once()
+    assert entries.changed == {"a": {"value": 2}}
+
+    entries.reset()
+    assert entries.changed == {}
+
+
+@pytest.mark.asyncio
+async def test_transversal_status_entries_patch() -> None:
+    """The increments and the items are applied by the database in one upsert, without reading the entry."""
+    session = _get_entries_session({"a": ({"value": 1}, 3)})
+    entries = module.TransversalStatusEntries(session, "test")
+    await entries.get("a")
+    entries.set("a", {"value": 2})
+    entries.increment("aggregate", "counts", {"x": 1, "y": -1})
+    entries.increment("aggregate", "counts", {"x": 2})
+    entries.set_items("aggregate", "items", {"a": {"value": 1}, "b": None})
+
+    session.execute.reset_mock()
+    assert await entries.flush()
+    statements = [call.args[0] for call in session.execute.await_args_list]
+    assert len(statements) == 2
+    # After the compare-and-swap
+    assert str(statements[0]).startswith("UPDATE ghci.module_status_entry")
+    sql = str(statements[1].compile(dialect=sqlalchemy.dialects.postgresql.asyncpg.dialect()))
+    params = statements[1].compile(dialect=sqlalchemy.dialects.postgresql.asyncpg.dialect()).params
+    assert "ON CONFLICT ON CONSTRAINT uq_module_status_entry_module_key DO UPDATE" in sql
+    assert "ghci.module_status_entry.data || jsonb_build_object(" in sql
+    assert "SELECT" not in sql
+    # The initial data when the entry doesn't exist
+    assert params["data"] == {"counts": {"x": 3, "y": -1}, "items": {"a": {"value": 1}}}
+    assert ["b"] in params.values()
+
+    # Applied only once
+    session.execute.reset_mock()
+    assert await entries.flush()
+    session.execute.assert_not_awaited()
+
+    entries.increment("aggregate", "counts", {"x": 1})
+    entries.reset()
+    assert await entries.flush()
+    session.execute.assert_not_awaited()
@@ -2,15 +2,52 @@
 
 """Tests for the audit module."""
 
+import asyncio
+import datetime
+import hashlib
+import json
+import lzma
+import os
 import tempfile
+import time
 from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import anyio
 import pytest
-
-from github_app_geo_project.module.audit import Audit, _EventData, _process_renovate
+from aiointercept import CallbackResult, aiointercept
+
+from github_app_geo_project import module
+from github_app_geo_project.module import utils as module_utils
+from github_app_geo_project.module.audit import (
+    Audit,
+    _AggregateStatus,
+    _AggregateUnresolved,
+    _create_security_advisories,
+    _EventData,
+    _get_advisory_data,
+    _get_advisory_fingerprint,
+    _get_overview,
+    _IntermediateStatus,
+    _is_snyk_monitor_needed,
+    _is_snyk_result_reusable,
+    _process_branch,
+    _process_renovate,
+    _process_snyk_monitor,
+    _TransversalStatus,
+    _TransversalStatusRepo,
+    _TransversalStatusTool,
+    _vulnerabilities_from_json,
+    _vulnerabilities_to_json,
+    apt_index,
+    configuration,
+    environment_cache,
+    toolchains,
+)
+from github_app_geo_project.module.audit import utils as audit_utils
 from github_app_geo_project.module.audit.utils import VulnerabilityData
+from github_app_geo_project.settings import settings
 
 
 def _make_worktree_mock(clone_path: Path) -> MagicMock:
@@ -268,6 +305,7 @@ def test_get_actions_pull_request_closed() -> None:
         "action": "closed",
         "repository": {"default_branch": "master"},
     }
+    context.github_event = module.GitHubEvent("pull_request", context.github_event_data)
 
     event_data = Mock()
     event_data.action = "closed"
@@ -291,6 +329,7 @@ def test_get_actions_pull_request_closed_merged_default_branch_triggers_renovate
         "action": "closed",
         "repository": {"default_branch": "master"},
     }
+    context.github_event = module.GitHubEvent("pull_request", context.github_event_data)
 
     event_data = Mock()
     event_data.action = "closed"
@@ -314,6 +353,7 @@ def test_get_actions_pull_request_closed_merged_non_default_branch_no_renovate()
         "action": "closed",
         "repository": {"default_branch": "master"},
     }
+    context.github_event = module.GitHubEvent("pull_request", context.github_event_data)
 
     event_data = Mock()
     event_data.action = "closed"
@@ -335,6 +375,7 @@ async def test_process_close_pull_request_issues_action() -> None:
     context = Mock()
     context.module_event_data = _EventData(type="close-pull-request-issues")
     context.github_event_data = {"action": "closed"}
+    context.github_event = module.GitHubEvent("pull_request", context.github_event_data)
     context.github_project = Mock()
     context.issue_data = ""
 
@@ -361,6 +402,7 @@ def test_get_actions_push_security_md_on_default_branch_triggers_renovate() -> N
     context = Mock()
     context.module_event_name = "push"
     context.github_event_data = {"ref": "refs/heads/master"}
+    context.github_event = module.GitHubEvent("push", context.github_event_data)
 
     event_data = Mock()
     event_data.commits = [Mock(modified=["SECURITY.md"], added=[], removed=[])]
@@ -381,6 +423,7 @@ def test_get_actions_push_security_md_on_non_default_branch_no_renovate() -> Non
     context = Mock()
     context.module_event_name = "push"
     context.github_event_data = {"ref": "refs/heads/4.0.0"}
+    context.github_event = module.GitHubEvent("push", context.github_event_data)
 
     event_data = Mock()
     event_data.commits = [Mock(modified=["SECURITY.md"], added=[], removed=[])]
@@ -599,3 +642,840 @@ def test_issue_body_cleanup() -> None:
     assert "Check outdated version" in result
     assert "Check security vulnerabilities with Snyk" in result
     assert "Update dpkg packages" in result
+
+
+@pytest.mark.asyncio
+async def test_update_transversal_status_entries() -> None:
+    """Test that only the repository entry is updated, and the aggregate entry by differences."""
+    context = Mock()
+    context.github_project.owner = "owner"
+    context.github_project.repository = "repo"
+    entries = module.TransversalStatusEntries(AsyncMock(), "audit")
+    entries._entries["owner/repo"] = {
+        "types": {"snyk": {"name": "Snyk", "status": "success"}},
+        "summary": {"updated_at": "2026-10-17T00:00:00Z", "severity": "high", "severities": {"high": 1}},
+    }
+    entries._entries["owner/old"] = {
+        "summary": {
+            "updated_at": "2026-10-10T00:00:00Z",
+            "severity": "critical",
+            "severities": {"critical": 1, "high": 1},
+        },
+    }
+    entries.get_older_keys = AsyncMock(return_value=["_aggregate", "owner/old"])
+
+    await Audit().update_transversal_status_entries(
+        context,
+        _IntermediateStatus(
+            status=_TransversalStatusRepo(
+                types={
+                    "Dpkg master": _TransversalStatusTool(
+                        name="Dpkg master", status="error", severities={"high": 2, "low": 1}
+                    )
+                }
+            ),
+        ),
+        entries,
+    )
+
+    # The aggregate entry isn't read
+    assert "_aggregate" not in entries._entries
+    assert list(entries.changed) == ["owner/old", "owner/repo"]
+    assert entries.changed["owner/old"] is None
+    assert set(entries.changed["owner/repo"]["types"]) == {"snyk", "Dpkg master"}
+    dpkg = entries.changed["owner/repo"]["types"]["Dpkg master"]
+    assert dpkg["status"] == "error"
+    assert dpkg["unresolved_since"] == dpkg["updated_at"]
+    assert entries.changed["owner/repo"]["summary"]["severities"] == {"high": 2, "low": 1}
+    # The updated repository (high: 1 → high: 2, low: 1), and the removed one
+    assert entries._increments == {
+        "_aggregate": {
+            "counts": {"repositories": -1},
+            "repositories_by_severity": {"critical": -1},
+            "vulnerabilities_by_severity": {"high": 0, "low": 1, "critical": -1},
+        },
+    }
+    items = entries._items["_aggregate"]
+    assert items["unresolved"]["owner/repo"]["name"] == "Dpkg master"
+    assert items["unresolved"]["owner/old"] is None
+    assert list(items["branches"]["owner/repo"]) == ["master"]
+    assert items["branches"]["owner/old"] is None
+    assert datetime.datetime.fromisoformat(
+        items["last_update"]["updated_at"]
+    ) == datetime.datetime.fromisoformat(dpkg["updated_at"])
+
+
+def test_transversal_status_entries_round_trip() -> None:
+    """Test the split of the transversal status in repository entries, used for the migration."""
+    audit = Audit()
+    status = _TransversalStatus(
+        updated={"owner/repo": datetime.datetime.now(datetime.UTC)},
+        repositories={
+            "owner/repo": _TransversalStatusRepo(types={"snyk": _TransversalStatusTool(name="Snyk")}),
+            "owner/removed": _TransversalStatusRepo(),
+        },
+    )
+    entries = audit.transversal_status_to_entries(status)
+    assert list(entries) == ["owner/repo"]
+    assert (
+        audit.transversal_status_from_entries(entries).repositories["owner/repo"].types["snyk"].name == "Snyk"
+    )
+
+
+def _snyk_vulnerability(snyk_id: str, severity: str, fixed_in: list[str]) -> dict[str, object]:
+    return {
+        "id": snyk_id,
+        "severity": severity,
+        "packageName": "pkg",
+        "version": "1.0.0",
+        "packageManager": "pip",
+        "fixedIn": fixed_in,
+        "isUpgradable": bool(fixed_in),
+        "isPatchable": False,
+        "identifiers": {"CVE": [], "CWE": []},
+    }
+
+
+@pytest.mark.asyncio
+async def test_snyk_test_single_run(tmp_path: Path) -> None:
+    """One snyk test run gives the policy filtered and the ignored vulnerabilities."""
+    cwd = anyio.Path(tmp_path)
+    await (cwd / "sub").mkdir()
+    await (cwd / "sub" / ".snyk").write_text(
+        "\n".join(  # noqa: FLY002
+            [
+                "ignore:",
+                "  SNYK-1:",
+                "    - '*':",
+                "        reason: Not used",
+                "  SNYK-3:",
+                "    - '*':",
+                "        reason: Expired",
+                "        expires: 2020-01-01T00:00:00.000Z",
+            ],
+        ),
+        encoding="utf-8",
+    )
+    test_json = [
+        {
+            "packageManager": "pip",
+            "displayTargetFile": "sub/requirements.txt",
+            "vulnerabilities": [
+                _snyk_vulnerability("SNYK-1", "high", ["2.0.0"]),
+                _snyk_vulnerability("SNYK-2", "critical", []),
+                _snyk_vulnerability("SNYK-3", "high", ["2.0.0"]),
+            ],
+        },
+        {
+            "packageManager": "pip",
+            "displayTargetFile": "requirements.txt",
+            "vulnerabilities": [_snyk_vulnerability("SNYK-1", "high", ["2.0.0"])],
+        },
+    ]
+    run_timeout = AsyncMock(return_value=(json.dumps(test_json), True, None))
+
+    with (
+        patch("github_app_geo_project.module.utils.run_timeout", run_timeout),
+        patch.object(audit_utils, "find_snyk_files", AsyncMock(return_value=[cwd / "sub" / ".snyk"])),
+    ):
+        (
+            high_vulnerabilities,
+            fixable_vulnerabilities,
+            fixable_summary,
+            _,
+            vulnerabilities_in_requirements,
+            file_vulnerabilities,
+            ignored_file_vulnerabilities,
+        ) = await audit_utils._snyk_test("master", {}, {}, [], {}, cwd)
+
+    run_timeout.assert_awaited_once()
+    command = run_timeout.call_args.args[0]
+    assert command[:3] == ["snyk", "test", "--json"]
+    assert "--ignore-policy" in command
+    assert high_vulnerabilities == {"high": 2, "critical": 1}
+    assert fixable_vulnerabilities == {"high": 2}
+    assert set(fixable_summary) == {"SNYK-1", "SNYK-3"}
+    assert vulnerabilities_in_requirements
+    assert {file: [v.snyk_id for v in vulns] for file, vulns in file_vulnerabilities.items()} == {
+        "sub/requirements.txt": ["SNYK-2", "SNYK-3"],
+        "requirements.txt": ["SNYK-1"],
+    }
+    assert {file: [v.snyk_id for v in vulns] for file, vulns in ignored_file_vulnerabilities.items()} == {
+        "sub/requirements.txt": ["SNYK-1"],
+    }
+
+
+def test_is_snyk_ignored() -> None:
+    policies = {".": {"SNYK-1": "root"}, "sub": {"SNYK-2": "sub"}}
+    assert audit_utils.is_snyk_ignored(policies, "requirements.txt", "SNYK-1")
+    assert audit_utils.is_snyk_ignored(policies, "sub/deep/package.json", "SNYK-2")
+    # Only the nearest policy is used
+    assert not audit_utils.is_snyk_ignored(policies, "sub/package.json", "SNYK-1")
+    assert not audit_utils.is_snyk_ignored({}, "requirements.txt", "SNYK-1")
+
+
+@pytest.mark.asyncio
+async def test_get_snyk_ignore_reasons_by_directory(tmp_path: Path) -> None:
+    """The root `.snyk` policy is found, and the date-only expirations are supported."""
+    cwd = anyio.Path(tmp_path)
+    await module_utils.run_timeout(["git", "init", "-q"], None, 10, "", "", "", cwd)
+    await (cwd / ".snyk").write_text(
+        "ignore:\n"
+        "  SNYK-1:\n"
+        "    - '*':\n"
+        "        reason: Root reason\n"
+        "        expires: 2999-01-01\n"
+        "  SNYK-2:\n"
+        "    - '*':\n"
+        "        reason: Expired\n"
+        "        expires: 2000-01-01\n",
+        encoding="utf-8",
+    )
+    await (cwd / "sub").mkdir()
+    await (cwd / "sub" / ".snyk").write_text(
+        "ignore:\n  SNYK-3:\n    - '*':\n        reason: Sub reason\n",
+        encoding="utf-8",
+    )
+    await module_utils.run_timeout(["git", "add", "."], None, 10, "", "", "", cwd)
+
+    policies = await audit_utils.get_snyk_ignore_reasons_by_directory(cwd)
+    assert policies == {".": {"SNYK-1": "Root reason"}, "sub": {"SNYK-3": "Sub reason"}}
+    assert audit_utils.is_snyk_ignored(policies, "requirements.txt", "SNYK-1")
+    assert not audit_utils.is_snyk_ignored(policies, "requirements.txt", "SNYK-2")
+    assert await audit_utils.get_snyk_policy_expiry(cwd) == datetime.datetime(2999, 1, 1, tzinfo=datetime.UTC)
+
+
+@pytest.mark.asyncio
+async def test_environment_cache(tmp_path: Path) -> None:
+    """The cached directories are restored, and the least recently used entries are evicted."""
+    cache = environment_cache.EnvironmentCache(anyio.Path(tmp_path / "cache"), max_size=10)
+    site_packages = anyio.Path(tmp_path / "site-packages")
+    venv = anyio.Path(tmp_path / "venv")
+    await site_packages.mkdir()
+    await (site_packages / "package.py").write_text("12345", encoding="utf-8")
+
+    assert not await cache.restore("key1", [site_packages, venv])
+    await cache.store("key1", [site_packages, venv])
+
+    await (site_packages / "package.py").write_text("other", encoding="utf-8")
+    await (site_packages / "other.py").write_text("", encoding="utf-8")
+    assert await cache.restore("key1", [site_packages, venv])
+    assert await (site_packages / "package.py").read_text(encoding="utf-8") == "12345"
+    assert not await (site_packages / "other.py").exists()
+    assert not await venv.exists()
+
+    # Already stored, e.g. by another job
+    await cache.store("key1", [site_packages, venv])
+    assert await cache.restore("key1", [site_packages, venv])
+    assert await (site_packages / "package.py").read_text(encoding="utf-8") == "12345"
+
+    # Over the maximum size, the entries used by a running job aren't evicted
+    await (site_packages / "package.py").write_text("678901", encoding="utf-8")
+    await cache.store("key2", [site_packages, venv])
+    assert await cache.restore("key1", [site_packages, venv])
+
+    # Over the maximum size, the oldest entry is evicted
+    old_time = time.time() - settings.process_queue.job_timeout.total_seconds() - 60
+    os.utime(tmp_path / "cache" / "key1" / ".complete", (old_time, old_time))
+    await (site_packages / "package.py").write_text("678901", encoding="utf-8")
+    await cache.store("key3", [site_packages, venv])
+    assert not await cache.restore("key1", [site_packages, venv])
+    assert await cache.restore("key3", [site_packages, venv])
+
+    # Fallback to an installation on error
+    with patch.object(environment_cache, "_restore", side_effect=OSError("Directory not empty")):
+        assert not await cache.restore("key3", [site_packages, venv])
+
+
+@pytest.mark.asyncio
+async def test_install_dependencies_cached() -> None:
+    """The requirements are installed and stored on a cache miss, and only the Pipenv and Poetry ones on a hit."""
+    cache = Mock()
+    cache.restore = AsyncMock(side_effect=[False, True])
+    cache.store = AsyncMock()
+    cache.clear_targets = AsyncMock()
+    targets = [anyio.Path("/site-packages")]
+    install = AsyncMock(return_value=True)
+    with (
+        patch.object(audit_utils, "_get_environment_cache_key", AsyncMock(return_value=("key", targets))),
+        patch.object(environment_cache, "ENVIRONMENT_CACHE", cache),
+        patch.object(audit_utils, "_install_requirements_dependencies", install),
+        patch.object(audit_utils, "_install_pipenv_dependencies", install),
+        patch.object(audit_utils, "_install_poetry_dependencies", install),
+    ):
+        await audit_utils._install_dependencies({}, {}, [], {}, anyio.Path("/cwd"))
+        assert install.await_count == 3
+        cache.clear_targets.assert_awaited_once_with(targets)
+        cache.store.assert_awaited_once_with("key", targets)
+
+        await audit_utils._install_dependencies({}, {}, [], {}, anyio.Path("/cwd"))
+        assert install.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_environment_cache_in_place(tmp_path: Path) -> None:
+    """The environments installed in place are reserved by one job, and reused once installed."""
+    cache = environment_cache.EnvironmentCache(anyio.Path(tmp_path / "cache"), max_size=1000)
+    env_dir, installed = await cache.get_in_place("key1")
+    assert env_dir == anyio.Path(tmp_path / "cache" / "key1" / "env")
+    assert not installed
+    # Being installed by another job
+    assert await cache.get_in_place("key1") == (None, False)
+
+    await env_dir.mkdir()
+    await (env_dir / "package.py").write_text("12345", encoding="utf-8")
+    await cache.complete_in_place("key1", success=True)
+    assert await cache.get_in_place("key1") == (env_dir, True)
+
+    # Removed on error, to be installed again
+    env_dir, _ = await cache.get_in_place("key2")
+    assert env_dir is not None
+    await env_dir.mkdir()
+    await cache.complete_in_place("key2", success=False)
+    assert await cache.get_in_place("key2") == (env_dir, False)
+
+    assert await environment_cache.EnvironmentCache(anyio.Path(tmp_path), max_size=0).get_in_place(
+        "key1"
+    ) == (None, False)
+
+
+@pytest.mark.asyncio
+async def test_install_poetry_dependencies_cached(tmp_path: Path) -> None:
+    """The Poetry virtual environment is installed in the environment cache, and used in place on a hit."""
+    cwd = anyio.Path(tmp_path / "worktree")
+    await cwd.mkdir()
+    await (cwd / "poetry.lock").write_text("", encoding="utf-8")
+    await (cwd / "pyproject.toml").write_text("", encoding="utf-8")
+    cache = environment_cache.EnvironmentCache(anyio.Path(tmp_path / "cache"), max_size=10**6)
+    commands: list[tuple[list[str], dict[str, str] | None]] = []
+
+    async def run_timeout(command, env, *args, **kwargs):
+        commands.append((command, env))
+        if command[1] == "--version":
+            return f"{command[0]} 1.0", True, None
+        if command[:3] == ["python", "-m", "venv"]:
+            await anyio.Path(command[3]).mkdir(parents=True)
+        return "", True, None
+
+    proc = AsyncMock()
+    proc.communicate.return_value = (b"poetry.lock\n", b"")
+    proc.returncode = 0
+    env = {"PATH": "/bin", "PYTHONUSERBASE": str(tmp_path / "user")}
+    with (
+        patch.object(environment_cache, "ENVIRONMENT_CACHE", cache),
+        patch.object(module_utils, "run_timeout", run_timeout),
+        patch("asyncio.create_subprocess_exec", AsyncMock(return_value=proc)),
+    ):
+        assert await audit_utils._install_poetry_dependencies({}, {}, [], env, cwd)
+        install_env = next(env for command, env in commands if command[:2] == ["poetry", "install"])
+        assert install_env is not None
+        venv = anyio.Path(install_env["VIRTUAL_ENV"])
+        assert venv.parent.parent == tmp_path / "cache"
+        assert await (venv.parent / ".complete").exists()
+
+        commands.clear()
+        assert await audit_utils._install_poetry_dependencies({}, {}, [], env, cwd)
+        assert [command for command, _ in commands] == [["python", "--version"], ["poetry", "--version"]]
+
+        # The key depends on the lock file
+        await (cwd / "poetry.lock").write_text("changed", encoding="utf-8")
+        commands.clear()
+        assert await audit_utils._install_poetry_dependencies({}, {}, [], env, cwd)
+        install_env = next(env for command, env in commands if command[:2] == ["poetry", "install"])
+        assert install_env is not None
+        assert install_env["VIRTUAL_ENV"] != str(venv)
+
+
+@pytest.mark.asyncio
+async def test_get_snyk_fingerprint(tmp_path: Path) -> None:
+    """The fingerprint changes with the tracked manifests and the configuration, not with the other files."""
+    cwd = anyio.Path(tmp_path)
+    for command in (["git", "init", "-q"], ["git", "config", "user.email", "test@example.com"]):
+        await module_utils.run_timeout(command, None, 10, "", "", "", cwd)
+    await (cwd / "sub").mkdir()
+    await (cwd / "sub" / "requirements.txt").write_text("requests==2.0.0\n", encoding="utf-8")
+    await (cwd / "README.md").write_text("Readme\n", encoding="utf-8")
+    await module_utils.run_timeout(["git", "add", "."], None, 10, "", "", "", cwd)
+
+    fingerprint = await audit_utils.get_snyk_fingerprint({}, {}, cwd)
+    assert fingerprint is not None
+
+    await (cwd / "README.md").write_text("Other readme\n", encoding="utf-8")
+    await module_utils.run_timeout(["git", "add", "."], None, 10, "", "", "", cwd)
+    assert await audit_utils.get_snyk_fingerprint({}, {}, cwd) == fingerprint
+
+    assert (
+        await audit_utils.get_snyk_fingerprint({"test-arguments": ["--all-projects"]}, {}, cwd) != fingerprint
+    )
+
+    await (cwd / "sub" / "requirements.txt").write_text("requests==2.0.1\n", encoding="utf-8")
+    await module_utils.run_timeout(["git", "add", "."], None, 10, "", "", "", cwd)
+    assert await audit_utils.get_snyk_fingerprint({}, {}, cwd) != fingerprint
+
+
+def test_is_snyk_result_reusable() -> None:
+    now = datetime.datetime(2026, 10, 18, tzinfo=datetime.UTC)
+    cached = {"fingerprint": "abc", "tested_at": (now - datetime.timedelta(days=1)).isoformat()}
+    assert _is_snyk_result_reusable(cached, "abc", now)
+    assert not _is_snyk_result_reusable(cached, "def", now)
+    assert not _is_snyk_result_reusable(cached, None, now)
+    assert not _is_snyk_result_reusable(None, "abc", now)
+    # Forced refresh of the vulnerabilities
+    cached["tested_at"] = (now - datetime.timedelta(days=4)).isoformat()
+    assert not _is_snyk_result_reusable(cached, "abc", now)
+    # An ignore rule of the .snyk policies expired
+    cached["tested_at"] = (now - datetime.timedelta(days=1)).isoformat()
+    cached["policy_expires"] = (now + datetime.timedelta(hours=1)).isoformat()
+    assert _is_snyk_result_reusable(cached, "abc", now)
+    cached["policy_expires"] = (now - datetime.timedelta(hours=1)).isoformat()
+    assert not _is_snyk_result_reusable(cached, "abc", now)
+
+
+def test_is_snyk_monitor_needed() -> None:
+    now = datetime.datetime(2026, 10, 18, tzinfo=datetime.UTC)
+    monitored = {"fingerprint": "abc", "monitored_at": (now - datetime.timedelta(days=1)).isoformat()}
+    assert not _is_snyk_monitor_needed(monitored, "abc", now)
+    assert _is_snyk_monitor_needed(monitored, "def", now)
+    assert _is_snyk_monitor_needed(monitored, None, now)
+    assert _is_snyk_monitor_needed(None, "abc", now)
+    monitored["monitored_at"] = (now - datetime.timedelta(days=8)).isoformat()
+    assert _is_snyk_monitor_needed(monitored, "abc", now)
+
+
+@pytest.mark.asyncio
+async def test_process_snyk_monitor_coalesced() -> None:
+    """The dependencies are uploaded only if they changed since the last successful upload."""
+    context = Mock()
+    context.module_event_data = _EventData(type="snyk-monitor", version="1.0")
+    context.module_config = {}
+    context.github_project.owner = "camptocamp"
+    context.github_project.repository = "test"
+    entries = Mock()
+    entries.get = AsyncMock(return_value=None)
+    entries.flush = AsyncMock(return_value=True)
+    snyk_monitor = AsyncMock(return_value=True)
+    with (
+        patch.object(
+            module_utils.GIT_WORKTREE_CACHE, "working_tree", return_value=_make_worktree_mock(Path("/tmp"))
+        ),
+        patch.object(module, "TransversalStatusEntries", return_value=entries),
+        patch.object(audit_utils, "get_snyk_fingerprint", AsyncMock(return_value="abc")),
+        patch.object(audit_utils, "snyk_monitor", snyk_monitor),
+        patch("github_app_geo_project.module.audit._get_python_version", AsyncMock(return_value=None)),
+    ):
+        output = await _process_snyk_monitor(context)
+        assert output.success
+        snyk_monitor.assert_awaited_once()
+        key, data = entries.set.call_args.args
+        assert key == "camptocamp/test:1.0:monitor"
+        assert data["fingerprint"] == "abc"
+
+        # Already uploaded by a previous job of the branch
+        entries.get = AsyncMock(return_value=data)
+        output = await _process_snyk_monitor(context)
+        assert output.success
+        snyk_monitor.assert_awaited_once()
+
+
+def test_vulnerabilities_json_round_trip() -> None:
+    vulnerabilities = {
+        "requirements.txt": [
+            VulnerabilityData(
+                file="requirements.txt",
+                package_name="requests",
+                package_version="2.0.0",
+                package_manager="pip",
+                severity="high",
+                snyk_id="SNYK-1",
+                cve_ids=["CVE-1"],
+                cwe_ids=[],
+                title="Title",
+                fixed_in=["2.0.1"],
+                is_upgradable=True,
+                is_patchable=False,
+            ),
+        ],
+    }
+    data = json.loads(json.dumps(_vulnerabilities_to_json(vulnerabilities)))
+    assert _vulnerabilities_from_json(data) == vulnerabilities
+
+
+@pytest.mark.asyncio
+async def test_apt_index_store(tmp_path: Path) -> None:
+    """The indexes are stored on disk, and only downloaded again if they changed."""
+    config: configuration.DpkgConfiguration = {
+        "sources": {
+            "debian_12": [
+                {"url": "http://deb.example.com/debian", "distribution": "bookworm", "components": ["main"]},
+            ],
+        },
+    }
+    packages = b"Package: curl\nVersion: 7.88.1-10\n\nPackage: curl\nVersion: 7.88.1-10+deb12u5\n\nPackage: git\nVersion: 1:2.39.2-1\n"
+    release = (
+        "Origin: Debian\nSHA256:\n"
+        f" {hashlib.sha256(packages).hexdigest()} {len(packages)} main/binary-amd64/Packages\n"
+    )
+    base_url = "http://deb.example.com/debian/dists/bookworm"
+
+    store = apt_index.AptIndexStore(anyio.Path(tmp_path))
+    async with aiointercept(mock_external_urls=True) as responses:
+        responses.get(
+            f"{base_url}/Release",
+            body=release,
+            headers={"Last-Modified": "Wed, 01 Jan 2026 00:00:00 GMT"},
+        )
+        responses.get(f"{base_url}/main/binary-amd64/Packages.xz", body=lzma.compress(packages))
+        assert await store.get_version("debian_12", "curl", config, {}) == "7.88.1-10+deb12u5"
+        assert await store.get_version("debian_12", "git", config, {}) == "1:2.39.2-1"
+        assert await store.get_version("debian_12", "unknown", config, {}) is None
+        with pytest.raises(ValueError, match="debian_11"):
+            await store.get_version("debian_11", "curl", config, {})
+
+    # After a restart the indexes are read from the disk
+    store = apt_index.AptIndexStore(anyio.Path(tmp_path))
+    async with aiointercept(mock_external_urls=True):
+        assert await store.get_version("debian_12", "curl", config, {}) == "7.88.1-10+deb12u5"
+
+    # After the cache duration, the Release file is revalidated
+    headers = {}
+
+    def not_modified(url, **kwargs):
+        headers.update(kwargs["headers"])
+        return CallbackResult(status=304)
+
+    store = apt_index.AptIndexStore(anyio.Path(tmp_path))
+    with patch.object(settings.audit, "dpkg_cache_duration", datetime.timedelta(0)):
+        async with aiointercept(mock_external_urls=True) as responses:
+            responses.get(f"{base_url}/Release", callback=not_modified)
+            assert await store.get_version("debian_12", "curl", config, {}) == "7.88.1-10+deb12u5"
+    assert headers["If-Modified-Since"] == "Wed, 01 Jan 2026 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_process_branch_concurrent() -> None:
+    """The checks of a branch run concurrently, and their results are merged."""
+    running: list[str] = []
+    both_running = asyncio.Event()
+
+    async def process_snyk_dpkg(context, issue_check, intermediate_status, check_type):
+        running.append(check_type)
+        if len(running) == 2:
+            both_running.set()
+        await asyncio.wait_for(both_running.wait(), timeout=5)
+        return [f"{check_type} message"], check_type == "dpkg", [check_type]
+
+    with patch("github_app_geo_project.module.audit._process_snyk_dpkg", process_snyk_dpkg):
+        short_message, success, actions = await _process_branch(Mock(), Mock(), Mock(), ["snyk", "dpkg"])
+    assert short_message == ["snyk message", "dpkg message"]
+    assert not success
+    assert actions == ["snyk", "dpkg"]
+
+    async def process_error(context, issue_check, intermediate_status, check_type):
+        if check_type == "snyk":
+            message = "Snyk error"
+            raise ValueError(message)
+        return [], True, []
+
+    with (
+        patch("github_app_geo_project.module.audit._process_snyk_dpkg", process_error),
+        pytest.raises(ValueError, match="Snyk error"),
+    ):
+        await _process_branch(Mock(), Mock(), Mock(), ["snyk", "dpkg"])
+
+
+@pytest.mark.asyncio
+async def test_pre_commit_cache(tmp_path: Path) -> None:
+    """The hook environments are shared by revisions, and the unused ones are evicted."""
+    cache = environment_cache.PreCommitCache(anyio.Path(tmp_path / "cache"), max_size=10)
+    cwd = anyio.Path(tmp_path / "worktree")
+    await cwd.mkdir()
+    assert await cache.get_env(cwd) == {}
+
+    config_file = cwd / ".pre-commit-config.yaml"
+    await config_file.write_text(
+        "repos:\n  - repo: https://github.com/psf/black\n    rev: 24.1.0\n    hooks:\n      - id: black\n",
+        encoding="utf-8",
+    )
+    env = await cache.get_env(cwd)
+    home = anyio.Path(env["PRE_COMMIT_HOME"])
+    assert await home.exists()
+    await (home / "env").write_text("12345678901", encoding="utf-8")
+
+    # The other configuration keys don't change the environments
+    await config_file.write_text(
+        "exclude: ^tests/\n"
+        "repos:\n  - repo: https://github.com/psf/black\n    rev: 24.1.0\n    hooks:\n      - id: black\n",
+        encoding="utf-8",
+    )
+    assert await cache.get_env(cwd) == env
+    await config_file.write_text(
+        "repos:\n  - repo: https://github.com/psf/black\n    rev: 24.2.0\n    hooks:\n      - id: black\n",
+        encoding="utf-8",
+    )
+    new_env = await cache.get_env(cwd)
+    assert new_env != env
+
+    # The recently used environments aren't evicted
+    await cache.collect()
+    assert await home.exists()
+    assert await (home / ".size").read_text(encoding="utf-8") == "11"
+
+    # The sizes are only computed again when the environments change
+    new_home = anyio.Path(new_env["PRE_COMMIT_HOME"])
+    await (new_home / "env").write_text("1", encoding="utf-8")
+    with patch.object(environment_cache, "_get_size", wraps=environment_cache._get_size) as get_size:
+        await cache.collect()
+    get_size.assert_called_once_with(Path(new_home))
+
+    # The entries removed by another job and the errors are ignored
+    os.utime(home / ".last-used", (0, 0))
+    with patch.object(environment_cache, "_get_shared_entry_size", side_effect=FileNotFoundError):
+        await cache.collect()
+    assert await home.exists()
+    with patch.object(environment_cache, "_evict_unused", side_effect=PermissionError):
+        await cache.collect()
+    assert await home.exists()
+
+    await cache.collect()
+    assert not await home.exists()
+    assert await anyio.Path(new_env["PRE_COMMIT_HOME"]).exists()
+
+
+@pytest.mark.asyncio
+async def test_get_changed_files(tmp_path: Path) -> None:
+    cwd = anyio.Path(tmp_path)
+    for command in (
+        ["git", "init", "-q"],
+        ["git", "config", "user.email", "test@example.com"],
+        ["git", "config", "user.name", "Test"],
+    ):
+        await module_utils.run_timeout(command, None, 10, "", "", "", cwd)
+    for name in ("requirements.txt", "package.json", "README.md"):
+        await (cwd / name).write_text("", encoding="utf-8")
+    await module_utils.run_timeout(["git", "add", "."], None, 10, "", "", "", cwd)
+    await module_utils.run_timeout(["git", "commit", "-q", "-m", "Initial"], None, 10, "", "", "", cwd)
+
+    assert await audit_utils.get_changed_files(cwd) == []
+    await (cwd / "requirements.txt").write_text("requests==2.0.0\n", encoding="utf-8")
+    await (cwd / "package.json").unlink()
+    await (cwd / "new.txt").write_text("", encoding="utf-8")
+    assert await audit_utils.get_changed_files(cwd) == ["requirements.txt"]
+
+
+def _advisory_vulnerability(snyk_id: str, file: str = "requirements.txt") -> VulnerabilityData:
+    return VulnerabilityData(
+        file=file,
+        package_name=f"package-{snyk_id}",
+        package_version="1.0.0",
+        package_manager="pip",
+        severity="high",
+        snyk_id=snyk_id,
+        cve_ids=[],
+        cwe_ids=[],
+        title="Title",
+        fixed_in=["1.0.1"],
+        is_upgradable=True,
+        is_patchable=False,
+    )
+
+
+def _existing_advisory(ghsa_id: str, state: str, data: dict[str, Any]) -> Mock:
+    vulnerabilities = []
+    for vulnerability in data["vulnerabilities"]:
+        package = Mock()
+        package.name = vulnerability["package"]["name"]
+        vulnerabilities.append(
+            Mock(
+                package=package,
+                vulnerable_version_range=vulnerability["vulnerable_version_range"],
+                patched_versions=vulnerability["patched_versions"],
+            ),
+        )
+    return Mock(
+        ghsa_id=ghsa_id,
+        state=state,
+        summary=data["summary"],
+        description=data["description"],
+        severity=data["severity"],
+        identifiers=[],
+        vulnerabilities=vulnerabilities,
+    )
+
+
+def test_get_advisory_data_version_range() -> None:
+    """The vulnerable version range starts at the lowest version, compared as versions."""
+    vulns = [
+        _advisory_vulnerability("SNYK-1")._replace(package_version=version)
+        for version in ("10.0.0", "9.1.0", "9.1.0rc1")
+    ]
+    data = _get_advisory_data("master", "fingerprint", vulns)
+    assert data["vulnerabilities"][0]["vulnerable_version_range"] == ">= 9.1.0rc1"
+    assert "Package: package-SNYK-1@9.1.0rc1, 9.1.0, 10.0.0\n" in data["description"]
+
+    # The versions that can't be parsed sort after the other ones
+    vulns.append(_advisory_vulnerability("SNYK-1")._replace(package_version="1.0.RELEASE"))
+    data = _get_advisory_data("master", "fingerprint", vulns)
+    assert data["vulnerabilities"][0]["vulnerable_version_range"] == ">= 9.1.0rc1"
+
+
+@pytest.mark.asyncio
+async def test_create_security_advisories_reconcile() -> None:
+    """Only the missing advisories are created, and the fixed ones closed, within the rate limit."""
+    unchanged = _advisory_vulnerability("SNYK-1")
+    fixed = _advisory_vulnerability("SNYK-2")
+    new = [_advisory_vulnerability("SNYK-3"), _advisory_vulnerability("SNYK-3", "other/requirements.txt")]
+    unchanged_fingerprint = _get_advisory_fingerprint("master", unchanged)
+    fixed_fingerprint = _get_advisory_fingerprint("master", fixed)
+    existing = [
+        _existing_advisory(
+            "GHSA-1", "draft", _get_advisory_data("master", unchanged_fingerprint, [unchanged])
+        ),
+        _existing_advisory("GHSA-2", "draft", _get_advisory_data("master", fixed_fingerprint, [fixed])),
+        # Of another branch
+        _existing_advisory(
+            "GHSA-3",
+            "draft",
+            _get_advisory_data("1.0", _get_advisory_fingerprint("1.0", fixed), [fixed]),
+        ),
+    ]
+
+    async def paginate(*args: Any, **kwargs: Any) -> Any:
+        del args, kwargs
+        for advisory in existing:
+            yield advisory
+
+    context = Mock()
+    context.github_project.owner = "camptocamp"
+    context.github_project.repository = "test"
+    rest = context.github_project.aio_github.rest
+    rest.paginate = paginate
+    rest.rate_limit.async_get = AsyncMock(
+        return_value=Mock(
+            parsed_data=Mock(
+                resources=Mock(core=Mock(remaining=settings.audit.advisory_rate_limit_reserve + 2))
+            ),
+        ),
+    )
+    rest.security_advisories.async_create_repository_advisory = AsyncMock()
+    rest.security_advisories.async_update_repository_advisory = AsyncMock()
+
+    await _create_security_advisories(context, "master", [unchanged, *new])
+
+    create = rest.security_advisories.async_create_repository_advisory
+    create.assert_awaited_once()
+    description = create.call_args.kwargs["data"]["description"]
+    assert "requirements.txt, other/requirements.txt" not in description
+    assert "other/requirements.txt, requirements.txt" in description
+    assert f"Fingerprint: {_get_advisory_fingerprint('master', new[0])}" in description
+    update = rest.security_advisories.async_update_repository_advisory
+    update.assert_awaited_once()
+    assert update.call_args.kwargs["ghsa_id"] == "GHSA-2"
+    assert update.call_args.kwargs["data"] == {"state": "closed"}
+
+    # Not enough rate limit, the remaining calls are done on the next run
+    rest.rate_limit.async_get.return_value.parsed_data.resources.core.remaining = (
+        settings.audit.advisory_rate_limit_reserve + 1
+    )
+    create.reset_mock()
+    update.reset_mock()
+    await _create_security_advisories(context, "master", [unchanged, *new])
+    assert create.await_count + update.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_toolchain_registry(tmp_path: Path) -> None:
+    versions_dir = anyio.Path(tmp_path / "versions")
+    for version in ("3.11.9", "3.12.2", "3.12.10", "3.1.0"):
+        await (versions_dir / version / "bin").mkdir(parents=True)
+    registry = toolchains.ToolchainRegistry(versions_dir, anyio.Path(tmp_path / "jobs"))
+
+    assert await registry.get_python("3.12") == ("3.12.10", versions_dir / "3.12.10" / "bin")
+    assert await registry.get_python("3.13") is None
+    # Resolved once per worker
+    await (versions_dir / "3.12.11" / "bin").mkdir(parents=True)
+    assert await registry.get_python("3.12") == ("3.12.10", versions_dir / "3.12.10" / "bin")
+
+    async with registry.environment("3.12") as env, registry.environment() as other_env:
+        assert env["PYENV_VERSION"] == "3.12.10"
+        assert env["PATH"].startswith(f"{versions_dir / '3.12.10' / 'bin'}:")
+        assert other_env.get("PYENV_VERSION") == os.environ.get("PYENV_VERSION")
+        # Isolated job environments
+        assert env["PYTHONUSERBASE"] != other_env["PYTHONUSERBASE"]
+        job_dir = anyio.Path(env["PYTHONUSERBASE"]).parent
+        assert await job_dir.exists()
+        await anyio.Path(env["PYTHONUSERBASE"]).mkdir()
+    assert not await job_dir.exists()
+
+
+@pytest.mark.asyncio
+async def test_get_gradle_version(tmp_path: Path) -> None:
+    cwd = anyio.Path(tmp_path)
+    assert await toolchains.get_gradle_version(cwd) is None
+    properties = cwd / "gradle" / "wrapper" / "gradle-wrapper.properties"
+    await properties.parent.mkdir(parents=True)
+    await properties.write_text(
+        "distributionBase=GRADLE_USER_HOME\n"
+        "distributionUrl=https\\://services.gradle.org/distributions/gradle-8.5.1-bin.zip\n",
+        encoding="utf-8",
+    )
+    assert await toolchains.get_gradle_version(cwd) == "8.5"
+
+
+def test_get_overview() -> None:
+    """The overview is read from the aggregate entry, the stale branches relative to the current time."""
+    now = datetime.datetime(2026, 10, 18, tzinfo=datetime.UTC)
+    day = datetime.timedelta(days=1)
+
+    aggregate = _AggregateStatus(
+        counts={"repositories": 3},
+        repositories_by_severity={"critical": 1, "high": 1, "low": 0},
+        vulnerabilities_by_severity={"critical": 1, "high": 2, "low": 1, "medium": 0},
+        unresolved={
+            "a/a": _AggregateUnresolved(name="Snyk check/fix master", since=now - 3 * day),
+            "b/b": _AggregateUnresolved(name="Snyk check/fix master", since=now - 5 * day),
+        },
+        branches={
+            "a/a": {"master": now - 6 * day},
+            "b/b": {"master": now - 6 * day, "1.0": now - 8 * day},
+        },
+        last_update={"updated_at": now},
+    )
+    overview = _get_overview(aggregate, now)
+    assert overview["updated_at"] == now
+    assert overview["repositories_count"] == 3
+    assert overview["severities"] == [
+        {"name": "critical", "repositories": 1, "vulnerabilities": 1},
+        {"name": "high", "repositories": 1, "vulnerabilities": 2},
+        {"name": "low", "repositories": 0, "vulnerabilities": 1},
+    ]
+    assert overview["oldest_unresolved"].repository == "b/b"
+    assert overview["oldest_unresolved"].name == "Snyk check/fix master"
+    # The branches audited 6 days ago aren't stale yet
+    assert [(branch.repository, branch.branch) for branch in overview["stale_branches"]] == [("b/b", "1.0")]
+
+    # Computed at the current time, without any status update
+    overview = _get_overview(aggregate, now + 1.5 * day)
+    assert [(branch.repository, branch.branch) for branch in overview["stale_branches"]] == [
+        ("b/b", "1.0"),
+        ("a/a", "master"),
+        ("b/b", "master"),
+    ]
+
+    overview = _get_overview(_AggregateStatus(), now)
+    assert overview["updated_at"] is None
+    assert overview["repositories_count"] == 0
+    assert overview["severities"] == []
+    assert overview["oldest_unresolved"] is None
+
+    status = _TransversalStatus(aggregate=aggregate)
+    output = Audit().get_transversal_dashboard(module.TransversalDashboardContext(status, {}))
+    assert "overview" in output.data
+    assert (
+        "overview"
+        not in Audit()
+        .get_transversal_dashboard(module.TransversalDashboardContext(status, {"view": "repositories"}))
+        .data
+    )
+    assert Audit().get_transversal_status_entry_keys({}) == ["_aggregate"]
+    assert Audit().get_transversal_status_entry_keys({"repository": "a/a"}) == ["a/a"]
+    assert Audit().get_transversal_status_entry_keys({"view": "repositories"}) is None
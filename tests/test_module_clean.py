@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from github_app_geo_project import module
 from github_app_geo_project.module.clean import Clean
 
 
@@ -57,6 +58,7 @@ def _make_context(commits):
     context.module_event_data.type = "pull_request"
     context.module_config = {"docker": False, "git": []}
     context.github_event_data = {"repository": {"default_branch": "main"}}
+    context.github_event = module.GitHubEvent("pull_request", context.github_event_data)
     context.github_project.owner = "owner"
     context.github_project.repository = "repo"
     context.github_project.aio_github.paginate = MagicMock(return_value=_aiter(commits))
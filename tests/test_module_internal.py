@@ -0,0 +1,143 @@
+# Copyright (c) 2026, Camptocamp SA
+
+import datetime
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import pytest
+
+from github_app_geo_project import configuration, module
+from github_app_geo_project.module import internal
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def _get_context(module_event_name: str, event_data: internal._EventData) -> Mock:
+    context = Mock()
+    context.session = AsyncMock()
+    context.session.add = Mock()
+    context.github_event_name = "repo_event"
+    context.github_event_data = {"type": "event", "name": "daily"}
+    context.github_event = module.GitHubEvent(context.github_event_name, context.github_event_data)
+    context.module_event_name = module_event_name
+    context.module_event_data = event_data
+    context.github_project.application.name = "app"
+    return context
+
+
+@pytest.mark.asyncio
+async def test_process_event_batches_repositories() -> None:
+    context = _get_context("event", internal._EventData(modules=["mod"]))
+    installation = Mock(id=12)
+    context.github_project.application.aio_github.rest.apps.async_list_installations = AsyncMock(
+        return_value=Mock(parsed_data=[installation]),
+    )
+    repos = [Mock(owner=Mock(login="owner")) for _ in range(5)]
+    for index, repo in enumerate(repos):
+        repo.name = f"repo{index}"
+    aio_github = context.github_project.application.aio_github.with_auth.return_value
+    aio_github.rest.paginate = Mock(return_value=_aiter(repos))
+
+    with patch("github_app_geo_project.module.internal.settings") as settings:
+        settings.test.app_name = None
+        settings.dispatcher.cron_batch_size = 2
+        settings.dispatcher.cron_spread_window = datetime.timedelta(hours=2)
+        settings.dispatcher.cron_installation_budget = 1
+        await internal._process_event(context)
+
+    jobs = [call.args[0] for call in context.session.add.call_args_list]
+    assert [job.module_event_name for job in jobs] == ["repos_event"] * 3
+    assert [job.module_event_data["repositories"] for job in jobs] == [
+        ["owner/repo0", "owner/repo1"],
+        ["owner/repo2", "owner/repo3"],
+        ["owner/repo4"],
+    ]
+    assert all(job.owner is None and job.repository is None for job in jobs)
+    assert all(job.module_event_data["installation_id"] == 12 for job in jobs)
+    # 5 repositories with one module and a budget of one job per hour
+    assert all(job.module_event_data["spread_window"] == "PT5H" for job in jobs)
+
+
+@pytest.mark.asyncio
+async def test_process_repos_event() -> None:
+    context = _get_context(
+        "repos_event",
+        internal._EventData(
+            modules=["mod", "other"],
+            installation_id=12,
+            repositories=["owner/repo1", "owner/repo2"],
+            spread_start=datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC),
+            spread_window=datetime.timedelta(hours=2),
+        ),
+    )
+    context._replace = Mock(return_value=_get_context("repo_event", context.module_event_data))
+    current_module = MagicMock()
+    current_module.get_actions.return_value = [module.Action(data={}, priority=module.PRIORITY_CRON)]
+    current_module.jobs_unique_on.return_value = None
+    current_module.event_data_to_json.return_value = {}
+    configs = {
+        "owner/repo1": {},
+        "owner/repo2": {"mod": {"enabled": False}},
+    }
+
+    async def get_cached_configuration(github_project):
+        return configs[f"{github_project.owner}/{github_project.repository}"]
+
+    with (
+        patch.object(configuration, "get_cached_configuration", get_cached_configuration),
+        patch.dict(
+            "github_app_geo_project.module.modules.MODULES", {"mod": current_module, "other": current_module}
+        ),
+        patch(
+            "github_app_geo_project.module.utils.insert_jobs",
+            new_callable=AsyncMock,
+        ) as insert_jobs,
+    ):
+        nb_repositories, number = await internal._process_repos_event(context)
+
+    assert nb_repositories == 2
+    assert number == 3
+    insert_jobs.assert_awaited_once()
+    jobs = insert_jobs.call_args.args[1]
+    assert [(job["repository"], job["module"]) for job in jobs] == [
+        ("repo1", "mod"),
+        ("repo1", "other"),
+        ("repo2", "other"),
+    ]
+    assert all(job["module_event_name"] == "repo_event" for job in jobs)
+    assert all(job["github_event_name"] == "repo_event" for job in jobs)
+    assert jobs[0]["run_after"] == jobs[1]["run_after"]
+    assert jobs[0]["run_after"] != jobs[2]["run_after"]
+    context.session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_cached_configuration() -> None:
+    github_project = Mock(owner="owner", repository="cached")
+    github_project.application.name = "app"
+    configuration._CONFIGURATION_CACHE.clear()
+    with patch.object(
+        configuration,
+        "get_configuration",
+        new_callable=AsyncMock,
+        return_value={"mod": {"enabled": False}},
+    ) as get_configuration:
+        assert await configuration.get_cached_configuration(github_project) == {"mod": {"enabled": False}}
+        assert await configuration.get_cached_configuration(github_project) == {"mod": {"enabled": False}}
+    get_configuration.assert_awaited_once()
+    configuration._CONFIGURATION_CACHE.clear()
+
+
+def test_get_run_after() -> None:
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+    window = datetime.timedelta(hours=2)
+    run_after = internal._get_run_after("owner/repo", start, window)
+    assert run_after is not None
+    assert start <= run_after < start + window
+    # Deterministic per repository
+    assert internal._get_run_after("owner/repo", start, window) == run_after
+    assert internal._get_run_after("owner/other", start, window) != run_after
+    assert internal._get_run_after("owner/repo", None, window) is None
+    assert internal._get_run_after("owner/repo", start, datetime.timedelta()) is None
@@ -246,6 +246,7 @@ async def test_links_get_actions() -> None:
         return_value=event_data,
     ):
         context.event_data = {"pull_request": pull_request}
+        context.github_event = module.GitHubEvent("pull_request", context.event_data)
 
         # Create the Links module instance
         links_module = links.Links()
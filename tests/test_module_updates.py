@@ -40,6 +40,7 @@ async def test_get_actions():
         owner="camptocamp",
         repository="test",
         github_application=MagicMock(),
+        github_event=module.GitHubEvent("repository_dispatch", {"type": "event", "name": "updates-cron"}),
     )
     actions = updates_module.get_actions(context)
     assert len(actions) == 1
@@ -1,10 +1,12 @@
 # Copyright (c) 2026, Camptocamp SA
 
 import datetime
-from unittest.mock import AsyncMock, MagicMock, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
+import githubkit.exception
 import pytest
 
+from github_app_geo_project import models, module
 from github_app_geo_project.module import utils
 
 
@@ -369,3 +371,168 @@ def test_to_html_css_backgrounds_included() -> None:
     """_to_html_css should include background styles."""
     _html, css = utils._to_html_css("text")
     assert "body_" in css or "background" in css or css.strip()
+
+
+@pytest.mark.asyncio
+async def test_create_jobs_checks_one_update() -> None:
+    session = AsyncMock()
+    github_project = MagicMock()
+    github_project.owner = "owner"
+    github_project.repository = "repo"
+    check_runs = {"1": 101, "2": 102}
+
+    async def _create(**kwargs):
+        if kwargs["external_id"] not in check_runs:
+            response = MagicMock()
+            response.status_code = 422
+            raise githubkit.exception.RequestFailed(response)
+        return MagicMock(parsed_data=MagicMock(id=check_runs[kwargs["external_id"]]))
+
+    github_project.aio_github.rest.checks.async_create = AsyncMock(side_effect=_create)
+    current_module = MagicMock()
+    current_module.title.return_value = "Module"
+
+    await utils.create_jobs_checks(
+        session,
+        [(1, current_module), (2, current_module), (3, current_module)],
+        github_project,
+        module.GitHubEvent("pull_request", {"pull_request": {"head": {"sha": "abc"}}}),
+        "https://example.com/",
+    )
+
+    assert github_project.aio_github.rest.checks.async_create.await_count == 3
+    assert {
+        call.kwargs["head_sha"] for call in github_project.aio_github.rest.checks.async_create.await_args_list
+    } == {"abc"}
+    session.execute.assert_awaited_once()
+    statement = session.execute.await_args.args[0]
+    assert statement.is_dml
+    assert "check_run_id" in str(statement)
+
+
+@pytest.mark.asyncio
+async def test_create_jobs_checks_no_job() -> None:
+    session = AsyncMock()
+    github_project = MagicMock()
+
+    await utils.create_jobs_checks(
+        session,
+        [],
+        github_project,
+        module.GitHubEvent("push", {}),
+        "https://example.com/",
+    )
+
+    session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_check_run_update() -> None:
+    session = AsyncMock()
+    session.add = Mock()
+    github_project = MagicMock()
+    github_project.application.name = "app"
+    github_project.owner = "owner"
+    github_project.repository = "repo"
+
+    await utils.enqueue_check_run_update(session, github_project, 12, {"status": "in_progress"})
+    await utils.enqueue_check_run_update(session, github_project, 12, {"status": "completed"})
+
+    # Append-only, without any query
+    session.execute.assert_not_awaited()
+    assert [
+        (update.check_run_id, update.data) for update in [call.args[0] for call in session.add.call_args_list]
+    ] == [
+        (12, {"status": "in_progress"}),
+        (12, {"status": "completed"}),
+    ]
+
+
+def test_merge_check_run_update() -> None:
+    # in_progress → completed collapse in one update
+    data = utils._merge_check_run_update(
+        {"status": "in_progress", "details_url": "url"}, {"status": "completed", "conclusion": "success"}
+    )
+    assert data == {"status": "completed", "conclusion": "success", "details_url": "url"}
+
+    # Back to queued on re-run
+    assert utils._merge_check_run_update(data, {"status": "queued"}) == {
+        "status": "queued",
+        "details_url": "url",
+    }
+
+
+def _get_check_run_update(
+    id_: int, check_run_id: int, data: dict[str, str], attempts: int = 0
+) -> models.CheckRunUpdate:
+    return models.CheckRunUpdate(
+        id=id_,
+        application="app",
+        owner="owner",
+        repository="repo",
+        check_run_id=check_run_id,
+        data=data,
+        attempts=attempts,
+    )
+
+
+@pytest.mark.asyncio
+async def test_flush_check_run_updates() -> None:
+    updates = [
+        _get_check_run_update(10, 1, {"status": "in_progress"}),
+        _get_check_run_update(11, 2, {"status": "completed"}),
+        _get_check_run_update(12, 1, {"status": "completed", "conclusion": "success"}, attempts=2),
+        _get_check_run_update(13, 3, {"status": "completed"}),
+        # An older update of this check run is sent by another worker
+        _get_check_run_update(14, 4, {"status": "completed"}),
+    ]
+    claim_session = AsyncMock()
+    claim_session.execute.side_effect = [
+        MagicMock(scalars=Mock(return_value=MagicMock(all=Mock(return_value=updates)))),
+        MagicMock(all=Mock(return_value=[(1, 10), (2, 11), (3, 13), (4, 9)])),
+        MagicMock(),
+    ]
+    result_session = AsyncMock()
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__.side_effect = [claim_session, result_session]
+
+    async def _update(**kwargs):
+        # The claim is committed before sending
+        claim_session.commit.assert_awaited_once()
+        if kwargs["check_run_id"] != 1:
+            response = MagicMock()
+            response.status_code = 404 if kwargs["check_run_id"] == 2 else 502
+            raise githubkit.exception.RequestFailed(response)
+
+    github_project = MagicMock()
+    github_project.aio_github.rest.checks.async_update = AsyncMock(side_effect=_update)
+    with patch.object(utils, "_get_cached_github_project", AsyncMock(return_value=github_project)):
+        assert await utils.flush_check_run_updates(session_maker) == 3
+
+    assert [
+        (call.kwargs["check_run_id"], call.kwargs["data"])
+        for call in github_project.aio_github.rest.checks.async_update.await_args_list
+    ] == [
+        (1, {"status": "completed", "conclusion": "success"}),
+        (2, {"status": "completed"}),
+        (3, {"status": "completed"}),
+    ]
+    # The claimed updates are leased
+    lease = claim_session.execute.await_args_list[2].args[0]
+    assert lease.is_update
+    assert lease.compile().params["id_1"] == [10, 12, 11, 13]
+
+    statements = [call.args[0] for call in result_session.execute.await_args_list]
+    # Sent, and not retryable
+    assert statements[0].is_delete
+    assert statements[0].compile().params["id_1"] == [10, 12]
+    assert statements[1].is_delete
+    assert statements[1].compile().params["id_1"] == [11]
+    # Retried later
+    assert statements[2].is_update
+    params = statements[2].compile().params
+    assert params["id_1"] == [13]
+    assert params["attempts"] == 1
+    assert params["last_error"] is not None
+    assert params["next_attempt_at"] > datetime.datetime.now(tz=datetime.UTC)
+    result_session.commit.assert_awaited_once()
@@ -1,14 +1,17 @@
 # Copyright (c) 2026, Camptocamp SA
 
 import datetime
+import io
 import json
 import os
-from unittest.mock import AsyncMock, MagicMock, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
+import anyio
 import githubkit.exception
 import pytest
-from aiointercept import aiointercept
+from aiointercept import CallbackResult, aiointercept
 
+from github_app_geo_project.module import TransversalDashboardContext
 from github_app_geo_project.module.versions import (
     Versions,
     _build_reverse_dependency,
@@ -18,12 +21,17 @@ from github_app_geo_project.module.versions import (
     _Dependency,
     _DependencyReverse,
     _EventData,
+    _get_branch_cache_key,
     _IntermediateStatus,
     _is_supported,
+    _JsonStreamReader,
     _order_versions,
     _parse_support_date,
     _read_dependencies,
+    _read_dependencies_stream,
+    _rebuild_global_indexes,
     _rebuild_repo_dependencies,
+    _rebuild_repo_names,
     _Support,
     _support_category,
     _support_cmp,
@@ -36,8 +44,13 @@ from github_app_geo_project.module.versions import (
     _TransversalStatusRepo,
     _TransversalStatusVersion,
     _TransversalStatusVersions,
+    _update_global_indexes,
     _update_upstream_versions,
+    _Version,
+    _version_key,
+    endoflife,
 )
+from github_app_geo_project.settings import settings
 
 
 def test_get_actions() -> None:
@@ -69,6 +82,10 @@ async def test_process_step_2() -> None:
     response = MagicMock()
     response.status_code = 404
     repos.async_get_content.side_effect = githubkit.exception.RequestFailed(response)
+    repos.async_get_branch.return_value = Mock(parsed_data=Mock(commit=Mock(sha="abc")))
+    context.session = AsyncMock()
+    context.session.begin_nested = MagicMock()
+    context.session.execute.return_value = Mock(one_or_none=Mock(return_value=None), rowcount=1)
 
     os.environ["TEST"] = "TRUE"
     os.environ["RENOVATE_GRAPH"] = json.dumps(
@@ -1392,72 +1409,125 @@ def test_canonical_minor_version(datasource, version, expected) -> None:
 
 
 @pytest.mark.asyncio
-async def test_update_upstream_versions() -> None:
-    async with aiointercept(mock_external_urls=True) as responses:
-        context = Mock()
-        context.transversal_status = _TransversalStatus()
-        context.module_config = {
-            "external-packages": [
-                {"package": "package1", "datasource": "datasource1"},
-                {"package": "package2", "datasource": "datasource2"},
-            ],
-        }
+async def test_update_upstream_versions(tmp_path) -> None:
+    client = endoflife.EndOfLifeClient(anyio.Path(tmp_path))
+    with patch.object(endoflife, "ENDOFLIFE_CLIENT", client):
+        async with aiointercept(mock_external_urls=True) as responses:
+            context = Mock()
+            context.transversal_status = _TransversalStatus()
+            context.module_config = {
+                "external-packages": [
+                    {"package": "package1", "datasource": "datasource1"},
+                    {"package": "package2", "datasource": "datasource2"},
+                ],
+            }
 
+            responses.get(
+                "https://endoflife.date/api/package1.json",
+                payload=[
+                    {
+                        "eol": "2038-12-31",
+                        "cycle": "1.0",
+                    },
+                ],
+                status=200,
+            )
+            responses.get(
+                "https://endoflife.date/api/package2.json",
+                payload=[
+                    {"eol": "2038-12-31", "cycle": "v1.0"},
+                    {"eol": "2039-12-31", "cycle": "v2.0"},
+                ],
+                status=200,
+            )
+
+            module = Versions()
+            intermediate_status = _IntermediateStatus(step=1)
+            await _update_upstream_versions(context, intermediate_status)
+            transversal_status = _TransversalStatus()
+            await module.update_transversal_status(context, intermediate_status, transversal_status)
+
+            for package in (
+                "endoflife.date/package1",
+                "endoflife.date/package2",
+            ):
+                assert package in transversal_status.updated
+                assert package in transversal_status.repositories
+            assert (
+                transversal_status.repositories["endoflife.date/package1"].url
+                == "https://endoflife.date/package1"
+            )
+            assert (
+                transversal_status.repositories["endoflife.date/package2"].url
+                == "https://endoflife.date/package2"
+            )
+            assert transversal_status.repositories["endoflife.date/package1"].versions == {
+                "1.0": _TransversalStatusVersion(
+                    support={"type": "Date", "until": "2038-12-31"},
+                    names_by_datasource={
+                        "datasource1": _TransversalStatusNameByDatasource(names=["package1"])
+                    },
+                ),
+            }
+            assert transversal_status.repositories["endoflife.date/package2"].versions == {
+                "v1.0": _TransversalStatusVersion(
+                    support={"type": "Date", "until": "2038-12-31"},
+                    names_by_datasource={
+                        "datasource2": _TransversalStatusNameByDatasource(names=["package2"])
+                    },
+                ),
+                "v2.0": _TransversalStatusVersion(
+                    support={"type": "Date", "until": "2039-12-31"},
+                    names_by_datasource={
+                        "datasource2": _TransversalStatusNameByDatasource(names=["package2"])
+                    },
+                ),
+            }
+
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_endoflife_client_revalidation(tmp_path) -> None:
+    client = endoflife.EndOfLifeClient(anyio.Path(tmp_path))
+    cycles = [{"eol": "2038-12-31", "cycle": "1.0"}]
+    async with aiointercept(mock_external_urls=True) as responses:
         responses.get(
             "https://endoflife.date/api/package1.json",
-            payload=[
-                {
-                    "eol": "2038-12-31",
-                    "cycle": "1.0",
-                },
-            ],
+            payload=cycles,
             status=200,
+            headers={"ETag": '"abc"', "Last-Modified": "Wed, 01 Jan 2026 00:00:00 GMT"},
         )
-        responses.get(
-            "https://endoflife.date/api/package2.json",
-            payload=[
-                {"eol": "2038-12-31", "cycle": "v1.0"},
-                {"eol": "2039-12-31", "cycle": "v2.0"},
-            ],
-            status=200,
-        )
-
-        module = Versions()
-        intermediate_status = _IntermediateStatus(step=1)
-        await _update_upstream_versions(context, intermediate_status)
-        transversal_status = _TransversalStatus()
-        await module.update_transversal_status(context, intermediate_status, transversal_status)
+        assert await client.get_cycles("package1") == cycles
+        # Not revalidated during the update period
+        assert await client.get_cycles("package1") == cycles
 
-        for package in (
-            "endoflife.date/package1",
-            "endoflife.date/package2",
-        ):
-            assert package in transversal_status.updated
-            assert package in transversal_status.repositories
-        assert (
-            transversal_status.repositories["endoflife.date/package1"].url
-            == "https://endoflife.date/package1"
-        )
-        assert (
-            transversal_status.repositories["endoflife.date/package2"].url
-            == "https://endoflife.date/package2"
-        )
-        assert transversal_status.repositories["endoflife.date/package1"].versions == {
-            "1.0": _TransversalStatusVersion(
-                support={"type": "Date", "until": "2038-12-31"},
-                names_by_datasource={"datasource1": _TransversalStatusNameByDatasource(names=["package1"])},
-            ),
-        }
-        assert transversal_status.repositories["endoflife.date/package2"].versions == {
-            "v1.0": _TransversalStatusVersion(
-                support={"type": "Date", "until": "2038-12-31"},
-                names_by_datasource={"datasource2": _TransversalStatusNameByDatasource(names=["package2"])},
-            ),
-            "v2.0": _TransversalStatusVersion(
-                support={"type": "Date", "until": "2039-12-31"},
-                names_by_datasource={"datasource2": _TransversalStatusNameByDatasource(names=["package2"])},
-            ),
-        }
+    async with aiointercept(mock_external_urls=True) as responses:
+        with patch.object(settings.versions, "external_packages_update_period", datetime.timedelta(0)):
+            headers = {}
+
+            def not_modified(url, **kwargs):
+                headers.update(kwargs["headers"])
+                return CallbackResult(status=304)
+
+            responses.get("https://endoflife.date/api/package1.json", callback=not_modified)
+            assert await client.get_cycles("package1") == cycles
+            assert headers["If-None-Match"] == '"abc"'
+            assert headers["If-Modified-Since"] == "Wed, 01 Jan 2026 00:00:00 GMT"
+
+            # On error the cached cycles are used
+            responses.get("https://endoflife.date/api/package1.json", status=500)
+            assert await client.get_cycles("package1") == cycles
+            responses.get(
+                "https://endoflife.date/api/package1.json",
+                body="<html>",
+                status=200,
+                headers={"Content-Type": "application/json"},
+            )
+            assert await client.get_cycles("package1") == cycles
+            responses.get("https://endoflife.date/api/package2.json", status=500)
+            assert await client.get_cycles("package2") is None
+    await client.close()
 
 
 def test_read_dependency() -> None:
@@ -1765,6 +1835,10 @@ def test_transversal_status_to_json():
             },
         },
         "updated": {},
+        "index_version": 0,
+        "names": {"by_datasources": {}},
+        "packages_repositories": {},
+        "dependents": {},
     }
 
 
@@ -1802,6 +1876,15 @@ def test_order_versions_leading_zeros():
     assert set(ordered_versions) == {"1.1.05", "1.1.5"}
 
 
+def test_version_key() -> None:
+    assert _version_key("20") == _version_key("20.0.0")
+    assert _version_key("3.11") < _version_key("20") < _version_key("main") < _version_key("master")
+    # Parsed once per string
+    assert _version_key("1.2.3") is _version_key("1.2.3")
+    assert _Version("1.2") < _Version("1.10")
+    assert _Version("1.2").__cmp__(_Version("1.2.0")) == 0
+
+
 def test_rebuild_repo_dependencies_index() -> None:
     repo = _TransversalStatusRepo(
         versions={
@@ -2195,3 +2278,248 @@ def test_apply_additional_packages_least_support():
     repo3 = transversal_status.repositories["repo3"]
     main_version = repo3.versions["main"]
     assert main_version.support.type == _SupportType.UNSUPPORTED
+
+
+def _get_indexed_repo(names: list[str], dependencies: list[str]) -> _TransversalStatusRepo:
+    repo = _TransversalStatusRepo(
+        has_security_policy=True,
+        versions={
+            "1.0": _TransversalStatusVersion(
+                support={"type": "Best effort"},
+                names_by_datasource={"pypi": _TransversalStatusNameByDatasource(names=names)},
+                dependencies_by_datasource={
+                    "pypi": _TransversalStatusNameInDatasource(
+                        versions_by_names={
+                            name: _TransversalStatusVersions(versions=["1.0.0"]) for name in dependencies
+                        },
+                    ),
+                },
+            ),
+        },
+    )
+    _rebuild_repo_names(repo)
+    _rebuild_repo_dependencies(repo)
+    return repo
+
+
+def test_update_global_indexes() -> None:
+    transversal_status = _TransversalStatus(
+        repositories={
+            "org/a": _get_indexed_repo(["a"], ["b"]),
+            "org/b": _get_indexed_repo(["b"], []),
+            "org/c": _get_indexed_repo(["c"], ["a"]),
+        },
+    )
+    _rebuild_global_indexes(transversal_status)
+    assert transversal_status.packages_repositories == {
+        "pypi": {"a": ["org/a"], "b": ["org/b"], "c": ["org/c"]}
+    }
+    assert transversal_status.dependents == {"pypi": {"b": ["org/a"], "a": ["org/c"]}}
+
+    old_indexes = {
+        name: (repo_data.names_index, repo_data.dependencies_index)
+        for name, repo_data in transversal_status.repositories.items()
+    }
+    # Changed, removed and added repositories
+    transversal_status.repositories["org/a"] = _get_indexed_repo(["a", "d"], [])
+    del transversal_status.repositories["org/b"]
+    transversal_status.repositories["org/e"] = _get_indexed_repo(["e"], ["d"])
+    _update_global_indexes(transversal_status, old_indexes)
+
+    expected = transversal_status.model_copy(deep=True)
+    _rebuild_global_indexes(expected)
+    assert transversal_status.names == expected.names
+    assert transversal_status.packages_repositories == expected.packages_repositories
+    assert transversal_status.dependents == expected.dependents
+    assert transversal_status.dependents == {"pypi": {"a": ["org/c"], "d": ["org/e"]}}
+    assert set(transversal_status.names.by_datasources["pypi"].by_package) == {"a", "c", "d", "e"}
+
+
+@pytest.mark.asyncio
+async def test_process_step_2_unchanged_branch(monkeypatch: pytest.MonkeyPatch) -> None:
+    versions = Versions()
+    context = Mock()
+    context.module_event_data = _EventData(step=2, version="master")
+    context.github_project.owner = "camptocamp"
+    context.github_project.repository = "test"
+    context.module_config = {}
+    rest = MagicMock()
+    context.github_project.aio_github.rest = rest
+    repos = AsyncMock()
+    rest.repos = repos
+    response = MagicMock()
+    response.status_code = 404
+    repos.async_get_content.side_effect = githubkit.exception.RequestFailed(response)
+    repos.async_get_branch.return_value = Mock(parsed_data=Mock(commit=Mock(sha="abc")))
+    cached_status = {
+        "version_names_by_datasource": {"pypi": {"names": ["test"]}},
+        "version_dependencies_by_datasource": {},
+    }
+    cache_key = await _get_branch_cache_key(context, "master", None)
+    context.session = AsyncMock()
+    cached_at = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=1)
+    context.session.execute.return_value = Mock(
+        one_or_none=Mock(
+            return_value=Mock(
+                data={"key": cache_key, "cached_at": cached_at.isoformat(), "status": cached_status},
+                version=1,
+            ),
+        ),
+    )
+
+    output = await versions.process(context)
+
+    assert output.updated_transversal_status is True
+    assert output.intermediate_status.version == "master"
+    assert output.intermediate_status.version_names_by_datasource == {
+        "pypi": _TransversalStatusNameByDatasource(names=["test"]),
+    }
+    # Only the cache lookup
+    context.session.execute.assert_awaited_once()
+
+    # An entry older than the cache duration is a miss, even if the branch didn't change
+    for data in (
+        {"key": cache_key, "status": cached_status},
+        {
+            "key": cache_key,
+            "cached_at": (cached_at - datetime.timedelta(days=7)).isoformat(),
+            "status": cached_status,
+        },
+    ):
+        context.session.execute.reset_mock()
+        context.session.execute.return_value = Mock(
+            one_or_none=Mock(return_value=Mock(data=data, version=1)),
+        )
+        monkeypatch.setenv("TEST", "TRUE")
+        with (
+            patch(
+                "github_app_geo_project.module.versions._get_names",
+                new=AsyncMock(side_effect=RuntimeError("Cache miss")),
+            ),
+            pytest.raises(RuntimeError, match="Cache miss"),
+        ):
+            await versions.process(context)
+
+    # The key changes with the branch head
+    repos.async_get_branch.return_value = Mock(parsed_data=Mock(commit=Mock(sha="def")))
+    assert await _get_branch_cache_key(context, "master", None) != cache_key
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_json_stream_reader(chunk_size: int) -> None:
+    document = {
+        "a": [1, 2.5e3, None, True, {"b": 'c \\" ] }'}],
+        "d": {"e": [], "f": {}, "g": "h"},
+        "i": 123456789,
+    }
+    reader = _JsonStreamReader(io.StringIO(json.dumps(document, indent=2)), chunk_size=chunk_size)
+    values = {}
+    for key in reader.iter_object():
+        if key == "a":
+            reader.skip_value()
+        elif key == "d":
+            for sub_key in reader.iter_object():
+                values[sub_key] = reader.read_value()
+        else:
+            values[key] = reader.read_value()
+    assert values == {"e": [], "f": {}, "g": "h", "i": 123456789}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 11])
+def test_json_stream_reader_numbers(chunk_size: int) -> None:
+    """The numbers cut by a chunk after a `.`, an `e` or a sign are read completely."""
+    numbers = [1.25, -0.5, 2.5e-3, 1e10, -3.75e12, 12345.678, 0, -7, 6.02e23, 1e-7]
+    document = json.dumps(
+        {"skipped": {"score": 1.25}, "numbers": numbers, "exponent": 1e300, "score": -1.5e-5}
+    )
+    for offset in range(chunk_size):
+        # Shift the document to move the chunk boundaries
+        reader = _JsonStreamReader(io.StringIO(" " * offset + document), chunk_size=chunk_size)
+        values: dict[str, object] = {}
+        for key in reader.iter_object():
+            if key == "skipped":
+                reader.skip_value()
+            elif key == "numbers":
+                values[key] = [reader.read_value() for _ in reader.iter_array()]
+            else:
+                values[key] = reader.read_value()
+        assert values == {"numbers": numbers, "exponent": 1e300, "score": -1.5e-5}
+
+
+def test_read_dependencies_stream() -> None:
+    data = {
+        "repo": "test",
+        "packageData": {
+            "pip_requirements": [
+                {
+                    "packageFile": "requirements.txt",
+                    "deps": [
+                        {"depName": "pkg", "datasource": "pypi", "currentValue": "==1.2.3", "other": [1, {}]},
+                        {"depName": "pkg", "datasource": "pypi", "currentValue": "==1.2.3"},
+                        {"depName": "no-version", "datasource": "pypi"},
+                    ],
+                },
+                {"packageFile": "empty.txt", "deps": []},
+            ],
+            "docker-compose": [
+                {
+                    "deps": [{"depName": "image", "datasource": "docker", "currentValue": "1.0"}],
+                    "packageFile": "docker-compose.yaml",
+                },
+            ],
+        },
+        "metadata": {"renovate": {"version": "42.92.5"}},
+    }
+    context = Mock()
+    context.module_config = {}
+    expected: dict[str, _TransversalStatusNameInDatasource] = {}
+    _read_dependencies(context, {"config": data["packageData"]}, expected)
+    result: dict[str, _TransversalStatusNameInDatasource] = {}
+    _read_dependencies_stream(context, io.StringIO(json.dumps(data)), result)
+    assert result == expected
+    assert set(result) == {"pypi", "docker"}
+
+
+def test_get_transversal_api() -> None:
+    transversal_status = _TransversalStatus(
+        repositories={
+            "org/a": _get_indexed_repo(["a"], ["b"]),
+            "org/b": _get_indexed_repo(["b"], []),
+            "org/c": _get_indexed_repo(["c"], ["b", "a"]),
+        },
+    )
+    versions = Versions()
+
+    result = versions.get_transversal_api(
+        TransversalDashboardContext(transversal_status, {"datasource": "pypi", "package": "b"}),
+    )
+    assert result == {
+        "datasource": "pypi",
+        "package": "b",
+        "version": None,
+        "dependents": [
+            {"repository": "org/a", "branches": [{"branch": "1.0", "versions": ["1.0"]}]},
+            {"repository": "org/c", "branches": [{"branch": "1.0", "versions": ["1.0"]}]},
+        ],
+    }
+    # The indexes are built on demand
+    assert transversal_status.index_version != 0
+
+    result = versions.get_transversal_api(
+        TransversalDashboardContext(
+            transversal_status, {"datasource": "pypi", "package": "a", "version": "1.0.5"}
+        ),
+    )
+    assert result is not None
+    assert [dependent["repository"] for dependent in result["dependents"]] == ["org/c"]
+
+    result = versions.get_transversal_api(
+        TransversalDashboardContext(
+            transversal_status, {"datasource": "pypi", "package": "a", "version": "2.0"}
+        ),
+    )
+    assert result is not None
+    assert result["dependents"] == []
+
+    with pytest.raises(ValueError, match="package"):
+        versions.get_transversal_api(TransversalDashboardContext(transversal_status, {"datasource": "pypi"}))
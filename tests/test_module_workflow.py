@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock, MagicMock
 import githubkit.exception
 import pytest
 
+from github_app_geo_project import module
 from github_app_geo_project.module.workflow import Workflow
 
 _USER = {
@@ -167,6 +168,7 @@ async def test_process_success() -> None:
     context.module_event_name = "workflow_run"
     context.github_event_data = dict(_EVENT)
     context.github_event_data["workflow_run"]["conclusion"] = "success"
+    context.github_event = module.GitHubEvent("workflow_run", context.github_event_data)
 
     default_branch = AsyncMock()
     default_branch.return_value = "master"
@@ -189,9 +191,12 @@ async def test_process_success() -> None:
     workflow = Workflow()
 
     # Call the process method
+    output = await workflow.process(context)
+    assert output.intermediate_status.stabilization_branches == ["master"]
+    assert output.intermediate_status.jobs == []
     transversal_status = await workflow.update_transversal_status(
         context,
-        None,
+        output.intermediate_status,
         {
             "owner/repository": {
                 "workflow_name": {
@@ -216,6 +221,7 @@ async def test_process_failure() -> None:
     context.module_event_name = "workflow_run"
     context.github_event_data = dict(_EVENT)
     context.github_event_data["workflow_run"]["conclusion"] = "failure"
+    context.github_event = module.GitHubEvent("workflow_run", context.github_event_data)
 
     default_branch = AsyncMock()
     default_branch.return_value = "master"
@@ -280,7 +286,15 @@ async def test_process_failure() -> None:
     workflow = Workflow()
 
     # Call the process method
-    transversal_status = await workflow.update_transversal_status(context, None, {})
+    output = await workflow.process(context)
+    actions.async_list_jobs_for_workflow_run.reset_mock()
+    repos.async_get_content.reset_mock()
+    default_branch.reset_mock()
+    transversal_status = await workflow.update_transversal_status(context, output.intermediate_status, {})
+    # The remote data are gathered in process
+    actions.async_list_jobs_for_workflow_run.assert_not_called()
+    repos.async_get_content.assert_not_called()
+    default_branch.assert_not_called()
 
     assert "updated" in transversal_status["owner/repository"]
     del transversal_status["owner/repository"]["updated"]
@@ -307,6 +321,7 @@ async def test_process_cleanup_old_workflows() -> None:
     context.module_event_name = "workflow_run"
     context.github_event_data = dict(_EVENT)
     context.github_event_data["workflow_run"]["conclusion"] = "failure"
+    context.github_event = module.GitHubEvent("workflow_run", context.github_event_data)
 
     default_branch = AsyncMock()
     default_branch.return_value = "master"
@@ -336,9 +351,10 @@ async def test_process_cleanup_old_workflows() -> None:
 
     workflow = Workflow()
 
+    output = await workflow.process(context)
     transversal_status = await workflow.update_transversal_status(
         context,
-        None,
+        output.intermediate_status,
         {
             "owner/repository": {
                 "old_workflow": {
@@ -2,8 +2,14 @@
 
 """Tests for the views."""
 
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
 import pytest
+from fastapi import HTTPException
 
+from github_app_geo_project import module
+from github_app_geo_project.security import AuthType, User
+from github_app_geo_project.views import dashboard
 from github_app_geo_project.views.schema import schema_view
 
 
@@ -16,3 +22,129 @@ async def test_schema_view_returns_dict() -> None:
     assert "$id" in result
     assert "properties" in result
     assert "$defs" in result
+
+
+def _get_api_request(session: AsyncMock, headers: dict[str, str], params: dict[str, str]) -> Mock:
+    request = Mock()
+    request.headers = headers
+    request.query_params = params
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = session
+    request.app.state.async_session_factory = session_factory
+    return request
+
+
+@pytest.mark.asyncio
+async def test_dashboard_api_etag() -> None:
+    """The API returns the module data with an ETag, and 304 without loading the status when it matches."""
+    module_instance = Mock()
+    module_instance.has_transversal_status_entries.return_value = False
+    module_instance.transversal_status_from_json.return_value = {"parsed": True}
+    module_instance.get_transversal_api.return_value = {"result": 1}
+    session = AsyncMock()
+    session.execute.side_effect = [
+        Mock(scalar=Mock(return_value=3)),
+        Mock(scalar=Mock(return_value={"status": 1})),
+        Mock(scalar=Mock(return_value=3)),
+        Mock(scalar=Mock(return_value=3)),
+        Mock(scalar=Mock(return_value=3)),
+    ]
+    user = User(AuthType.GITHUB_TOKEN, "admin", "Admin", is_admin=True)
+    dashboard._STATUS_CACHE.clear()
+
+    with patch.dict("github_app_geo_project.module.modules.MODULES", {"mod": module_instance}):
+        response = await dashboard.dashboard_api(_get_api_request(session, {}, {"q": "a"}), "mod", user)
+        assert response.status_code == 200
+        assert response.body == b'{"result":1}'
+        etag = response.headers["ETag"]
+        assert etag == 'W/"mod-3"'
+        module_instance.get_transversal_api.assert_called_once()
+        assert module_instance.get_transversal_api.call_args.args[0].params == {"q": "a"}
+
+        response = await dashboard.dashboard_api(
+            _get_api_request(session, {"if-none-match": etag}, {}), "mod", user
+        )
+        assert response.status_code == 304
+
+        # Other query on the same status version, the parsed status is reused
+        response = await dashboard.dashboard_api(_get_api_request(session, {}, {"q": "b"}), "mod", user)
+        assert response.status_code == 200
+        module_instance.transversal_status_from_json.assert_called_once_with({"status": 1})
+
+        module_instance.get_transversal_api.side_effect = ValueError("Missing parameter")
+        with pytest.raises(HTTPException) as exception_info:
+            await dashboard.dashboard_api(_get_api_request(session, {}, {}), "mod", user)
+        assert exception_info.value.status_code == 400
+
+        with pytest.raises(HTTPException) as exception_info:
+            await dashboard.dashboard_api(
+                _get_api_request(session, {}, {}), "mod", User(AuthType.GITHUB_TOKEN, "user", "User")
+            )
+        assert exception_info.value.status_code == 403
+    dashboard._STATUS_CACHE.clear()
+
+
+@pytest.mark.asyncio
+async def test_dashboard_cache() -> None:
+    """The rendered dashboard is cached by status version, query parameters and time bucket, with a per user ETag."""
+    module_instance = Mock()
+    module_instance.has_transversal_status_entries.return_value = False
+    module_instance.title.return_value = "Module"
+    module_instance.transversal_status_from_json.return_value = {"parsed": True}
+    module_instance.get_transversal_dashboard.return_value = module.TransversalDashboardOutput(
+        renderer="", data={"html": "<p>dashboard</p>"}
+    )
+    session = AsyncMock()
+    versions = [3, 3, 3, 3, 4, 4]
+    data_results = [{"status": 1}, {"status": 2}]
+
+    async def execute(statement):
+        if "version" in str(statement).split("FROM")[0]:
+            return Mock(scalar=Mock(return_value=versions.pop(0)))
+        return Mock(scalar=Mock(return_value=data_results.pop(0)))
+
+    session.execute = execute
+    admin = User(AuthType.GITHUB_TOKEN, "admin", "Admin", is_admin=True)
+    other_admin = User(AuthType.GITHUB_TOKEN, "other", "Other", is_admin=True)
+    dashboard._STATUS_CACHE.clear()
+    dashboard._RENDER_CACHE.clear()
+
+    with (
+        patch.dict("github_app_geo_project.module.modules.MODULES", {"mod": module_instance}),
+        patch("github_app_geo_project.views.dashboard._get_time_bucket", return_value=1) as get_time_bucket,
+    ):
+        data = await dashboard.dashboard(_get_api_request(session, {}, {}), "mod", admin)
+        assert data["html"] == "<p>dashboard</p>"
+        etag = data["etag"]
+
+        data = await dashboard.dashboard(_get_api_request(session, {"if-none-match": etag}, {}), "mod", admin)
+        assert data == {"etag": etag, "not_modified": True}
+
+        # Same rendering, other user
+        data = await dashboard.dashboard(
+            _get_api_request(session, {"if-none-match": etag}, {}), "mod", other_admin
+        )
+        assert data["html"] == "<p>dashboard</p>"
+        assert data["etag"] != etag
+        module_instance.get_transversal_dashboard.assert_called_once()
+
+        # Other query parameters
+        await dashboard.dashboard(_get_api_request(session, {}, {"repository": "a"}), "mod", admin)
+        assert module_instance.get_transversal_dashboard.call_count == 2
+        module_instance.transversal_status_from_json.assert_called_once_with({"status": 1})
+
+        # New status version
+        data = await dashboard.dashboard(_get_api_request(session, {"if-none-match": etag}, {}), "mod", admin)
+        assert data["etag"] != etag
+        assert module_instance.get_transversal_dashboard.call_count == 3
+        module_instance.transversal_status_from_json.assert_called_with({"status": 2})
+        etag = data["etag"]
+
+        # New time bucket, rendered again from the parsed status
+        get_time_bucket.return_value = 2
+        data = await dashboard.dashboard(_get_api_request(session, {"if-none-match": etag}, {}), "mod", admin)
+        assert data["etag"] != etag
+        assert module_instance.get_transversal_dashboard.call_count == 4
+        assert module_instance.transversal_status_from_json.call_count == 2
+    dashboard._STATUS_CACHE.clear()
+    dashboard._RENDER_CACHE.clear()